@@ -1,92 +1,85 @@
-import folium
-from folium.plugins import MarkerCluster
-from selenium import webdriver
-from io import BytesIO
-from PIL import Image
-import webbrowser
-import tempfile
-import aiohttp
-import asyncio
-import math
-from pyproj import Proj, transform
-from datetime import datetime, timedelta
+import time
+_MODULE_START = time.perf_counter()  # Reference point for --profile-startup
+from datetime import datetime, timedelta, timezone
 from threading import Thread
 import os
+import sys
 import json
-import time
+import importlib
 import numpy as np
-from scipy.signal import find_peaks
-import matplotlib
-matplotlib.use('Agg')  # Set the backend to non-interactive
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 import tkinter as tk
-from tkinter import ttk, messagebox
-import subprocess
-import os
-import signal
-import numpy as np
-from PIL import Image, ImageTk, ImageDraw
+from tkinter import ttk, messagebox, filedialog
+from PIL import Image, ImageDraw
 import queue
 import threading
-import time
-from datetime import datetime, timezone
-import ephem
-import pyaudio
 import random
-import json
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import WebDriverException
-
-class Aircraft:
-    def __init__(self, icao_id, callsign=""):
-        self.icao_id = icao_id
-        self.callsign = callsign
-        self.positions = []  # List of (lat, lon, alt, timestamp) tuples
-        self.altitude = 0
-        self.speed = 0
-        self.heading = 0
-        self.last_update = datetime.min
-        self.signal_strength = 0
-        self.color = 'blue'  # Default color for aircraft
-
-    def update_position(self, lat, lon, alt, timestamp, signal_strength):
-        self.positions.append((lat, lon, alt, timestamp))
-        self.altitude = alt
-        self.last_update = timestamp
-        self.signal_strength = signal_strength
-        # Calculate speed and heading if we have at least 2 positions
-        if len(self.positions) > 1:
-            prev_pos = self.positions[-2]
-            time_diff = (timestamp - prev_pos[3]).total_seconds()
-            if time_diff > 0:
-                # Calculate distance using Haversine formula
-                R = 6371000  # Earth's radius in meters
-                lat1, lon1 = math.radians(prev_pos[0]), math.radians(prev_pos[1])
-                lat2, lon2 = math.radians(lat), math.radians(lon)
-                dlat = lat2 - lat1
-                dlon = lon2 - lon1
-                a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-                c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-                distance = R * c  # Distance in meters
-                self.speed = distance / time_diff  # Speed in m/s
-                # Calculate heading
-                y = math.sin(lon2 - lon1) * math.cos(lat2)
-                x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math  .cos(lat2) * math.cos(lon2 - lon1)
-                self.heading = (math.  degrees(math.atan2(y, x)) + 360) % 360
-
-class Tower:
-    def __init__(self, name, lat, lon, freq, range_km=50):
-        self.name = name
-        self.lat = lat
-        self.lon = lon
-        self.frequency = freq
-        self.range_km = range_km
-        self.aircraft = {}  # icao_id: Aircraft objects
-        self.last_scan = datetime.min
+import argparse
+from sdr_metrics import MetricsRegistry, InstrumentedQueue, start_metrics_server, start_metrics_logger
+from sdr_freqdb import FrequencyDB, POLICE, AIRPORT, format_mhz
+from sdr_tracks import AircraftTable, Tower
+from sdr_geo import update_kinematics
+from sdr_display import FrameLimiter, ScaledImageView
+from sdr_spectrum import SpectrumAnalyzer, SpectrumView
+from sdr_signal import BANDWIDTH_HZ, SignalMonitor
+from sdr_uidispatch import UIDispatcher
+from sdr_supervisor import SDRSupervisor
+from sdr_devices import DeviceBusy, DeviceManager, fake_devices
+
+# Heavy optional dependencies, grouped by the subsystem that loads them on first use
+SUBSYSTEM_MODULES = {
+    "map": ("sdr_maprender",),
+    "adsb": ("sdr_adsb",),
+    "replay": ("sdr_replay",),
+    "recorder": ("sdr_recorder",),
+    "satellite": ("ephem",),
+    "audio": ("pyaudio", "sdr_dsp", "sdr_tones", "sdr_denoise"),
+    "airband": ("sdr_airband",),
+    "scanner": ("sdr_distscan", "sdr_tones"),
+}
+_lazy_import_times = {}
+
+
+def lazy_import(name):
+    """Import a heavy module on first use and record how long the import took"""
+    module = sys.modules.get(name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        _lazy_import_times[name] = time.perf_counter() - start
+    return module
+
+
+def loaded_subsystems():
+    """Return the subsystems whose heavy dependencies have been imported so far"""
+    return [name for name, modules in SUBSYSTEM_MODULES.items()
+            if any(m in sys.modules for m in modules)]
+
+
+def estimate_scan_power(raw_chunks):
+    """Estimate 0-100 signal strength from raw 8-bit chunks read during a scan dwell"""
+    if not raw_chunks:
+        return None
+    samples = np.frombuffer(b"".join(raw_chunks), dtype=np.uint8).astype(np.float32) / 255.0 - 0.5
+    if len(samples) == 0:
+        return None
+    rms = np.sqrt(np.mean(samples**2))
+    return min(100, max(0, (rms / 0.3) * 100))  # Scale to 0-100
+
+
+def write_audio(stream, data, underruns):
+    """Write to a PyAudio stream, counting output underflows instead of treating them as errors"""
+    try:
+        stream.write(data, exception_on_underflow=True)
+    except OSError as e:
+        # PortAudio still plays the chunk; the error only reports the gap before it
+        if getattr(e, 'errno', None) != lazy_import("pyaudio").paOutputUnderflowed:
+            raise
+        underruns.inc()
+
 
 class SatelliteTracker:
     def __init__(self):
+        ephem = lazy_import("ephem")
         self.observer = ephem.Observer()
         self.observer.elevation = 50
         self.noaa_sats = {}
@@ -104,12 +97,13 @@ class SatelliteTracker:
                 if "NOAA" in name:
                     line1 = tle_data[i+1].strip()
                     line2 = tle_data[i+2].strip()
-                    self.noaa_sats[name] = ephem.readtle(name, line1, line2)
+                    self.noaa_sats[name] = lazy_import("ephem").readtle(name, line1, line2)
         except Exception as e:
             print(f"TLE update failed: {e}")
             self.load_fallback_tles()
 
     def load_fallback_tles(self):
+        ephem = lazy_import("ephem")
         self.noaa_sats = {
             'NOAA 15': ephem.readtle(
                 "NOAA 15",
@@ -137,6 +131,7 @@ class SatelliteTracker:
         sat.compute(self.observer)
         
         try:
+            ephem = lazy_import("ephem")
             tr, azr, tt, altt, ts, azs = self.observer.next_pass(sat)
             return {
                 'rise_time': ephem.localtime(tr),
@@ -149,6 +144,8 @@ class SatelliteTracker:
             return None
 
 class NOAADecoder:
+    LABEL_ROWS = 64  # Rows at the top redrawn with the line count and signal level on every line
+
     def __init__(self):
         self.reset()
         
@@ -192,7 +189,7 @@ class NOAADecoder:
         draw = ImageDraw.Draw(self.current_image)
         timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')
         draw.text((20, 20), 
-                 f"NOAA APT Line {self.line_counter}\n{timestamp}\nSNR: {self.signal_quality:.1f}%", 
+                 f"NOAA APT Line {self.line_counter}\n{timestamp}\nSignal: {self.signal_quality:.1f}%", 
                  fill="white")
         return self.current_image, self.signal_quality
     
@@ -227,7 +224,7 @@ class GOESDecoder:
         
         timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')
         draw.text((20, 20),
-                 f"GOES-16 LRIT\n{timestamp}\nSNR: {self.signal_quality:.1f}%",
+                 f"GOES-16 LRIT\n{timestamp}\nSignal: {self.signal_quality:.1f}%",
                  fill="white")
         
         if self.current_image:
@@ -238,14 +235,26 @@ class GOESDecoder:
         return self.current_image, self.signal_quality
 
 class AudioPlayer:
-    def __init__(self):
-        self.p = pyaudio.PyAudio()
+    def __init__(self, metrics=None):
+        self.p = None  # PyAudio is opened on the first start()
         self.stream = None
         self.playing = False
+        metrics = metrics or MetricsRegistry()
+        self.samples_played = metrics.counter("audio_samples_total", player="fm")
+        self.underruns = metrics.counter("audio_underruns_total", player="fm")
+        self.process_time = metrics.histogram("stage_seconds", stage="fm_audio")
+        self.chain = None  # De-emphasis and resampling of rtl_fm's 192k output, built on first start
         
     def start(self, freq):
         self.stop()  # Ensure any existing stream is closed
+        if self.chain is None:
+            self.chain = lazy_import("sdr_dsp").fm_broadcast_chain()
+        else:
+            self.chain.reset()
         try:
+            pyaudio = lazy_import("pyaudio")
+            if self.p is None:
+                self.p = pyaudio.PyAudio()
             self.stream = self.p.open(format=pyaudio.paInt16,
                                     channels=1,
                                     rate=32000,
@@ -268,27 +277,62 @@ class AudioPlayer:
     def play(self, data):
         if self.playing and self.stream:
             try:
-                self.stream.write(data)
+                start = time.perf_counter()
+                data = self.chain.process(data)
+                self.process_time.observe(time.perf_counter() - start)
+                write_audio(self.stream, data, self.underruns)
+                self.samples_played.inc(len(data) // 2)
             except Exception as e:
                 if "Stream closed" not in str(e):  # Ignore expected errors during shutdown
                     print(f"Audio play error: {e}")
 
 class PoliceAudioPlayer:
-    """Specialized audio player for police/services frequencies with noise gate"""
-    def __init__(self):
-        self.p = pyaudio.PyAudio()
+    """Specialized audio player for police/services frequencies with CTCSS filtering, tone squelch and a noise gate"""
+    def __init__(self, metrics=None):
+        self.p = None  # PyAudio is opened on the first start()
         self.stream = None
         self.playing = False
+        metrics = metrics or MetricsRegistry()
+        self.samples_played = metrics.counter("audio_samples_total", player="police")
+        self.underruns = metrics.counter("audio_underruns_total", player="police")
+        self.process_time = metrics.histogram("stage_seconds", stage="police_audio")
         self.noise_gate_level = 0.2  # Changed to float (0.0-1.0)
         self.enable_processing = True
+        self.enable_denoise = False
         self.sample_rate = 32000  # Standard sample rate for voice
-        self.audio_format = pyaudio.paInt16
+        self.gate = None
+        self.tone_decoder = None
+        self.denoiser = None
+        self.chain = None  # Filters and gate keep their state across chunks; built on first use
+        self.required_code = None  # Tone squelch: only play while this CTCSS tone or DCS code is heard
+        self.detected_code = None
+        self.on_tone = None  # Called with each newly detected code (or None) from the audio thread
+        
+    def processing_chain(self):
+        if self.chain is None:
+            dsp = lazy_import("sdr_dsp")
+            tones = lazy_import("sdr_tones")
+            self.gate = dsp.SmoothGate(self.sample_rate, self.noise_gate_level)
+            self.tone_decoder = tones.ToneDecoder(self.sample_rate, on_change=self.tone_changed)
+            # Learns the noise while the gate is shut on a quiet carrier
+            self.denoiser = lazy_import("sdr_denoise").SpectralDenoiser(self.sample_rate,
+                                                                        squelch_closed=self.noise_only)
+            self.denoiser.enabled = self.enable_denoise
+            self.chain = dsp.voice_chain(self.sample_rate, self.gate, self.tone_decoder, self.denoiser)
+            self.apply_tone_squelch()
+        return self.chain
         
     def start(self, freq):
         self.stop()  # Ensure any existing stream is closed
+        if self.chain is not None:
+            self.chain.reset()  # A new channel starts from rest
+            self.tone_changed(None)
         try:
+            pyaudio = lazy_import("pyaudio")
+            if self.p is None:
+                self.p = pyaudio.PyAudio()
             self.stream = self.p.open(
-                format=self.audio_format,
+                format=pyaudio.paInt16,
                 channels=1,
                 rate=self.sample_rate,
                 output=True,
@@ -313,11 +357,50 @@ class PoliceAudioPlayer:
         """Set noise gate level (0-100) as percentage of max amplitude"""
         # Convert 0-100 scale to 0.0-1.0
         self.noise_gate_level = max(0.0, min(1.0, level / 100.0))
+        if self.gate is not None:
+            self.gate.threshold = self.noise_gate_level
+        
+    def set_tone_squelch(self, code):
+        """Only play while ``code`` ("100.0 Hz", "D023N") is heard; None plays everything"""
+        self.required_code = code
+        self.apply_tone_squelch()
+        
+    def tone_changed(self, code):
+        self.detected_code = code
+        self.apply_tone_squelch()
+        if self.on_tone is not None:
+            self.on_tone(code)
+        
+    def apply_tone_squelch(self):
+        if self.gate is not None:
+            self.gate.muted = (self.required_code is not None
+                               and not lazy_import("sdr_tones").same_code(self.detected_code, self.required_code))
         
     def set_processing_enabled(self, enabled):
         """Enable/disable audio processing"""
         self.enable_processing = enabled
         
+    def set_denoise_enabled(self, enabled):
+        """Turn spectral noise reduction on or off; it adds 16 ms of latency"""
+        self.enable_denoise = enabled
+        if self.denoiser is not None:
+            if enabled and not self.denoiser.enabled:
+                self.denoiser.reset()  # Relearn the noise rather than use a stale profile
+            self.denoiser.enabled = enabled
+        
+    def noise_only(self):
+        """True while the noise gate is shut on its own, i.e. the audio is below speech level"""
+        gate = self.gate
+        return gate is not None and gate.threshold > 0 and not gate.muted and not gate.open
+        
+    @property
+    def squelch_open(self):
+        """Whether the gate passed the last chunk; None if neither the noise gate nor tone squelch is on"""
+        gate = self.gate
+        if not self.enable_processing or gate is None or (gate.threshold <= 0 and not gate.muted):
+            return None
+        return gate.open
+        
     def play(self, data):
         if not self.playing or not self.stream:
             return
@@ -325,58 +408,78 @@ class PoliceAudioPlayer:
         try:
             if not self.enable_processing:
                 # Just play raw audio if processing is disabled
-                self.stream.write(data)
+                write_audio(self.stream, data, self.underruns)
+                self.samples_played.inc(len(data) // 2)
                 return
-                
-            # Convert bytes to numpy array of 16-bit integers
-            samples = np.frombuffer(data, dtype=np.int16)
             
-            if len(samples) == 0:
-                return
-                
-            # Calculate threshold based on 16-bit range (-32768 to 32767)
-            threshold = int(self.noise_gate_level * 32767)
-            
-            # Apply noise gate with smoother transition
-            abs_samples = np.abs(samples)
-            mask = abs_samples > threshold
-            gated_samples = samples * mask
-            
-            # Optional: Add a small fade-in/out to avoid clicks
-            # This creates a 5ms fade (at 32k sample rate)
-            fade_samples = 160  # 5ms at 32k sample rate
-            if fade_samples < len(gated_samples):
-                # Fade in
-                gated_samples[:fade_samples] = gated_samples[:fade_samples] * np.linspace(0, 1, fade_samples)
-                # Fade out
-                gated_samples[-fade_samples:] = gated_samples[-fade_samples:] * np.linspace(1, 0, fade_samples)
-            
-            # Convert back to bytes
-            data = gated_samples.astype(np.int16).tobytes()
+            start = time.perf_counter()
+            
+            # Tone decoder, CTCSS high-pass, voice low-pass, noise reduction and the gate,
+            # continuing from the last chunk
+            data = self.processing_chain().process(data)
+            
+            self.process_time.observe(time.perf_counter() - start)
             
             # Play the processed audio
-            self.stream.write(data)
+            write_audio(self.stream, data, self.underruns)
+            self.samples_played.inc(len(data) // 2)
         except Exception as e:
             if "Stream closed" not in str(e):  # Ignore expected errors during shutdown
                 print(f"Police audio play error: {e}")
 
 class SDRApp:
-    def __init__(self, root):
+    def __init__(self, root, devices=None, scan_nodes=()):
         self.root = root
-        self.running = False
-        self.current_image = None
-        self.current_snr = 0
-        self.audio_player = AudioPlayer()
-        self.police_audio_player = PoliceAudioPlayer()  # Add police audio player
-        self.sdr_process = None
-        self.police_frequencies = {}  # Store police frequencies data
-        self.airport_frequencies = {}  # Store airport tower frequencies data
-        
-        self.load_police_frequencies()  # Load police frequencies from JSON
-        self.load_airport_frequencies()  # Load airport tower frequencies from JSON
+        self.running = False  # Satellite/FM reception
+        self.metrics = MetricsRegistry()
+        # Worker threads hand UI work to the Tk thread through here, coalesced by key
+        self.ui = UIDispatcher(root, self.metrics)
+        self.ui.rate_limit("airport_map", 0.25)
+        # Owns every rtl_* child: drains stderr, restarts crashed or stalled ones
+        self.supervisor = SDRSupervisor(self.metrics, on_event=self.on_sdr_event)
+        # Each pipeline leases its own dongle, so e.g. a scan and a NOAA pass can run at once
+        self.devices = devices or DeviceManager()
+        threading.Thread(target=self.devices.devices, daemon=True).start()
+        self.audio_player = AudioPlayer(self.metrics)
+        self.police_audio_player = PoliceAudioPlayer(self.metrics)  # Add police audio player
+        self.police_audio_player.on_tone = self.on_tone_detected
+        self.reception_process = None
+        # Police or airport audio, independent of reception
+        self.audio_running = False
+        self.audio_mode = None
+        self.audio_freq = None
+        self.audio_channels = []  # MHz of every channel being heard; the airport tab hears them all at once
+        self.audio_process = None
+        # Airport audio: one rtl_sdr and AM receiver per dongle, the first being audio_process
+        self.airband_processes = []
+        self.airband_receivers = []
+        self.airband_mixer = None
+        self.scan_process = None
+        # Voice-activated recording of the police/airport audio, one recorder per channel heard;
+        # the writer thread starts on first use
+        self.recording_writer = None
+        self.channel_recorders = {}
+        # rtl_tcp nodes ("host:port") that share a scan between them instead of a local dongle
+        self.scan_nodes = list(scan_nodes)
+        self.scan_stop_event = threading.Event()
+        self.scan_strength_format = "{:.1f}%"  # Sequential scans report 0-100 strength, node scans SNR
+        # Police and airport frequencies, compiled from the JSON files on first use
+        self.freq_db = FrequencyDB()
+        
         self.create_widgets()
-        self.setup_decoders()
+        # Satellite images are scaled incrementally into one canvas image, at most 10 redraws a second
+        self.image_view = ScaledImageView(self.canvas)
+        self.display_limiter = FrameLimiter()
+        self.pending_image = None
+        # Live spectrum of the raw IQ stream in the satellite modes, which also drives the SNR display
+        self.spectrum = SpectrumAnalyzer()
         self.setup_signal_monitor()
+        self.spectrum_view = SpectrumView(self.spectrum_canvas, self.spectrum,
+                                          frame_time=self.metrics.histogram("stage_seconds", stage="spectrum"),
+                                          on_frame=self.signal_monitor.update)
+        # Open (or rebuild) the frequency store and its search index off the main thread
+        threading.Thread(target=self.load_frequency_db, daemon=True).start()
+        self.setup_decoders()
         self.setup_satellite_tracker()
         
         self.update_controls()
@@ -392,48 +495,6 @@ class SDRApp:
         self.scan_signal_levels = {}
         self.map_thread_running = True
 
-    def load_police_frequencies(self):
-        """Load police frequencies from JSON file"""
-        try:
-            with open("police_frequencies.json", "r") as f:
-                self.police_frequencies = json.load(f)
-                print(f"Loaded police frequencies: {len(self.police_frequencies)} countries")
-        except Exception as e:
-            print(f"Error loading police frequencies: {e}")
-            # Create a minimal default structure with the correct hierarchy: Country > State > City > Service
-            self.police_frequencies = {
-                "United States": {
-                    "Example State": {
-                        "Example City": {
-                            "Police": [
-                                "460.500 MHz - Example Police Dispatch"
-                            ]
-                        }
-                    }
-                }
-            }
-            
-    def load_airport_frequencies(self):
-        """Load airport tower frequencies from JSON file"""
-        try:
-            with open("airport_towers.json", "r") as f:
-                self.airport_frequencies = json.load(f)
-                print(f"Loaded airport tower frequencies: {len(self.airport_frequencies)} countries")
-        except Exception as e:
-            print(f"Error loading airport tower frequencies: {e}")
-            # Create a minimal default structure
-            self.airport_frequencies = {
-                "United States": {
-                    "Example State": {
-                        "Example Airport (XXX)": {
-                            "Tower": [
-                                "118.000 MHz - Example Tower"
-                            ]
-                        }
-                    }
-                }
-            }
-
     def create_widgets(self):
         self.root.title("SDR Tools")
         self.root.geometry("1200x800")
@@ -504,6 +565,10 @@ class SDRApp:
         self.start_audio_btn.pack(side=tk.LEFT, padx=5)
         self.stop_audio_btn = ttk.Button(self.audio_btn_frame, text="Stop Audio", command=self.stop_audio)
         self.stop_audio_btn.pack(side=tk.LEFT, padx=5)
+        # Keep transmissions (squelch-open audio only) in per-channel, per-day files
+        self.record_audio_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.audio_btn_frame, text="Record", variable=self.record_audio_var,
+                        command=self.update_audio_recording).pack(side=tk.LEFT, padx=5)
 
     def create_mode_controls(self):
         self.mode_var = tk.StringVar(value="noaa")
@@ -559,7 +624,7 @@ class SDRApp:
         signal_frame.pack(fill=tk.X, pady=10)
         
         ttk.Label(signal_frame, text="Signal Quality:").pack(anchor="w")
-        self.snr_label = ttk.Label(signal_frame, text="SNR: 0.0 dB")
+        self.snr_label = ttk.Label(signal_frame, text="SNR: -- dB")
         self.snr_label.pack(anchor="w")
         
         ttk.Label(signal_frame, text="Reception Progress:").pack(anchor="w")
@@ -591,6 +656,15 @@ class SDRApp:
         self.canvas = tk.Canvas(self.sat_img_frame, bg="black", height=400)
         self.canvas.pack(fill=tk.BOTH, expand=True)
         self.canvas.create_text(300, 150, text="Image will appear here", fill="white", font=('Helvetica', 16))
+        
+        # Spectrum and waterfall of the IQ stream
+        self.spectrum_frame = ttk.LabelFrame(self.noaa_frame, text="Spectrum")
+        self.spectrum_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.spectrum_canvas = tk.Canvas(self.spectrum_frame, bg="black", height=200)
+        self.spectrum_canvas.pack(fill=tk.X, expand=True)
+        self.spectrum_span_label = ttk.Label(self.spectrum_frame, text="")
+        self.spectrum_span_label.pack(anchor="w", padx=5)
 
     def create_fm_content(self):
         # FM Stations Table
@@ -641,6 +715,10 @@ class SDRApp:
         """Start scanning police frequencies"""
         if self.scanning:
             return
+        nodes = [n.strip() for n in self.scan_nodes_entry.get().replace(",", " ").split() if n.strip()]
+        if self.audio_running and not nodes:
+            messagebox.showerror("Scan Error", "Stop the audio first; the scan plays through the same output")
+            return
         
         try:
             # Get scan parameters
@@ -660,11 +738,31 @@ class SDRApp:
             step_mhz = step_khz / 1000.0
             
             # Initialize scan parameters
-            self.scan_frequencies = []
-            current_freq = start_freq
-            while current_freq <= end_freq:
-                self.scan_frequencies.append(current_freq)
-                current_freq += step_mhz
+            if self.scan_listed_var.get():
+                # The channels of the selected service in the frequency table
+                self.scan_frequencies = sorted(float(self.frequency_tree.item(item)['values'][0])
+                                               for item in self.frequency_tree.get_children())
+                if not self.scan_frequencies:
+                    raise ValueError("No channels listed; pick a service or untick Listed channels only")
+            else:
+                self.scan_frequencies = []
+                current_freq = start_freq
+                while current_freq <= end_freq:
+                    self.scan_frequencies.append(current_freq)
+                    current_freq += step_mhz
+            
+            if nodes:
+                # rtl_tcp nodes measure whole tuning windows, so no local dongle or audio is involved
+                distscan = lazy_import("sdr_distscan")
+                coordinator = distscan.ScanCoordinator(
+                    nodes, [f * 1e6 for f in self.scan_frequencies], self.metrics,
+                    dwell_s=dwell_ms / 1000.0, channel_bw_hz=step_khz * 1e3,
+                    on_window=self.on_scan_window)
+                self.scan_strength_format = "{:.1f} dB"
+            else:
+                # Hold one dongle for the whole scan
+                self.devices.acquire("scan")
+                self.scan_strength_format = "{:.1f}%"
             
             self.current_scan_index = 0
             self.scan_active_channels = []
@@ -682,9 +780,13 @@ class SDRApp:
             self.scan_status.config(text="Scanning...")
             
             # Start scan thread
-            threading.Thread(target=self.run_scan, daemon=True).start()
+            self.scan_stop_event = threading.Event()
+            if nodes:
+                threading.Thread(target=self.run_distributed_scan, args=(coordinator,), daemon=True).start()
+            else:
+                threading.Thread(target=self.run_scan, daemon=True).start()
             
-        except ValueError as e:
+        except (ValueError, DeviceBusy) as e:
             self.scan_status.config(text=f"Error: {str(e)}")
             messagebox.showerror("Scan Error", str(e))
 
@@ -692,21 +794,14 @@ class SDRApp:
         """Stop the current scan"""
         self.scan_thread_running = False
         self.scanning = False
+        self.scan_stop_event.set()
         self.scan_status.config(text="Scan stopped")
         self.scan_btn.config(state=tk.NORMAL)
         self.stop_scan_btn.config(state=tk.DISABLED)
         
         # Stop any active reception
-        if hasattr(self, 'sdr_process') and self.sdr_process:
-            try:
-                os.killpg(os.getpgid(self.sdr_process.pid), signal.SIGTERM)
-                self.sdr_process.wait(timeout=1)
-            except (ProcessLookupError, subprocess.TimeoutExpired):
-                try:
-                    os.killpg(os.getpgid(self.sdr_process.pid), signal.SIGKILL)
-                except ProcessLookupError:
-                    pass
-            self.sdr_process = None
+        self.supervisor.stop(self.scan_process)
+        self.scan_process = None
 
     def run_scan(self):
         """Thread that performs the frequency scan"""
@@ -716,9 +811,8 @@ class SDRApp:
             
             while self.scan_thread_running and self.current_scan_index < len(self.scan_frequencies):
                 freq = self.scan_frequencies[self.current_scan_index]
-                self.root.after(0, lambda: self.scan_status.config(
-                    text=f"Scanning {freq:.3f} MHz ({self.current_scan_index+1}/{len(self.scan_frequencies)})"
-                ))
+                self.ui.post("scan_status", self.scan_status.config,
+                             text=f"Scanning {freq:.3f} MHz ({self.current_scan_index+1}/{len(self.scan_frequencies)})")
                 
                 # Set up RTL_FM to check this frequency
                 cmd = [
@@ -732,52 +826,44 @@ class SDRApp:
                 ]
                 
                 try:
-                    self.sdr_process = subprocess.Popen(
-                        cmd,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        preexec_fn=os.setsid,
-                        bufsize=1024*1024
-                    )
+                    # One short-lived process per channel; a failed one is simply skipped
+                    process = self.scan_process = self.launch_on_device("scan", cmd, expected_rate=170e3 * 2,
+                                                                        restart=False)
                     
                     # Start audio player for this frequency
                     self.police_audio_player.start(freq)
                     
                     # Sample the signal for the dwell time
                     start_time = time.time()
-                    signal_samples = []
+                    raw_chunks = []
                     
                     while (time.time() - start_time) < (dwell_ms / 1000.0) and self.scan_thread_running:
-                        raw_samples = self.sdr_process.stdout.read(1024)
+                        raw_samples = process.read(1024)
                         if not raw_samples:
                             break
+                        raw_chunks.append(raw_samples)
                         
-                        samples = np.frombuffer(raw_samples, dtype=np.uint8).astype(np.float32) / 255.0 - 0.5
-                        signal_samples.extend(samples)
-                        
-                    if signal_samples:
-                        # Calculate signal strength (RMS)
-                        rms = np.sqrt(np.mean(np.array(signal_samples)**2))
-                        signal_strength = min(100, max(0, (rms / 0.3) * 100))  # Scale to 0-100
+                    # Calculate signal strength (RMS)
+                    signal_strength = estimate_scan_power(raw_chunks)
+                    if signal_strength is not None:
                         self.scan_signal_levels[freq] = signal_strength
                         
                         # If signal is strong enough, log it as active
                         if signal_strength >= min_signal_strength:
                             timestamp = datetime.now().strftime('%H:%M:%S')
                             if freq not in [ch[0] for ch in self.scan_active_channels]:
-                                self.scan_active_channels.append((freq, signal_strength, timestamp))
+                                # The dwell's demodulated audio also tells whose squelch tone is on the channel
+                                dwell = b"".join(raw_chunks)
+                                audio = np.frombuffer(dwell, dtype=np.int16, count=len(dwell) // 2) / np.float32(32768.0)
+                                tone = lazy_import("sdr_tones").identify(audio, 170e3) or ""
+                                self.scan_active_channels.append((freq, signal_strength, timestamp, tone))
                                 # Update the active channels list in the UI
-                                self.root.after(0, self.update_active_channels_list)
+                                self.ui.post("active_channels", self.update_active_channels_list)
                     
                 finally:
                     # Clean up the SDR process
-                    if hasattr(self, 'sdr_process') and self.sdr_process:
-                        try:
-                            os.killpg(os.getpgid(self.sdr_process.pid), signal.SIGTERM)
-                            self.sdr_process.wait(timeout=0.1)
-                        except (ProcessLookupError, subprocess.TimeoutExpired):
-                            pass
-                        self.sdr_process = None
+                    self.supervisor.stop(self.scan_process, timeout=0.1)
+                    self.scan_process = None
                     
                     # Stop audio
                     self.police_audio_player.stop()
@@ -790,29 +876,99 @@ class SDRApp:
                             self.current_scan_index = 0
                             # Sort active channels by signal strength
                             self.scan_active_channels.sort(key=lambda x: x[1], reverse=True)
-                            self.root.after(0, self.update_active_channels_list)
+                            self.ui.post("active_channels", self.update_active_channels_list)
                             # Sleep a bit before starting over
                             time.sleep(1)
         
         except Exception as e:
-            self.root.after(0, lambda: self.scan_status.config(text=f"Scan error: {str(e)}"))
+            self.ui.post("scan_status", self.scan_status.config, text=f"Scan error: {e}")
+        else:
+            self.ui.post("scan_status", self.scan_status.config, text="Scan stopped")
         finally:
             self.scan_thread_running = False
             self.scanning = False
-            self.root.after(0, lambda: self.scan_status.config(text="Scan stopped"))
-            self.root.after(0, lambda: self.scan_btn.config(state=tk.NORMAL))
-            self.root.after(0, lambda: self.stop_scan_btn.config(state=tk.DISABLED))
+            self.devices.release("scan")
+            self.ui.call(self.scan_btn.config, state=tk.NORMAL)
+            self.ui.call(self.stop_scan_btn.config, state=tk.DISABLED)
+
+    def run_distributed_scan(self, coordinator):
+        """Thread that sweeps the scan plan across rtl_tcp nodes until stopped"""
+        def on_sweep(report):
+            # The merged table holds every channel any node has heard, strongest first
+            active = coordinator.table.active()
+            self.scan_active_channels = [
+                (c.freq_hz / 1e6, c.snr_db, datetime.fromtimestamp(c.last_active).strftime('%H:%M:%S'), "")
+                for c in active]  # Nodes send power spectra, not audio, so there is no tone to tag
+            self.scan_signal_levels = {c.freq_hz / 1e6: c.snr_db for c in active}
+            self.ui.post("active_channels", self.update_active_channels_list)
+            down = [node.address for node in coordinator.nodes if not node.connected]
+            text = (f"Sweep {coordinator.sweeps}: {report.measured}/{report.windows} windows on "
+                    f"{report.nodes} node(s) in {report.duration_s:.1f} s")
+            if down:
+                text += f"; down: {', '.join(down)}"
+            self.ui.post("scan_status", self.scan_status.config, text=text)
+        
+        try:
+            coordinator.run(self.scan_stop_event, on_sweep)
+        except Exception as e:
+            self.ui.post("scan_status", self.scan_status.config, text=f"Scan error: {e}")
+        else:
+            self.ui.post("scan_status", self.scan_status.config, text="Scan stopped")
+        finally:
+            coordinator.close()
+            self.scan_thread_running = False
+            self.scanning = False
+            self.ui.call(self.scan_btn.config, state=tk.NORMAL)
+            self.ui.call(self.stop_scan_btn.config, state=tk.DISABLED)
+
+    def on_scan_window(self, node, window, active):
+        """Progress of a distributed scan, from a node's worker thread"""
+        self.ui.post("scan_status", self.scan_status.config,
+                     text=f"Scanning {window.center_hz / 1e6:.3f} MHz on {node.address}")
+
+    def launch_on_device(self, pipeline, cmd, **kwargs):
+        """Start an rtl_* command under the supervisor on the dongle leased to ``pipeline``
+
+        Leases one first if the pipeline has none; raises DeviceBusy if every dongle is taken.
+        """
+        lease = self.devices.acquire(pipeline)
+        try:
+            return self.supervisor.launch(pipeline, lease.command(cmd), device=lease.device, **kwargs)
+        except Exception:
+            lease.release()
+            raise
+
+    def stop_on_device(self, process):
+        """Stop a process started by launch_on_device and give its pipeline's dongle back"""
+        if process is None:
+            return
+        try:
+            self.supervisor.stop(process)
+        finally:
+            self.devices.release(process.pipeline)
+
+    def on_sdr_event(self, process, kind, message):
+        """Device errors from the supervisor's threads; shown in the status line"""
+        self.ui.post("status", self.show_status, f"{process.pipeline}: {message}", 5000)
 
     def update_active_channels_list(self):
         """Update the active channels treeview with current scan results"""
         for item in self.active_channels_tree.get_children():
             self.active_channels_tree.delete(item)
         
-        for freq, strength, timestamp in self.scan_active_channels:
+        # Assignments are filled in by a second pass if the index is still being built
+        index = self.freq_db.index_or_notify(
+            lambda: self.ui.post("active_channels", self.update_active_channels_list))
+        tones = lazy_import("sdr_tones")
+        for freq, strength, timestamp, tone in self.scan_active_channels:
+            # Of the agencies sharing the frequency, name the one whose listed tone was heard
+            prefer = (lambda e, tone=tone: tones.same_code(tones.parse_code(e.description), tone)) if tone else None
             self.active_channels_tree.insert('', 'end', values=(
                 f"{freq:.3f}",
-                f"{strength:.1f}%",
-                timestamp
+                self.scan_strength_format.format(strength),
+                timestamp,
+                tone,
+                index.describe(int(round(freq * 1e6)), prefer=prefer) if index is not None else ""
             ))
 
     def select_active_channel(self, event):
@@ -846,7 +1002,6 @@ class SDRApp:
         ttk.Label(country_frame, text="Country:").pack(side=tk.LEFT, padx=5)
         self.country_var = tk.StringVar(value="United States")
         self.country_combo = ttk.Combobox(country_frame, textvariable=self.country_var, state="readonly")
-        self.country_combo['values'] = list(self.police_frequencies.keys())
         self.country_combo.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
         self.country_combo.bind("<<ComboboxSelected>>", self.update_states)
         
@@ -892,11 +1047,26 @@ class SDRApp:
         self.noise_gate.set(20)  # Start with 20% threshold instead of 50% # Default value
         self.noise_gate.bind("<ButtonRelease-1>", self.update_noise_gate)
         
+        tone_frame = ttk.Frame(audio_frame)
+        tone_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(tone_frame, text="Tone Squelch:").pack(side=tk.LEFT, padx=5)
+        self.tone_squelch_var = tk.StringVar(value="Off")
+        # CTCSS tones and DCS codes; filled on first open so sdr_tones loads with the audio
+        self.tone_squelch_combo = ttk.Combobox(tone_frame, textvariable=self.tone_squelch_var, width=12,
+                                               state="readonly", postcommand=self.fill_tone_squelch_choices)
+        self.tone_squelch_combo.pack(side=tk.LEFT, padx=5)
+        self.tone_squelch_combo.bind("<<ComboboxSelected>>", self.update_tone_squelch)
+        self.tone_status = ttk.Label(tone_frame, text="Heard: -")
+        self.tone_status.pack(side=tk.LEFT, padx=5)
+        
         self.enable_audio_var = tk.BooleanVar(value=True)
         enable_audio_check = ttk.Checkbutton(audio_frame, text="Enable Audio Processing", 
                                           variable=self.enable_audio_var,
                                           command=self.update_audio_processing)
         enable_audio_check.pack(anchor="w", padx=5, pady=5)
+        self.denoise_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(audio_frame, text="Noise Reduction (spectral, +16 ms)", variable=self.denoise_var,
+                        command=self.update_denoise).pack(anchor="w", padx=5, pady=5)
 
             # Add scan controls after the frequency table
         scan_frame = ttk.LabelFrame(self.police_frame, text="Scan Controls")
@@ -916,6 +1086,11 @@ class SDRApp:
         self.scan_dwell.pack(side=tk.LEFT, padx=5)
         self.scan_dwell.insert(0, "500")  # Default dwell time
         
+        ttk.Label(settings_frame, text="Nodes:").pack(side=tk.LEFT)
+        self.scan_nodes_entry = ttk.Entry(settings_frame, width=28)
+        self.scan_nodes_entry.pack(side=tk.LEFT, padx=5)
+        self.scan_nodes_entry.insert(0, ", ".join(self.scan_nodes))  # rtl_tcp host:port list; empty scans locally
+        
         # Scan range
         range_frame = ttk.Frame(scan_frame)
         range_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -930,6 +1105,10 @@ class SDRApp:
         self.scan_end.pack(side=tk.LEFT, padx=5)
         self.scan_end.insert(0, "470.000")
         
+        self.scan_listed_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(range_frame, text="Listed channels only",
+                        variable=self.scan_listed_var).pack(side=tk.LEFT, padx=5)
+        
         # Scan buttons
         btn_frame = ttk.Frame(scan_frame)
         btn_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -949,7 +1128,7 @@ class SDRApp:
         self.active_channels_frame = ttk.LabelFrame(self.police_frame, text="Active Channels")
         self.active_channels_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        columns = ('Frequency (MHz)', 'Signal Strength', 'Timestamp')
+        columns = ('Frequency (MHz)', 'Signal Strength', 'Timestamp', 'Tone', 'Assignment')
         self.active_channels_tree = ttk.Treeview(
             self.active_channels_frame, 
             columns=columns, 
@@ -960,6 +1139,10 @@ class SDRApp:
         self.active_channels_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         self.active_channels_tree.bind("<Double-1>", self.select_active_channel)
         
+        # Search across all police channels
+        self.police_search_var = tk.StringVar()
+        self.create_search_box(self.police_frame, self.police_search_var, self.search_police_frequencies)
+        
         # Frequency table
         self.frequency_table_frame = ttk.Frame(self.police_frame)
         self.frequency_table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -981,11 +1164,9 @@ class SDRApp:
         self.freq_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         self.freq_listbox.bind("<Double-1>", self.select_frequency_from_list)
         
-        self.status_label = ttk.Label(self.avail_freq_frame, text="")
+        # The dropdowns are filled by load_frequency_db once the store is open
+        self.status_label = ttk.Label(self.avail_freq_frame, text="Loading frequencies...")
         self.status_label.pack(anchor="w", padx=5, pady=5)
-        
-        # Initial population of states
-        self.update_states()
 
     def create_airport_content(self):
         """Create the airport tower mode interface with real-time radar map"""
@@ -1007,7 +1188,6 @@ class SDRApp:
             textvariable=self.airport_country_var, 
             state="readonly"
         )
-        self.airport_country_combo['values'] = list(self.airport_frequencies.keys())
         self.airport_country_combo.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
         self.airport_country_combo.bind("<<ComboboxSelected>>", self.update_airport_states)
         
@@ -1037,6 +1217,32 @@ class SDRApp:
         self.airport_combo.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
         self.airport_combo.bind("<<ComboboxSelected>>", self.update_airport_services)
         
+        # Nearest towers to the observer location
+        nearest_frame = ttk.LabelFrame(self.airport_location_frame, text="Nearest Towers")
+        nearest_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        nearest_controls = ttk.Frame(nearest_frame)
+        nearest_controls.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(nearest_controls, text="Within (km):").pack(side=tk.LEFT, padx=5)
+        self.nearest_radius_var = tk.StringVar(value="100")
+        ttk.Entry(nearest_controls, textvariable=self.nearest_radius_var, width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Button(
+            nearest_controls, 
+            text="Find Nearest", 
+            command=self.find_nearest_towers
+        ).pack(side=tk.LEFT, padx=5)
+        
+        columns = ('Distance (km)', 'Airport', 'Frequencies')
+        self.nearest_tree = ttk.Treeview(nearest_frame, columns=columns, show='headings', height=5)
+        for col in columns:
+            self.nearest_tree.heading(col, text=col)
+        self.nearest_tree.column('Distance (km)', width=90)
+        self.nearest_tree.column('Airport', width=200)
+        self.nearest_tree.column('Frequencies', width=300)
+        self.nearest_tree.pack(fill=tk.X, padx=5, pady=5)
+        self.nearest_tree.bind("<Double-1>", self.select_nearest_tower)
+        self.nearest_places = {}
+        
         # Service selection
         service_frame = ttk.LabelFrame(self.airport_frame, text="Service")
         service_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -1077,6 +1283,27 @@ class SDRApp:
             variable=self.enable_airport_audio_var,
             command=self.update_airport_audio_processing
         ).pack(anchor=tk.W, padx=5, pady=5)
+        self.airport_denoise_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            audio_frame, 
+            text="Noise Reduction (spectral, +16 ms)", 
+            variable=self.airport_denoise_var,
+            command=self.update_airport_denoise
+        ).pack(anchor=tk.W, padx=5, pady=5)
+        # Every airband channel of the airport is received; play them all or only the selected one
+        self.airport_mix_all_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            audio_frame, 
+            text="Mix all channels", 
+            variable=self.airport_mix_all_var,
+            command=self.update_airband_solo
+        ).pack(anchor=tk.W, padx=5, pady=5)
+        self.airband_status = ttk.Label(audio_frame, text="")
+        self.airband_status.pack(anchor=tk.W, padx=5, pady=5)
+        
+        # Search across all airport channels
+        self.airport_search_var = tk.StringVar()
+        self.create_search_box(self.airport_frame, self.airport_search_var, self.search_airport_frequencies)
         
         # Frequency table
         self.airport_frequency_table_frame = ttk.Frame(self.airport_frame)
@@ -1129,6 +1356,67 @@ class SDRApp:
             variable=self.auto_update_var
         ).pack(side=tk.LEFT, padx=5)
         
+        self.show_paths_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            map_controls, 
+            text="Show Paths", 
+            variable=self.show_paths_var
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # Aircraft positions come from a second dongle tuned to 1090 MHz ADS-B
+        self.start_adsb_btn = ttk.Button(
+            map_controls, 
+            text="Start ADS-B", 
+            command=self.start_adsb
+        )
+        self.start_adsb_btn.pack(side=tk.LEFT, padx=5)
+        self.stop_adsb_btn = ttk.Button(
+            map_controls, 
+            text="Stop ADS-B", 
+            command=self.stop_adsb,
+            state=tk.DISABLED
+        )
+        self.stop_adsb_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Session recording and faster-than-real-time replay
+        session_controls = ttk.Frame(self.airport_map_frame)
+        session_controls.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.record_btn = ttk.Button(
+            session_controls, 
+            text="Record Session", 
+            command=self.toggle_recording
+        )
+        self.record_btn.pack(side=tk.LEFT, padx=5)
+        self.record_iq_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            session_controls, 
+            text="Include IQ", 
+            variable=self.record_iq_var
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self.replay_btn = ttk.Button(
+            session_controls, 
+            text="Replay...", 
+            command=self.start_replay
+        )
+        self.replay_btn.pack(side=tk.LEFT, padx=5)
+        self.replay_speed_var = tk.StringVar(value="1x")
+        ttk.Combobox(
+            session_controls, 
+            textvariable=self.replay_speed_var, 
+            values=("1x", "10x", "Max"), 
+            width=5, 
+            state="readonly"
+        ).pack(side=tk.LEFT, padx=5)
+        self.stop_replay_btn = ttk.Button(
+            session_controls, 
+            text="Stop Replay", 
+            command=self.stop_replay,
+            state=tk.DISABLED
+        )
+        self.stop_replay_btn.pack(side=tk.LEFT, padx=5)
+        
         # Radar settings
         settings_frame = ttk.LabelFrame(self.airport_frame, text="Radar Settings")
         settings_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -1151,31 +1439,90 @@ class SDRApp:
         
         # Initialize map and tracking
         self.airport_tower = None
-        self.aircraft = {}
-        self.map_image = None
-        self.map_photo = None
-        self.create_initial_airport_map()
+        self.aircraft = AircraftTable()
+        self.map_version = 0  # AircraftTable version the map last drew
+        self.map_layers = None
+        self.map_view = None
+        self.adsb_process = None
+        self.adsb_running = False
+        self.adsb_tracker = None
+        self.session_recorder = None
+        self.replay_driver = None
+        self.clock = time.time  # Replays swap in the session clock so aircraft age in replayed time
         
         # Start map update thread
         self.map_thread_running = True
         Thread(target=self.map_update_thread, daemon=True).start()
 
+    def create_search_box(self, parent, variable, callback):
+        """Add a search-as-you-type entry that calls ``callback`` on every keystroke"""
+        search_frame = ttk.Frame(parent)
+        search_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
+        entry = ttk.Entry(search_frame, textvariable=variable)
+        entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
+        entry.bind("<KeyRelease>", callback)
+
+    def show_search_results(self, query, kind, tree, listbox, status_label):
+        """Fill a frequency table and listbox with index matches for ``query``"""
+        for item in tree.get_children():
+            tree.delete(item)
+        listbox.delete(0, tk.END)
+        if not query.strip():
+            return
+        
+        index = self.freq_db.index_or_notify(
+            lambda: self.ui.post(f"search_{kind}", self.show_search_results, query, kind, tree, listbox, status_label))
+        if index is None:
+            status_label.config(text="Loading the frequency index...")
+            return
+        results = index.search(query, kind=kind)
+        for entry in results:
+            freq_value = format_mhz(entry.hz)
+            tree.insert('', 'end', values=(
+                freq_value,
+                f"{entry.description} - {entry.place}, {entry.state} ({entry.service})"
+            ))
+            listbox.insert(tk.END, freq_value)
+        status_label.config(text=f"{len(results)} matches for '{query}'")
+
+    def search_police_frequencies(self, event=None):
+        """Search every police channel by name, description or frequency"""
+        self.show_search_results(self.police_search_var.get(), POLICE,
+                                 self.frequency_tree, self.freq_listbox, self.status_label)
+
+    def search_airport_frequencies(self, event=None):
+        """Search every airport channel by name, description or frequency"""
+        self.show_search_results(self.airport_search_var.get(), AIRPORT,
+                                 self.airport_frequency_tree, self.airport_freq_listbox,
+                                 self.airport_status_label)
+
+    def load_frequency_db(self):
+        """Open the frequency store, fill the country dropdowns, then build the search index"""
+        try:
+            police, airport = self.freq_db.countries(POLICE), self.freq_db.countries(AIRPORT)
+        except Exception as e:
+            self.ui.post("status", self.show_status, f"Frequency database error: {e}", 5000)
+            return
+        self.ui.call(self.fill_countries, police, airport)
+        self.freq_db.index()
+
+    def fill_countries(self, police, airport):
+        self.country_combo['values'] = police
+        self.airport_country_combo['values'] = airport
+        self.update_states()
+
     def update_states(self, event=None):
         """Update states/regions based on selected country"""
         country = self.country_var.get()
         
-        if country in self.police_frequencies:
-            # Get states/regions for the selected country
-            states = list(self.police_frequencies[country].keys())
+        # Get states/regions for the selected country
+        states = self.freq_db.states(POLICE, country)
+        if states:
             self.state_combo['values'] = states
-            
-            if states:
-                self.state_combo.current(0)
-                self.update_cities()
-                self.status_label.config(text="")
-            else:
-                self.state_combo.set('')
-                self.status_label.config(text=f"No states found for {country}")
+            self.state_combo.current(0)
+            self.update_cities()
+            self.status_label.config(text="")
         else:
             self.state_combo['values'] = []
             self.state_combo.set('')
@@ -1193,18 +1540,13 @@ class SDRApp:
         country = self.country_var.get()
         state = self.state_var.get()
         
-        if country in self.police_frequencies and state in self.police_frequencies[country]:
-            # Get cities for the selected state
-            cities = list(self.police_frequencies[country][state].keys())
+        # Get cities for the selected state
+        cities = self.freq_db.places(POLICE, country, state)
+        if cities:
             self.city_combo['values'] = cities
-            
-            if cities:
-                self.city_combo.current(0)
-                self.update_services()
-                self.status_label.config(text="")
-            else:
-                self.city_combo.set('')
-                self.status_label.config(text=f"No cities found for {state}")
+            self.city_combo.current(0)
+            self.update_services()
+            self.status_label.config(text="")
         else:
             self.city_combo['values'] = []
             self.city_combo.set('')
@@ -1221,27 +1563,18 @@ class SDRApp:
         state = self.state_var.get()
         city = self.city_var.get()
         
-        if (country in self.police_frequencies and 
-            state in self.police_frequencies[country] and 
-            city in self.police_frequencies[country][state]):
-            
-            # Get services for the selected city
-            services = list(self.police_frequencies[country][state][city].keys())
+        # Get services for the selected city
+        services = self.freq_db.services(POLICE, country, state, city)
+        if services:
             self.service_combo['values'] = services
-            
-            if services:
-                self.service_combo.current(0)
-                self.update_police_frequencies()
-                self.status_label.config(text="")
-            else:
-                self.service_combo.set('')
-                self.status_label.config(text=f"No services found for {city}")
+            self.service_combo.current(0)
+            self.update_police_frequencies()
+            self.status_label.config(text="")
         else:
             self.service_combo['values'] = []
             self.service_combo.set('')
             self.status_label.config(text=f"No services found for {city}")
-        
-        self.clear_frequency_display()
+            self.clear_frequency_display()
 
     def update_police_frequencies(self, event=None):
         """Update police frequencies based on selected service"""
@@ -1257,20 +1590,11 @@ class SDRApp:
             return
             
         try:
-            # Access the frequencies list for this service
-            frequencies_list = self.police_frequencies[country][state][city][service]
-            
-            # Process frequencies
-            for freq_entry in frequencies_list:
-                parts = freq_entry.split(' - ', 1)
-                freq_str = parts[0].strip()
-                desc = parts[1] if len(parts) > 1 else service
-                
-                # Remove MHz at the end if present for the frequency tree
-                if freq_str.endswith(" MHz"):
-                    freq_value = freq_str[:-4]
-                else:
-                    freq_value = freq_str
+            # Pre-parsed (Hz, description) pairs for this service
+            frequencies_list = self.freq_db.frequencies(POLICE, country, state, city, service)
+            
+            for hz, desc in frequencies_list:
+                freq_value = format_mhz(hz)
                 
                 # Add to treeview
                 self.frequency_tree.insert('', 'end', values=(freq_value, desc))
@@ -1294,6 +1618,8 @@ class SDRApp:
                 float(freq)  # This will raise ValueError if not convertible to float
                 self.freq_entry.delete(0, tk.END)
                 self.freq_entry.insert(0, freq)
+                # Squelch on the tone the listing gives ("PL 100.0", "DPL 023"), so a shared frequency plays one agency
+                self.set_tone_squelch(lazy_import("sdr_tones").parse_code(str(item['values'][1])))
             except (IndexError, ValueError) as e:
                 self.status_label.config(text=f"Invalid frequency format: {e}")
 
@@ -1315,6 +1641,55 @@ class SDRApp:
         level = self.noise_gate.get()
         self.police_audio_player.set_noise_gate(level)
 
+    def fill_tone_squelch_choices(self):
+        if not self.tone_squelch_combo['values']:
+            tones = lazy_import("sdr_tones")
+            self.tone_squelch_combo['values'] = (
+                ["Off"] + [tones.tone_label(hz) for hz in tones.CTCSS_TONES]
+                + [f"D{code}{suffix}" for suffix in "NI" for code in tones.DCS_CODES])
+
+    def set_tone_squelch(self, code):
+        """Select ``code`` (or None for off) in the tone squelch box and apply it"""
+        self.tone_squelch_var.set(code or "Off")
+        self.police_audio_player.set_tone_squelch(code)
+
+    def update_tone_squelch(self, event=None):
+        code = self.tone_squelch_var.get()
+        self.police_audio_player.set_tone_squelch(None if code == "Off" else code)
+
+    def on_tone_detected(self, code):
+        """Tone decoder results, from the audio thread"""
+        self.ui.post("tone", self.tone_status.config, text=f"Heard: {code or '-'}")
+
+    def update_denoise(self):
+        """Enable/disable spectral noise reduction for police audio"""
+        self.police_audio_player.set_denoise_enabled(self.denoise_var.get())
+
+    def update_audio_recording(self):
+        """Start or stop recording the playing channel to follow the Record checkbox"""
+        if not (self.audio_running and self.record_audio_var.get()):
+            self.stop_audio_recording()
+            return
+        if self.channel_recorders:
+            return
+        try:
+            recorder = lazy_import("sdr_recorder")
+            if self.recording_writer is None:
+                self.recording_writer = recorder.RecordingWriter(metrics=self.metrics)
+            self.channel_recorders = {freq: self.recording_writer.channel(self.audio_mode, freq)
+                                      for freq in self.audio_channels}
+            channels = (f"{self.audio_freq} MHz" if len(self.audio_channels) == 1
+                        else f"{len(self.audio_channels)} channels")
+            self.show_status(f"Recording transmissions on {channels} to {self.recording_writer.directory}")
+        except Exception as e:
+            self.record_audio_var.set(False)
+            messagebox.showerror("Error", f"Failed to start recording: {str(e)}")
+
+    def stop_audio_recording(self):
+        recorders, self.channel_recorders = self.channel_recorders, {}
+        for recorder in recorders.values():
+            recorder.close()
+
     def update_audio_processing(self):
         """Enable/disable audio processing for police audio"""
         enabled = self.enable_audio_var.get()
@@ -1372,6 +1747,8 @@ class SDRApp:
             self.stop_btn.config(text="■ Stop Reception")
             
         elif mode == "airport":
+            if self.map_layers is None:
+                self.create_initial_airport_map()  # Loads the map subsystem on first visit
             self.airport_frame.pack(fill=tk.BOTH, expand=True)
             self.audio_btn_frame.pack(fill=tk.X, pady=5)
             self.airport_avail_freq_frame.pack(fill=tk.X, pady=5)
@@ -1382,7 +1759,13 @@ class SDRApp:
 
     def start_audio(self):
         """Start audio for police/services mode"""
-        if self.running:
+        if self.audio_running:
+            return
+        if self.scanning:
+            messagebox.showerror("Error", "Stop the scan first; it plays through the same output")
+            return
+        if self.mode_var.get() == "airport":
+            self.start_airport_audio()
             return
             
         try:
@@ -1404,18 +1787,16 @@ class SDRApp:
                 "-s", "170k",  # Sample rate
                 "-r", "32k",   # Output rate
                 "-l", "0",     # Disable squelch
-                "-E", "deemp"  # Enable de-emphasis (improves FM voice quality)
+                "-E", "deemp",  # Enable de-emphasis (improves FM voice quality)
                 "-"
                 ]
-            self.sdr_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                preexec_fn=os.setsid,
-                bufsize=1024*1024
-            )
+            self.audio_process = self.launch_on_device("police", cmd, expected_rate=32e3 * 2)
             self.police_audio_player.start(freq)  # Use police audio player
-            self.running = True
+            self.audio_mode = "police"
+            self.audio_freq = freq
+            self.audio_channels = [freq]
+            self.audio_running = True
+            self.update_audio_recording()
             
             # Start processing thread for police audio
             threading.Thread(target=self.read_police_audio, daemon=True).start()
@@ -1424,15 +1805,20 @@ class SDRApp:
             self.start_audio_btn.config(state=tk.DISABLED)
             self.stop_audio_btn.config(state=tk.NORMAL)
             
-            self.show_status(f"Audio started on {freq}MHz")
+            self.show_status(f"Audio started on {freq}MHz ({self.audio_process.device.label})")
             
         except Exception as e:
+            self.stop_on_device(self.audio_process)
+            self.audio_process = None
             self.show_status(f"Error: {str(e)}", 5000)
             messagebox.showerror("Error", f"Failed to start audio: {str(e)}")
 
     def stop_audio(self):
         """Stop audio for police/services mode"""
-        if not self.running:
+        if not self.audio_running:
+            return
+        if self.audio_mode == "airport":
+            self.stop_airport_audio()
             return
         
         self.show_status("Stopping audio...")
@@ -1440,24 +1826,17 @@ class SDRApp:
         try:
             # Stop audio first
             self.police_audio_player.stop()
+            self.stop_audio_recording()
             
             # Terminate SDR process
-            if self.sdr_process:
-                try:
-                    os.killpg(os.getpgid(self.sdr_process.pid), signal.SIGTERM)
-                    self.sdr_process.wait(timeout=1)
-                except (ProcessLookupError, subprocess.TimeoutExpired):
-                    try:
-                        os.killpg(os.getpgid(self.sdr_process.pid), signal.SIGKILL)
-                    except ProcessLookupError:
-                        pass
-                self.sdr_process = None
+            self.stop_on_device(self.audio_process)
+            self.audio_process = None
                 
         except Exception as e:
             self.show_status(f"Error stopping: {str(e)}", 5000)
             return
         
-        self.running = False
+        self.audio_running = False
         
         # Update button states
         self.start_audio_btn.config(state=tk.NORMAL)
@@ -1467,22 +1846,28 @@ class SDRApp:
 
     def read_police_audio(self):
         """Read audio data from SDR process for police/services mode"""
+        process = self.audio_process
         try:
             chunk_size = 1024 * 4
+            bytes_in = self.metrics.counter("stage_bytes_in_total", stage="police")
             
-            while self.running and self.sdr_process:
-                raw_samples = self.sdr_process.stdout.read(chunk_size)
+            while self.audio_running and process:
+                raw_samples = process.read(chunk_size)
                 if not raw_samples:
                     break
+                bytes_in.inc(len(raw_samples))
                 
                 # Send to police audio player
                 self.police_audio_player.play(raw_samples)
+                recorder = self.channel_recorders.get(self.audio_freq)
+                if recorder is not None:
+                    recorder.process(raw_samples, self.police_audio_player.squelch_open)
                         
         except Exception as e:
-            self.show_status(f"Read error: {e}", 5000)
+            self.ui.post("status", self.show_status, f"Read error: {e}", 5000)
         finally:
-            if self.running:
-                self.root.after(0, self.stop_audio)
+            if self.audio_running and process is self.audio_process:
+                self.ui.call(self.stop_audio)
 
     def start_reception(self):
         if self.running:
@@ -1501,12 +1886,14 @@ class SDRApp:
                 self.goes_decoder.reset()
             
             # Clear all queues
-            for q in [self.sample_queue, self.image_queue, self.snr_queue]:
+            for q in [self.sample_queue, self.image_queue]:
                 while not q.empty():
                     q.get_nowait()
             
             # Clear the display
             self.canvas.delete("all")
+            self.image_view.reset()
+            self.pending_image = None
             self.canvas.create_text(
                 self.canvas.winfo_width()//2,
                 self.canvas.winfo_height()//2,
@@ -1521,20 +1908,13 @@ class SDRApp:
                     "rtl_fm", 
                     "-f", f"{freq}e6", 
                     "-M", "fm",
-                    "-s", "250k", 
-                    "-r", "32k", 
+                    "-s", "192k",  # Demodulated at 192k; the player de-emphasises and resamples to 32k
                     "-l", "0", 
-                    "-E", "deemp", 
                     "-"
                 ]
-                self.sdr_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    preexec_fn=os.setsid,
-                    bufsize=1024*1024
-                )
+                self.reception_process = self.launch_on_device("fm", cmd, expected_rate=192e3 * 2)
                 self.audio_player.start(float(freq))
+                self.signal_monitor.reset()  # rtl_fm only delivers audio, there is no spectrum to measure
                 duration = 0
             else:
                 duration = float(self.duration_entry.get()) * 60
@@ -1545,13 +1925,13 @@ class SDRApp:
                     "-n", str(int(duration * 2.4e6)),
                     "-"
                 ]
-                self.sdr_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    preexec_fn=os.setsid,
-                    bufsize=1024*1024
-                )
+                self.reception_process = self.launch_on_device("reception", cmd, expected_rate=2.4e6 * 2)
+                self.spectrum.reset()
+                self.signal_monitor.configure(self.spectrum.sample_rate, BANDWIDTH_HZ[mode])
+                self.spectrum_view.start()
+                half_span = self.spectrum.sample_rate / 2e6
+                self.spectrum_span_label.config(
+                    text=f"{float(freq) - half_span:.3f} - {float(freq) + half_span:.3f} MHz")
             
             self.current_freq = float(freq)
             self.running = True
@@ -1572,16 +1952,13 @@ class SDRApp:
             self.freq_entry.config(state=tk.DISABLED)
             self.decode_btn.config(state=tk.NORMAL, text="▶ Start Decoding")
             
-            self.show_status(f"Reception started on {freq}MHz")
+            self.show_status(f"Reception started on {freq}MHz ({self.reception_process.device.label})")
             
         except Exception as e:
             self.show_status(f"Error: {str(e)}", 5000)
             messagebox.showerror("Error", f"Failed to start: {str(e)}")
-            if hasattr(self, 'sdr_process') and self.sdr_process:
-                try:
-                    os.killpg(os.getpgid(self.sdr_process.pid), signal.SIGTERM)
-                except ProcessLookupError:
-                    pass
+            self.stop_on_device(self.reception_process)
+            self.reception_process = None
             self.running = False
             self.decoding_active = False
             self.play_btn.config(state=tk.NORMAL)
@@ -1598,18 +1975,12 @@ class SDRApp:
         try:
             # Stop audio first
             self.audio_player.stop()
+            self.spectrum_view.stop()
+            self.signal_monitor.reset()
             
             # Terminate SDR process
-            if self.sdr_process:
-                try:
-                    os.killpg(os.getpgid(self.sdr_process.pid), signal.SIGTERM)
-                    self.sdr_process.wait(timeout=1)
-                except (ProcessLookupError, subprocess.TimeoutExpired):
-                    try:
-                        os.killpg(os.getpgid(self.sdr_process.pid), signal.SIGKILL)
-                    except ProcessLookupError:
-                        pass
-                self.sdr_process = None
+            self.stop_on_device(self.reception_process)
+            self.reception_process = None
                 
         except Exception as e:
             self.show_status(f"Error stopping: {str(e)}", 5000)
@@ -1630,104 +2001,102 @@ class SDRApp:
         self.show_status("Reception stopped")
 
     def read_samples(self):
+        process = self.reception_process
         try:
             mode = self.mode_var.get()
             chunk_size = 1024 * 4
-            
-            while self.running and self.sdr_process:
-                raw_samples = self.sdr_process.stdout.read(chunk_size)
+            bytes_in = self.metrics.counter("stage_bytes_in_total", stage="read")
+            samples_out = self.metrics.counter("stage_samples_out_total", stage="read")
+            wait_time = self.metrics.histogram("stage_wait_seconds", stage="read")
+            work_time = self.metrics.histogram("stage_seconds", stage="read")
+            
+            while self.running and process:
+                start = time.perf_counter()
+                raw_samples = process.read(chunk_size)
+                got_data = time.perf_counter()
+                wait_time.observe(got_data - start)
                 if not raw_samples:
                     break
+                bytes_in.inc(len(raw_samples))
                 
                 if mode == "fm":
                     self.audio_player.play(raw_samples)
                 else:
+                    self.spectrum.feed(raw_samples)
                     samples = np.frombuffer(raw_samples, dtype=np.uint8).astype(np.float32) / 255.0 - 0.5
                     self.sample_queue.put(samples)
+                    samples_out.inc(len(samples))
+                work_time.observe(time.perf_counter() - got_data)
                         
         except Exception as e:
-            self.show_status(f"Read error: {e}", 5000)
+            self.ui.post("status", self.show_status, f"Read error: {e}", 5000)
         finally:
-            if self.running:
-                self.root.after(0, self.stop_reception)
+            if self.running and process is self.reception_process:
+                self.ui.call(self.stop_reception)
 
     def process_samples(self):
         try:
+            mode = self.mode_var.get()
+            samples_in = self.metrics.counter("stage_samples_in_total", stage="decode")
+            images_out = self.metrics.counter("stage_images_out_total", stage="decode")
+            decode_time = self.metrics.histogram("stage_seconds", stage=f"decode_{mode}")
             while self.running:
                 try:
                     samples = self.sample_queue.get(timeout=0.1)
+                    samples_in.inc(len(samples))
                     
-                    if self.mode_var.get() == "noaa":
-                        image, snr = self.noaa_decoder.process_samples(samples)
+                    start = time.perf_counter()
+                    if mode == "noaa":
+                        image, _ = self.noaa_decoder.process_samples(samples)
                     else:
-                        image, snr = self.goes_decoder.process_samples(samples)
+                        image, _ = self.goes_decoder.process_samples(samples)
+                    decode_time.observe(time.perf_counter() - start)
                     
                     # Always put image in queue if we have one
                     if image is not None:
                         self.image_queue.put(image)
-                    if snr is not None:
-                        self.snr_queue.put(snr)
+                        images_out.inc()
                     
                 except queue.Empty:
                     continue
                     
         except Exception as e:
-            self.show_status(f"Process error: {e}", 5000)
+            self.ui.post("status", self.show_status, f"Process error: {e}", 5000)
 
     def update_display(self):
+        """Draw the newest decoded image, at most display_limiter.fps times a second"""
+        start = time.perf_counter()
+        delay = 50
         try:
             if self.decoding_active:
-                # Get all available images from queue
+                if self.running and self.image_queue.empty() and self.pending_image is None:
+                    self.metrics.counter("display_starved_ticks_total").inc()
+                # Each image holds everything decoded so far, so only the newest one matters
                 while True:
                     image = self.image_queue.get_nowait()
                     if image:
-                        canvas_width = self.canvas.winfo_width()
-                        canvas_height = self.canvas.winfo_height()
-                        
-                        if canvas_width > 0 and canvas_height > 0:
-                            # Maintain aspect ratio
-                            img_ratio = image.width / image.height
-                            canvas_ratio = canvas_width / canvas_height
-                            
-                            if canvas_ratio > img_ratio:
-                                display_height = canvas_height
-                                display_width = int(canvas_height * img_ratio)
-                            else:
-                                display_width = canvas_width
-                                display_height = int(canvas_width / img_ratio)
-                            
-                            # Resize if needed
-                            if display_width != image.width or display_height != image.height:
-                                display_image = image.resize((display_width, display_height), 
-                                                        Image.Resampling.LANCZOS)
-                            else:
-                                display_image = image
-                            
-                            # Update display
-                            self.current_image = ImageTk.PhotoImage(display_image)
-                            self.canvas.delete("all")
-                            self.canvas.create_image(
-                                canvas_width//2,
-                                canvas_height//2,
-                                image=self.current_image,
-                                anchor=tk.CENTER
-                            )
-                            
-                            # Show progress info
-                            progress = f"Lines received: {image.height}"
-                            self.canvas.create_text(
-                                canvas_width//2,
-                                20,
-                                text=progress,
-                                fill="yellow",
-                                font=('Helvetica', 12),
-                                tags="progress"
-                            )
+                        if self.pending_image is not None:
+                            self.display_limiter.skip()
+                            self.metrics.counter("display_frames_skipped_total").inc()
+                        self.pending_image = image
         except queue.Empty:
             pass
         
+        if self.pending_image is not None:
+            wait = self.display_limiter.due()
+            if wait > 0:
+                delay = max(1, int(wait * 1000))
+            else:
+                image, self.pending_image = self.pending_image, None
+                # GOES frames are blended over the whole image; APT only adds lines and a label
+                refresh_rows = NOAADecoder.LABEL_ROWS if self.mode_var.get() == "noaa" else image.height
+                if self.image_view.show(image, f"Lines received: {image.height}", refresh_rows):
+                    self.display_limiter.drawn_now()
+                    self.metrics.counter("display_frames_total").inc()
+        self.metrics.histogram("stage_seconds", stage="display").observe(time.perf_counter() - start)
+        
         # Schedule next update
-        self.root.after(50, self.update_display)
+        self.root.after(delay, self.update_display)
 
     def show_status(self, message, duration=3000):
         self.canvas.delete("status")
@@ -1754,15 +2123,21 @@ class SDRApp:
                 time.sleep(0.1)
         finally:
             if self.running:
-                self.root.after(0, self.stop_reception)
+                self.ui.call(self.stop_reception)
 
     def on_closing(self):
         """Clean up resources when closing the app"""
-        self.signal_running = False
         self.map_thread_running = False
         self.stop_reception()
         self.stop_scan()
-        self.stop_airport_audio()
+        self.stop_audio()
+        self.stop_adsb()
+        self.stop_replay()
+        if self.session_recorder is not None:
+            self.session_recorder.close()
+        if self.recording_writer is not None:
+            self.recording_writer.close()
+        self.supervisor.stop_all()
         time.sleep(0.5)  # Give threads time to exit
         self.root.destroy()
 
@@ -1787,6 +2162,8 @@ class SDRApp:
         try:
             lat = float(self.lat_entry.get())
             lon = float(self.lon_entry.get())
+            if self.tracker is None:
+                return  # Applied once the tracker finishes loading
             self.tracker.set_location(lat, lon)
             self.update_next_passes()
             self.show_status(f"Location updated to {lat}, {lon}")
@@ -1820,19 +2197,18 @@ class SDRApp:
         """Initialize decoders and sample queues"""
         self.noaa_decoder = NOAADecoder()
         self.goes_decoder = GOESDecoder()
-        self.sample_queue = queue.Queue(maxsize=100)
-        self.image_queue = queue.Queue(maxsize=10)
-        self.snr_queue = queue.Queue()
+        self.sample_queue = InstrumentedQueue(100, self.metrics, "sample_queue")
+        self.image_queue = InstrumentedQueue(10, self.metrics, "image_queue")
 
     def setup_signal_monitor(self):
-        """Set up and start the signal monitoring thread"""
-        self.signal_running = True
-        self.signal_data = []
-        threading.Thread(target=self.monitor_signals, daemon=True).start()
+        """Set up the SNR monitor; it is fed by spectrum frames, so it only runs while receiving"""
+        self.signal_monitor = SignalMonitor(self.update_signal_displays)
 
     def setup_satellite_tracker(self):
         """Initialize the satellite tracker and update passes display"""
-        self.tracker = SatelliteTracker()
+        # Loading ephem and downloading TLEs happens off the main thread so the
+        # window can appear first; the location is applied when it is ready
+        self.tracker = None
         
         # Add a passes tree to the NOAA display that was missing
         self.passes_frame = ttk.Frame(self.noaa_frame)
@@ -1843,28 +2219,24 @@ class SDRApp:
             self.passes_tree.heading(col, text=col)
         self.passes_tree.pack(fill=tk.BOTH, expand=True)
         
-        self.update_next_passes()
+        threading.Thread(target=self.load_satellite_tracker, daemon=True).start()
 
-    def monitor_signals(self):
-        """Monitor signal quality and update displays"""
-        while self.signal_running:
-            try:
-                while True:
-                    snr = self.snr_queue.get_nowait()
-                    self.current_snr = snr
-                    self.signal_data.append(snr)
-                    if len(self.signal_data) > 100:
-                        self.signal_data.pop(0)
-            except queue.Empty:
-                pass
-            
-            self.root.after(0, self.update_signal_displays)
-            time.sleep(0.1)
-
-    def update_signal_displays(self):
-        """Update signal quality displays with current SNR"""
-        snr = max(0, min(30, self.current_snr))
-        self.snr_label.config(text=f"SNR: {snr:.1f} dB")
+    def load_satellite_tracker(self):
+        """Build the satellite tracker in the background and hand it to the UI thread"""
+        tracker = SatelliteTracker()
+        self.ui.call(self.on_tracker_ready, tracker)
+
+    def on_tracker_ready(self, tracker):
+        self.tracker = tracker
+        self.update_location()
+
+    def update_signal_displays(self, snr):
+        """Show a new SNR estimate (None when not measuring); called on the Tk thread"""
+        if snr is None:
+            self.snr_label.config(text="SNR: -- dB")
+            return
+        mean, peak = self.signal_monitor.history.stats()
+        self.snr_label.config(text=f"SNR: {snr:.1f} dB (avg {mean:.1f}, peak {peak:.1f})")
 
     def clear_frequency_display(self):
         """Clear the frequency displays"""
@@ -1872,22 +2244,65 @@ class SDRApp:
             self.frequency_tree.delete(item)
         self.freq_listbox.delete(0, tk.END)
 
+    def find_nearest_towers(self):
+        """List the closest located airports to the observer and their frequencies"""
+        for item in self.nearest_tree.get_children():
+            self.nearest_tree.delete(item)
+        self.nearest_places = {}
+        try:
+            lat = float(self.lat_entry.get())
+            lon = float(self.lon_entry.get())
+            radius_km = float(self.nearest_radius_var.get())
+        except ValueError:
+            self.airport_status_label.config(text="Enter a valid location and radius")
+            return
+        
+        places = self.freq_db.nearest_places(AIRPORT, lat, lon, k=10, radius_km=radius_km)
+        for place in places:
+            frequencies = self.freq_db.place_frequencies(AIRPORT, place.country, place.state, place.place)
+            summary = ", ".join(f"{desc} {format_mhz(hz)}" for _, hz, desc in frequencies)
+            item = self.nearest_tree.insert('', 'end', values=(
+                f"{place.distance_km:.1f}", place.place, summary
+            ))
+            self.nearest_places[item] = place
+        
+        if places:
+            self.airport_status_label.config(text=f"{len(places)} towers within {radius_km:.0f} km")
+        elif not len(self.freq_db.airport_grid()):
+            self.airport_status_label.config(
+                text="No airport coordinates; add airports.csv and rebuild the frequency database")
+        else:
+            self.airport_status_label.config(text=f"No towers within {radius_km:.0f} km")
+
+    def select_nearest_tower(self, event):
+        """Select a nearby airport in the country/state/airport dropdowns"""
+        selection = self.nearest_tree.selection()
+        if not selection:
+            return
+        place = self.nearest_places.get(selection[0])
+        if place is None:
+            return
+        self.airport_country_var.set(place.country)
+        self.airport_state_combo['values'] = self.freq_db.states(AIRPORT, place.country)
+        self.airport_state_var.set(place.state)
+        self.airport_combo['values'] = self.freq_db.places(AIRPORT, place.country, place.state)
+        self.airport_var.set(place.place)
+        self.update_airport_services()
+        
+        self.airport_tower = Tower(place.place, place.lat, place.lon, None)
+        self.update_airport_map()
+
     def update_airport_states(self, event=None):
         """Update states/regions based on selected country for airport towers"""
         country = self.airport_country_var.get()
         
-        if country in self.airport_frequencies:
-            # Get states/regions for the selected country
-            states = list(self.airport_frequencies[country].keys())
+        # Get states/regions for the selected country
+        states = self.freq_db.states(AIRPORT, country)
+        if states:
             self.airport_state_combo['values'] = states
-            
-            if states:
-                self.airport_state_combo.current(0)
-                self.update_airport_airports()
-                self.airport_status_label.config(text="")
-            else:
-                self.airport_state_combo.set('')
-                self.airport_status_label.config(text=f"No states found for {country}")
+            self.airport_state_combo.current(0)
+            self.update_airport_airports()
+            self.airport_status_label.config(text="")
         else:
             self.airport_state_combo['values'] = []
             self.airport_state_combo.set('')
@@ -1905,18 +2320,13 @@ class SDRApp:
         country = self.airport_country_var.get()
         state = self.airport_state_var.get()
         
-        if country in self.airport_frequencies and state in self.airport_frequencies[country]:
-            # Get airports for the selected state
-            airports = list(self.airport_frequencies[country][state].keys())
+        # Get airports for the selected state
+        airports = self.freq_db.places(AIRPORT, country, state)
+        if airports:
             self.airport_combo['values'] = airports
-            
-            if airports:
-                self.airport_combo.current(0)
-                self.update_airport_services()
-                self.airport_status_label.config(text="")
-            else:
-                self.airport_combo.set('')
-                self.airport_status_label.config(text=f"No airports found for {state}")
+            self.airport_combo.current(0)
+            self.update_airport_services()
+            self.airport_status_label.config(text="")
         else:
             self.airport_combo['values'] = []
             self.airport_combo.set('')
@@ -1933,27 +2343,18 @@ class SDRApp:
         state = self.airport_state_var.get()
         airport = self.airport_var.get()
         
-        if (country in self.airport_frequencies and 
-            state in self.airport_frequencies[country] and 
-            airport in self.airport_frequencies[country][state]):
-            
-            # Get services for the selected airport
-            services = list(self.airport_frequencies[country][state][airport].keys())
+        # Get services for the selected airport
+        services = self.freq_db.services(AIRPORT, country, state, airport)
+        if services:
             self.airport_service_combo['values'] = services
-            
-            if services:
-                self.airport_service_combo.current(0)
-                self.update_airport_frequencies()
-                self.airport_status_label.config(text="")
-            else:
-                self.airport_service_combo.set('')
-                self.airport_status_label.config(text=f"No services found for {airport}")
+            self.airport_service_combo.current(0)
+            self.update_airport_frequencies()
+            self.airport_status_label.config(text="")
         else:
             self.airport_service_combo['values'] = []
             self.airport_service_combo.set('')
             self.airport_status_label.config(text=f"No services found for {airport}")
-        
-        self.clear_airport_frequency_display()
+            self.clear_airport_frequency_display()
 
     def update_airport_frequencies(self, event=None):
         """Update airport frequencies based on selected service"""
@@ -1969,20 +2370,11 @@ class SDRApp:
             return
             
         try:
-            # Access the frequencies list for this service
-            frequencies_list = self.airport_frequencies[country][state][airport][service]
-            
-            # Process frequencies
-            for freq_entry in frequencies_list:
-                parts = freq_entry.split(' - ', 1)
-                freq_str = parts[0].strip()
-                desc = parts[1] if len(parts) > 1 else service
-                
-                # Remove MHz at the end if present for the frequency tree
-                if freq_str.endswith(" MHz"):
-                    freq_value = freq_str[:-4]
-                else:
-                    freq_value = freq_str
+            # Pre-parsed (Hz, description) pairs for this service
+            frequencies_list = self.freq_db.frequencies(AIRPORT, country, state, airport, service)
+            
+            for hz, desc in frequencies_list:
+                freq_value = format_mhz(hz)
                 
                 # Add to treeview
                 self.airport_frequency_tree.insert('', 'end', values=(freq_value, desc))
@@ -2032,6 +2424,10 @@ class SDRApp:
         enabled = self.enable_airport_audio_var.get()
         self.police_audio_player.set_processing_enabled(enabled)  # Reuse police audio player
 
+    def update_airport_denoise(self):
+        """Enable/disable spectral noise reduction for airport audio"""
+        self.police_audio_player.set_denoise_enabled(self.airport_denoise_var.get())
+
     def clear_airport_frequency_display(self):
 
         """Clear the airport frequency displays"""
@@ -2040,226 +2436,54 @@ class SDRApp:
         self.airport_freq_listbox.delete(0, tk.END)
 
     def create_initial_airport_map(self):
-        """Create the initial airport map with default location"""
-        # Default to New York coordinates if no airport selected
-        if not hasattr(self, 'airport_tower') or self.airport_tower is None:
-            lat, lon = 40.7128, -74.0060
-        else:
-            lat, lon = self.airport_tower.lat, self.airport_tower.lon
-        
-        # Create a folium map
-        self.airport_map = folium.Map(
-            location=[lat, lon],
-            zoom_start=12,
-            tiles='https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png',
-            attr='OpenStreetMap'
-        )
-        
-        # Add marker cluster
-        self.marker_cluster = MarkerCluster().add_to(self.airport_map)
-        
-        # Update the display
-        self.update_airport_map_display()
+        """Create the layered airport map, centred on the observer until a tower is selected"""
+        maprender = lazy_import("sdr_maprender")
+        self.map_layers = maprender.LayeredMap()
+        self.map_view = maprender.CanvasMapView(self.airport_map_canvas)
+        self.update_airport_map()
+
+    def airport_map_size(self):
+        """Canvas size in pixels, or the default size before the canvas is laid out"""
+        width = self.airport_map_canvas.winfo_width()
+        height = self.airport_map_canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return 800, 500
+        return width, height
 
-    def update_airport_map_display(self):
-        """Update the Tkinter canvas with the current folium map"""
-        if not hasattr(self, 'airport_map'):
+    def update_airport_map(self):
+        """Redraw the dirty map layers and move the aircraft markers"""
+        if self.map_layers is None:
             return
-            
-        # Save the map to a temporary HTML file
-        with tempfile.NamedTemporaryFile(suffix='.html', delete=False) as tmp:
-            self.airport_map.save(tmp.name)
-            tmp_path = tmp.name
         
-        # Use selenium to capture a screenshot of the map if available
-        try:
-            options = Options()
-            options.add_argument('--headless')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--window-size=800,600')
-            driver = webdriver.Chrome(options=options)
-            driver.get(f'file://{tmp_path}')
-            time.sleep(1)  # Wait for map to load
-            png = driver.get_screenshot_as_png()
-            driver.quit()
-        except Exception as e:
-            print(f"Error capturing map with Selenium: {e}")
-            # Fallback to a blank map if ChromeDriver isn't available
-            img = Image.new('RGB', 
-                        (self.airport_map_canvas.winfo_width(), 
-                            self.airport_map_canvas.winfo_height()), 
-                        color='white')
-            draw = ImageDraw.Draw(img)
-            draw.text((100, 100), 
-                    "Map display requires ChromeDriver\nInstall with: brew install --cask chromedriver", 
-                    fill="black", 
-                    font=ImageFont.load_default())
-            png = img.tobytes()
-        finally:
+        width, height = self.airport_map_size()
+        if self.airport_tower is not None:
+            self.map_layers.set_view(width, height, tower=self.airport_tower,
+                                     radar_range_km=self.radar_range.get())
+        else:
+            # Default to New York coordinates if no location is entered
             try:
-                os.unlink(tmp_path)
-            except:
-                pass
+                center = (float(self.lat_entry.get()), float(self.lon_entry.get()))
+            except ValueError:
+                center = (40.7128, -74.0060)
+            self.map_layers.set_view(width, height, center=center, radar_range_km=self.radar_range.get())
         
-        # Convert screenshot to PhotoImage
         try:
-            img = Image.open(BytesIO(png))
-            img = img.resize(
-                (self.airport_map_canvas.winfo_width(), 
-                self.airport_map_canvas.winfo_height()),
-                Image.Resampling.LANCZOS  # Correct resampling method
-            )
+            removed = self.aircraft.expire(self.clock())
+            if self.adsb_tracker is not None:
+                self.adsb_tracker.forget(removed)
+            # Only aircraft that changed since the last refresh are touched below
+            delta = self.aircraft.changes_since(self.map_version)
+            self.map_version = delta.version
+            update_kinematics(self.aircraft[icao] for icao in delta.changed)
+            if self.airport_tower is not None:
+                self.airport_tower.aircraft, _, _ = self.aircraft.within(
+                    self.airport_tower.lat, self.airport_tower.lon, self.radar_range.get())
+                self.airport_map_frame.config(
+                    text=f"Airport Radar - {len(self.airport_tower.aircraft)} of {len(self.aircraft)} aircraft in range")
+            self.map_layers.update_tracks(self.aircraft, self.show_paths_var.get(), delta)
+            self.map_view.show(self.map_layers, self.aircraft, delta)
         except Exception as e:
-            print(f"Error processing map image: {e}")
-            return
-        
-        # Update the canvas
-        if hasattr(self, 'map_photo'):
-            self.airport_map_canvas.delete(self.map_image)
-        
-        self.map_photo = ImageTk.PhotoImage(img)
-        self.map_image = self.airport_map_canvas.create_image(
-            self.airport_map_canvas.winfo_width() // 2,
-            self.airport_map_canvas.winfo_height() // 2,
-            image=self.map_photo
-        )
-
-
-    
-
-
-    def update_airport_map(self):
-        """Update the airport map with current aircraft positions"""
-        if not hasattr(self, 'airport_tower') or self.airport_tower is None:
-            return
-        
-        # Clear existing markers
-        self.marker_cluster.clear_markers()
-        
-        # Add tower marker
-        folium.Marker(
-            [self.airport_tower.lat, self.airport_tower.lon],
-            popup=f"<b>{self.airport_tower.name}</b><br>"
-                f"Frequency: {self.airport_tower.frequency} MHz",
-            icon=folium.Icon(color='red', icon='tower-cell')
-        ).add_to(self.marker_cluster)
-        
-        # Add aircraft markers
-        for icao, aircraft in self.aircraft.items():
-            if not aircraft.positions:
-                continue
-                
-            # Get latest position
-            lat, lon, alt, _ = aircraft.positions[-1]
-            
-            # Create popup content
-            popup_content = (f"<b>{aircraft.callsign if aircraft.callsign else icao}</b><br>"
-                            f"Altitude: {alt} ft<br>"
-                            f"Speed: {aircraft.speed * 1.94384:.1f} kt<br>"
-                            f"Heading: {aircraft.heading:.0f}°<br>"
-                            f"Signal: {aircraft.signal_strength:.1f}%")
-            
-            # Create marker with custom icon
-            icon_color = 'green' if aircraft.signal_strength > 50 else 'orange' if aircraft.signal_strength > 25 else 'red'
-            icon = folium.Icon(
-                color=icon_color,
-                icon='plane',
-                angle=aircraft.heading  # Rotate plane icon to match heading
-            )
-            
-            # Add marker
-            folium.Marker(
-                [lat, lon],
-                popup=popup_content,
-                icon=icon
-            ).add_to(self.marker_cluster)
-            
-            # Add flight path if enabled
-            if self.show_paths_var.get() and len(aircraft.positions) > 1:
-                path_coords = [[p[0], p[1]] for p in aircraft.positions]
-                folium.PolyLine(
-                    path_coords,
-                    color=icon_color,
-                    weight=1.5,
-                    opacity=0.7
-                ).add_to(self.airport_map)
-        
-        # Add radar range circle
-        folium.Circle(
-            radius=self.radar_range.get() * 1000,  # Convert to meters
-            location=[self.airport_tower.lat, self.airport_tower.lon],
-            color='blue',
-            fill=True,
-            fill_color='blue',
-            fill_opacity=0.1,
-            weight=1
-        ).add_to(self.airport_map)
-        
-        # Update the display
-        self.update_airport_map_display()
-
-    def update_airport_map_display(self):
-        """Update the Tkinter canvas with the current folium map"""
-        if not hasattr(self, 'airport_map'):
-            return
-            
-        # Save the map to a temporary HTML file
-        with tempfile.NamedTemporaryFile(suffix='.html', delete=  False) as tmp:
-            self.airport_map.save(tmp.name)
-            tmp_path =  tmp.name
-        
-        # Use selenium to capture a  screenshot  if  available
-        img =  None
-        try:
-            options =  Options()
-            options.add_argument('--headless')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--window-size=800,600')
-            driver =  webdriver.Chrome(options=options)
-            driver.get(f'file://{  tmp_path  }')
-            time.sleep(1)  # Wait  for  map  to  load
-            png =  driver.get_screenshot_as_png()
-            driver.quit()
-            img =  Image.open(BytesIO(png))
-        except  WebDriverException as  e:
-            print(f"ChromeDriver  not  available,  using  fallback  image")
-            # Create  a  simple  fallback  image
-            img =  Image.new('RGB',  (800,  600),  color='white')
-            draw =  ImageDraw.Draw(img)
-            draw.text((100,  100),  
-                    "Map  display  requires  ChromeDriver\n"
-                    "Install  with:  brew  install  --  cask  chromedriver",
-                    fill="black")
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
-        
-        if  img:
-            try:
-                # Resize  to  fit  canvas
-                canvas_width =  self.airport_map_canvas.winfo_width()
-                canvas_height =  self.airport_map_canvas.winfo_height()
-                
-                if  canvas_width  >  0  and  canvas_height  >  0:
-                    img =  img.resize(
-                        (canvas_width,  canvas_height),
-                        Image.Resampling.LANCZOS  #  Fixed  resampling  method
-                    )
-                    
-                    #  Update  canvas
-                    if  hasattr(self,  'map_photo'):
-                        self.airport_map_canvas.delete(self.map_image)
-                    
-                    self.map_photo =  ImageTk.PhotoImage(img)
-                    self.map_image =  self.airport_map_canvas.create_image(
-                        canvas_width  //  2,
-                        canvas_height  //  2,
-                        image=self.map_photo
-                    )
-            except  Exception as  e:
-                print(f"Error  updating  map  display:  {  e  }")
+            print(f"Error updating map display: {e}")
 
     def map_update_thread(self):
         """Thread to periodically update the map"""
@@ -2268,8 +2492,8 @@ class SDRApp:
                 if (getattr(self, 'auto_update_var',  None) and 
                     getattr(self, 'auto_update_var').get() and 
                     hasattr(self, 'airport_tower')):
-                    self.root.after(0, self.update_airport_map)
-                time.sleep(5)
+                    self.ui.post("airport_map", self.update_airport_map)
+                time.sleep(1)
             except Exception as e:
                 print(f"Map  update  error:  {  e  }")
                 break
@@ -2278,89 +2502,25 @@ class SDRApp:
     def  clear_aircraft_tracks(self):
         """Clear  all  aircraft  tracks  from  the  map"""
         if  hasattr(self,  'aircraft'):
-            self.aircraft =  {}
+            if self.adsb_tracker is not None:
+                self.adsb_tracker.forget(list(self.aircraft))
+            self.aircraft.clear()
         if  hasattr(self,  'airport_tower')  and  hasattr(self.airport_tower,  'aircraft'):
             self.airport_tower.aircraft =  {}
         if  hasattr(self,  'update_airport_map'):
             self.update_airport_map()
 
-    def process_airport_audio(self, data):
-        """Process audio data from airport tower to detect and track aircraft"""
-        if not hasattr(self, 'airport_tower') or not self.airport_tower:
-            return
-        
-        try:
-            # Convert audio to numpy array
-            samples = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
-            
-            # Calculate signal strength
-            rms = np.sqrt(np.mean(samples**2))
-            signal_strength = min(100, max(0, (rms / 0.3) * 100))
-            
-            # Simple aircraft detection - in a real app you'd decode ADS-B or other protocols
-            if signal_strength > 20:  # Threshold for aircraft detection
-                # Generate a fake position for demo purposes
-                # In a real app you'd get this from decoded signals
-                icao_id = "DEMO" + str(len(self.aircraft) + 1).zfill(3)
-                if icao_id not in self.aircraft:
-                    self.aircraft[icao_id] = Aircraft(icao_id, callsign="FLT" + icao_id)
-                
-                # Calculate position relative to tower
-                bearing = 2 * math.pi * time.time() / 60  # Rotate over 60 seconds
-                distance = 0.5 * self.radar_range.get()  # 50% of radar range
-                lat, lon = self.calculate_position(
-                    self.airport_tower.lat, 
-                    self.airport_tower.lon,
-                    distance, 
-                    math.degrees(bearing)
-                )
-                alt = 10000 + 5000 * math.sin(time.time() / 20)  # Vary altitude
-                
-                # Update aircraft position
-                self.aircraft[icao_id].update_position(
-                    lat, lon, 
-                    int(alt), 
-                    datetime.now(),
-                    signal_strength
-                )
-                
-                # If auto-update is on, trigger map update
-                if self.auto_update_var.get():
-                    self.root.after(0, self.update_airport_map)
-        
-        except Exception as e:
-            print(f"Error processing airport audio: {e}")
-
-    def calculate_position(self, lat, lon, distance_km, bearing_deg):
-        """
-        Calculate new position given a starting point, distance and bearing
-        Returns (new_lat, new_lon)
-        """
-        R = 6371  # Earth's radius in km
-        bearing = math.radians(bearing_deg)
-        lat_rad = math.radians(lat)
-        lon_rad = math.radians(lon)
-        
-        new_lat = math.asin(
-            math.sin(lat_rad) * math.cos(distance_km/R) +
-            math.cos(lat_rad) * math.sin(distance_km/R) * math.cos(bearing)
-        )
-        
-        new_lon = lon_rad + math.atan2(
-            math.sin(bearing) * math.sin(distance_km/R) * math.cos(lat_rad),
-            math.cos(distance_km/R) - math.sin(lat_rad) * math.sin(new_lat)
-        )
-        
-        return (math.degrees(new_lat), math.degrees(new_lon))
-
     def start_airport_audio(self):
-        """Start audio for airport tower mode"""
-        if self.running:
+        """Start audio for airport tower mode: AM reception of every airband channel of the airport"""
+        if self.audio_running:
             return
             
         try:
             freq_str = self.freq_entry.get()
             freq = float(freq_str)
+            airband = lazy_import("sdr_airband")
+            if not airband.in_airband(freq * 1e6):
+                raise ValueError(f"{freq} MHz is outside the VHF airband (118-137 MHz)")
             
             # Get selected airport info
             country = self.airport_country_var.get()
@@ -2368,100 +2528,445 @@ class SDRApp:
             airport = self.airport_var.get()
             service = self.airport_service_var.get()
             
-            # Create tower object
+            # Place the tower at the airport, falling back to the observer location
+            location = self.freq_db.place_location(AIRPORT, country, state, airport)
+            if location is None:
+                location = (float(self.lat_entry.get()), float(self.lon_entry.get()))
             self.airport_tower = Tower(
                 name=airport,
-                lat=float(self.lat_entry.get()),
-                lon=float(self.lon_entry.get()),
+                lat=location[0],
+                lon=location[1],
                 freq=freq
             )
             
-            # Start the SDR
-            cmd = [
-                "rtl_fm", 
-                "-f", f"{freq}e6", 
-                "-M", "fm",
-                "-s", "170k", 
-                "-r", "32k", 
-                "-l", "0", 
-                "-E", "deemp", 
-                "-"
-            ]
-            self.sdr_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                preexec_fn=os.setsid,
-                bufsize=1024*1024
-            )
+            # One dongle per window of channels; the selected channel's window is tuned first and paces the audio
+            selected = airband.airband_channel(int(round(freq * 1e6)), "Selected")
+            windows = airband.plan_airport(self.airport_airband_channels(country, state, airport, selected))
+            windows.sort(key=lambda window: selected.carrier_hz not in [ch.carrier_hz for ch in window[1]])
+            missed = []
+            for index, (center, channels) in enumerate(windows):
+                try:
+                    self.launch_airband_window(index, center, channels)
+                except DeviceBusy:
+                    if index == 0:
+                        raise
+                    missed.extend(channels)
+            self.audio_process = self.airband_processes[0]
+            self.airband_mixer = airband.AirbandMixer(len(self.airband_processes))
+            self.record_session_info()
             self.police_audio_player.start(freq)
-            self.running = True
-            
-            # Start processing thread
-            threading.Thread(target=self.read_airport_audio, daemon=True).start()
+            self.audio_mode = "airport"
+            self.audio_freq = freq
+            self.audio_channels = [ch.listed_hz / 1e6 for receiver in self.airband_receivers
+                                   for ch in receiver.channels]
+            self.update_airband_solo()
+            self.audio_running = True
+            self.update_audio_recording()
+            
+            # One reader per dongle
+            for index, (process, receiver) in enumerate(zip(self.airband_processes, self.airband_receivers)):
+                threading.Thread(target=self.read_airband, args=(index, process, receiver), daemon=True).start()
             
             # Update UI
             self.start_audio_btn.config(state=tk.DISABLED)
             self.stop_audio_btn.config(state=tk.NORMAL)
-            self.show_status(f"Listening to {airport} {service} on {freq} MHz")
+            self.show_airband_activity()
+            dongles = ", ".join(process.device.label for process in self.airband_processes)
+            self.show_status(f"Listening to {airport} {service}, {len(self.audio_channels)} channels ({dongles})")
+            if missed:
+                self.airport_status_label.config(
+                    text=f"No free dongle for {', '.join(format_mhz(ch.listed_hz) for ch in missed)} MHz")
             
             # Update the map with tower location
             self.update_airport_map()
             
         except Exception as e:
+            if not self.audio_running:
+                self.stop_airband_processes()
             self.show_status(f"Error: {str(e)}", 5000)
             messagebox.showerror("Error", f"Failed to start: {str(e)}")
 
-    def read_airport_audio(self):
-        """Read and process airport tower audio"""
+    def airport_airband_channels(self, country, state, airport, selected):
+        """AirbandChannels of every VHF airband frequency listed for the airport, ``selected`` first"""
+        airband = lazy_import("sdr_airband")
+        channels = {selected.listed_hz: selected}
+        for service in (self.freq_db.services(AIRPORT, country, state, airport) if airport else []):
+            for hz, desc in self.freq_db.frequencies(AIRPORT, country, state, airport, service):
+                if airband.in_airband(hz) and hz not in channels:  # UHF military channels need another dongle
+                    channels[hz] = airband.airband_channel(hz, desc)
+        return list(channels.values())
+
+    def launch_airband_window(self, index, center, channels):
+        """Tune a dongle to one window of airport channels for read_airband; raises DeviceBusy"""
+        airband = lazy_import("sdr_airband")
+        cmd = [
+            "rtl_sdr",
+            "-f", str(int(round(center))),
+            "-s", str(airband.SAMPLE_RATE),
+            "-"
+        ]
+        suffix = "" if index == 0 else f"-{index + 1}"
+        process = self.launch_on_device("airport" + suffix, cmd, expected_rate=airband.SAMPLE_RATE * 2)
+        self.airband_processes.append(process)
+        self.airband_receivers.append(airband.AirbandReceiver(center, channels, metrics=self.metrics,
+                                                              stage="airband" + suffix))
+
+    def stop_airband_processes(self):
+        processes, self.airband_processes = self.airband_processes, []
+        self.airband_receivers = []
+        self.audio_process = None
+        for process in processes:
+            self.stop_on_device(process)
+
+    def update_airband_solo(self):
+        """Play every open airport channel, or only the selected one"""
+        if not self.airband_receivers:
+            return
+        solo = None if self.airport_mix_all_var.get() else int(round(self.audio_freq * 1e6))
+        for receiver in self.airband_receivers:
+            receiver.solo = solo
+
+    def show_airband_activity(self):
+        """List the airport channels whose carrier squelch is open"""
+        on_air = [format_mhz(ch.listed_hz) for receiver in self.airband_receivers
+                  for ch in receiver.open_channels()]
+        if self.audio_mode != "airport" or not self.audio_running:
+            self.airband_status.config(text="")
+        else:
+            self.airband_status.config(text=f"On air: {', '.join(on_air) or '-'}  "
+                                            f"({len(self.audio_channels)} channels monitored)")
+
+    def read_airband(self, index, process, receiver):
+        """Demodulate one dongle's airport channels; the first dongle's reader plays the mix of all of them"""
+        airband = lazy_import("sdr_airband")
         try:
-            chunk_size = 1024 * 4
+            chunk_size = 8 * airband.BLOCK  # 4 blocks of IQ, 32 ms at 2.4 MS/s
+            # One writer per metric: each dongle's reader counts under its own pipeline name
+            bytes_in = self.metrics.counter("stage_bytes_in_total", stage=process.pipeline)
+            was_open = receiver.squelch
             
-            while self.running and self.sdr_process:
-                raw_samples = self.sdr_process.stdout.read(chunk_size)
+            while self.audio_running and process:
+                raw_samples = process.read(chunk_size)
                 if not raw_samples:
                     break
-                
-                # Play the audio
-                self.police_audio_player.play(raw_samples)
-                
-                # Process for aircraft detection
-                self.process_airport_audio(raw_samples)
+                bytes_in.inc(len(raw_samples))
+                mix = self.airband_mixer.add(index, receiver.process(raw_samples))
+                if mix is not None:
+                    pcm = airband.to_s16(mix)
+                    recorder = self.session_recorder
+                    if recorder is not None:
+                        recorder.audio(pcm, time.time())
+                    self.police_audio_player.play(pcm)
+                for channel, audio, open_ in zip(receiver.channels, receiver.audio, receiver.squelch):
+                    recorder = self.channel_recorders.get(channel.listed_hz / 1e6)
+                    if recorder is not None:
+                        recorder.process(airband.to_s16(audio), bool(open_))
+                if not np.array_equal(receiver.squelch, was_open):
+                    was_open = receiver.squelch
+                    self.ui.post("airband", self.show_airband_activity)
                         
         except Exception as e:
-            self.show_status(f"Read error: {e}", 5000)
+            self.ui.post("status", self.show_status, f"Read error: {e}", 5000)
         finally:
-            if self.running:
-                self.root.after(0, self.stop_airport_audio)
+            if self.audio_running and process is self.audio_process:
+                self.ui.call(self.stop_airport_audio)
 
     def stop_airport_audio(self):
         """Stop airport tower audio and cleanup"""
-        if not self.running:
+        if not self.audio_running:
             return
         
         try:
             # Stop audio
             self.police_audio_player.stop()
+            self.stop_audio_recording()
             
-            # Terminate SDR process
-            if self.sdr_process:
-                os.killpg(os.getpgid(self.sdr_process.pid), signal.SIGTERM)
-                self.sdr_process.wait(timeout=1)
-                self.sdr_process = None
+            # Terminate the SDR processes
+            self.stop_airband_processes()
         
         except Exception as e:
             self.show_status(f"Error stopping: {str(e)}", 5000)
             return
         
-        self.running = False
+        self.audio_running = False
+        self.airband_mixer = None
+        self.show_airband_activity()
         self.start_audio_btn.config(state=tk.NORMAL)
         self.stop_audio_btn.config(state=tk.DISABLED)
         self.show_status("Airport audio stopped")
 
+    def start_adsb(self):
+        """Start decoding 1090 MHz ADS-B into the aircraft table"""
+        if self.adsb_running:
+            return
+        try:
+            adsb = lazy_import("sdr_adsb")
+            if self.adsb_tracker is None:
+                self.adsb_tracker = adsb.ADSBTracker(self.aircraft)
+            cmd = [
+                "rtl_sdr",
+                "-f", str(adsb.ADSB_FREQ_HZ),
+                "-s", str(adsb.SAMPLE_RATE),
+                "-"
+            ]
+            self.adsb_process = self.launch_on_device("adsb", cmd, expected_rate=adsb.SAMPLE_RATE * 2)
+            self.adsb_running = True
+            self.clock = time.time
+            threading.Thread(target=self.read_adsb, args=(adsb.ADSBDecoder(),), daemon=True).start()
+            self.start_adsb_btn.config(state=tk.DISABLED)
+            self.stop_adsb_btn.config(state=tk.NORMAL)
+            if self.map_layers is None:
+                self.create_initial_airport_map()
+            self.show_status(f"Decoding ADS-B on 1090 MHz ({self.adsb_process.device.label})")
+        except Exception as e:
+            if not self.adsb_running:
+                self.stop_on_device(self.adsb_process)
+                self.adsb_process = None
+            self.show_status(f"Error: {str(e)}", 5000)
+            messagebox.showerror("Error", f"Failed to start ADS-B: {str(e)}")
+
+    def read_adsb(self, decoder):
+        """Read raw 2 MS/s IQ, find frames off the Tk thread and hand them to apply_adsb_frames"""
+        process = self.adsb_process
+        try:
+            adsb = lazy_import("sdr_adsb")
+            chunk_size = 256 * 1024  # 65 ms of IQ
+            bytes_in = self.metrics.counter("stage_bytes_in_total", stage="adsb")
+            frames_out = self.metrics.counter("adsb_frames_total")
+            decode_time = self.metrics.histogram("stage_seconds", stage="adsb_decode")
+            
+            while self.adsb_running and process:
+                raw = process.read(chunk_size)
+                if not raw:
+                    break
+                received = time.time()
+                bytes_in.inc(len(raw))
+                start = time.perf_counter()
+                frames = decoder.process(raw)
+                decode_time.observe(time.perf_counter() - start)
+                times = adsb.frame_times(frames, decoder.samples, received)
+                recorder = self.session_recorder
+                if recorder is not None:
+                    recorder.iq(raw, received)
+                    recorder.frames(frames, times)
+                if frames:
+                    frames_out.inc(len(frames))
+                    self.ui.call(self.apply_adsb_frames, frames, times)
+        except Exception as e:
+            self.ui.post("status", self.show_status, f"ADS-B read error: {e}", 5000)
+        finally:
+            if self.adsb_running and process is self.adsb_process:
+                self.ui.call(self.stop_adsb)
+
+    def adsb_reference(self):
+        """Tower or observer position for local CPR decoding, or None"""
+        if self.airport_tower is not None:
+            return (self.airport_tower.lat, self.airport_tower.lon)
+        try:
+            return (float(self.lat_entry.get()), float(self.lon_entry.get()))
+        except ValueError:
+            return None
+
+    def apply_adsb_frames(self, frames, times):
+        """Update aircraft from decoded frames; runs on the Tk thread, which owns self.aircraft"""
+        self.adsb_tracker.reference = self.adsb_reference()
+        for frame, t in zip(frames, times):
+            self.adsb_tracker.handle(frame, t)
+
+    def stop_adsb(self):
+        """Stop the ADS-B receiver; tracked aircraft stay until they expire"""
+        if not self.adsb_running:
+            return
+        self.adsb_running = False
+        try:
+            self.stop_on_device(self.adsb_process)
+        except Exception as e:
+            print(f"Error stopping ADS-B: {e}")
+        self.adsb_process = None
+        self.start_adsb_btn.config(state=tk.NORMAL)
+        self.stop_adsb_btn.config(state=tk.DISABLED)
+        self.show_status("ADS-B stopped")
+
+    def record_session_info(self):
+        """Write the current tower and radar range to the session log, if recording"""
+        if self.session_recorder is None:
+            return
+        tower = None
+        if self.airport_tower is not None:
+            tower = {"name": self.airport_tower.name, "lat": self.airport_tower.lat,
+                     "lon": self.airport_tower.lon, "freq": self.airport_tower.frequency}
+        self.session_recorder.session(time.time(), tower=tower, radar_range_km=self.radar_range.get())
+
+    def toggle_recording(self):
+        """Start or stop logging decoded frames, airband audio and optionally IQ to a session file"""
+        if self.session_recorder is not None:
+            recorder, self.session_recorder = self.session_recorder, None
+            recorder.close()
+            self.record_btn.config(text="Record Session")
+            self.show_status(f"Saved {recorder.records} records to {recorder.path}", 5000)
+            return
+        try:
+            replay = lazy_import("sdr_replay")
+            self.session_recorder = replay.SessionRecorder(replay.session_path(),
+                                                           record_iq=self.record_iq_var.get())
+            self.record_session_info()
+            self.record_btn.config(text="Stop Recording")
+            self.show_status(f"Recording to {self.session_recorder.path}")
+        except Exception as e:
+            self.session_recorder = None
+            messagebox.showerror("Error", f"Failed to start recording: {str(e)}")
+
+    def start_replay(self):
+        """Replay a session log through the tracker and map at the selected speed"""
+        if self.replay_driver is not None:
+            return
+        replay = lazy_import("sdr_replay")
+        path = filedialog.askopenfilename(
+            title="Replay session",
+            initialdir=replay.DEFAULT_SESSION_DIR if os.path.isdir(replay.DEFAULT_SESSION_DIR) else None,
+            filetypes=[("Session logs", "*.sdrlog"), ("All files", "*")]
+        )
+        if not path:
+            return
+        try:
+            speed = replay.parse_speed(self.replay_speed_var.get())
+            records = replay.read_session(path)
+            next(records, None)  # Fail now on a file that is not a session log
+            records = replay.read_session(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Cannot replay {path}: {str(e)}")
+            return
+        
+        # Replayed traffic replaces live traffic
+        self.stop_adsb()
+        adsb = lazy_import("sdr_adsb")
+        if self.adsb_tracker is None:
+            self.adsb_tracker = adsb.ADSBTracker(self.aircraft)
+        self.clear_aircraft_tracks()
+        if self.map_layers is None:
+            self.create_initial_airport_map()
+        
+        # Whole seconds per batch at max speed keep the Tk round trips from dominating
+        self.replay_driver = replay.ReplayDriver(records, speed=speed, batch_s=0.1 if speed else 1.0)
+        self.clock = self.replay_driver.session_time
+        self.replay_btn.config(state=tk.DISABLED)
+        self.stop_replay_btn.config(state=tk.NORMAL)
+        self.start_adsb_btn.config(state=tk.DISABLED)
+        self.show_status(f"Replaying {os.path.basename(path)} at {self.replay_speed_var.get()}")
+        threading.Thread(target=self.run_replay, args=(self.replay_driver, replay, adsb.ADSBDecoder()),
+                         daemon=True).start()
+
+    def run_replay(self, driver, replay, decoder):
+        """Release paced batches from the replay thread and apply each on the Tk thread"""
+        # Airband audio only makes sense at recorded speed and with the live audio idle
+        play_audio = driver.speed == 1.0 and not self.audio_running
+        audio_started = False
+        try:
+            for _, batch in driver.batches():
+                sessions = [json.loads(r.payload) for r in batch if r.kind == replay.SESSION]
+                frames = replay.replay_frames(batch, decoder)
+                applied = threading.Event()
+                self.ui.call(self.apply_replay_batch, sessions, frames, applied)
+                if play_audio:
+                    for record in batch:
+                        if record.kind == replay.AUDIO:
+                            if not audio_started:
+                                self.police_audio_player.start(self.airport_tower.frequency if self.airport_tower else 0)
+                                audio_started = True
+                            self.police_audio_player.play(record.payload)
+                # Wait for the Tk thread so a max speed replay cannot flood its queue
+                while not applied.wait(0.5):
+                    if driver.stopped:
+                        return
+        except Exception as e:
+            print(f"Replay error: {e}")
+        finally:
+            if audio_started:
+                self.police_audio_player.stop()
+            self.ui.call(self.finish_replay, driver)
+
+    def apply_replay_batch(self, sessions, frames, applied):
+        """Apply one replayed batch on the Tk thread"""
+        try:
+            for info in sessions:
+                tower = info.get("tower")
+                if tower:
+                    self.airport_tower = Tower(tower["name"], tower["lat"], tower["lon"], tower.get("freq"))
+                if info.get("radar_range_km"):
+                    self.radar_range.set(info["radar_range_km"])
+            self.adsb_tracker.reference = self.adsb_reference()
+            for t, frame in frames:
+                self.adsb_tracker.handle(frame, t)
+        finally:
+            applied.set()
+
+    def stop_replay(self):
+        if self.replay_driver is not None:
+            self.replay_driver.stop()
+
+    def finish_replay(self, driver):
+        """Restore the live clock and controls once a replay ends or is stopped"""
+        if driver is not self.replay_driver:
+            return
+        self.replay_driver = None
+        # Hold the clock at the end of the session so the replayed traffic stays on the map
+        end = driver.session_time()
+        self.clock = lambda: end
+        self.replay_btn.config(state=tk.NORMAL)
+        self.stop_replay_btn.config(state=tk.DISABLED)
+        self.start_adsb_btn.config(state=tk.NORMAL)
+        self.update_airport_map()
+        self.show_status(f"Replay finished: {driver.replayed} records")
+
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SDR Tools")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Serve pipeline metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-log-interval", type=float, default=0,
+                        help="Print a metrics summary line every N seconds")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report time to first window and which subsystems were imported, then exit")
+    parser.add_argument("--device", action="append", default=[], metavar="PIPELINE=DONGLE",
+                        help="Pin a pipeline (reception, fm, police, airport, scan, adsb) to a dongle "
+                             "by index or serial; repeatable")
+    parser.add_argument("--fake-devices", type=int, default=0, metavar="N",
+                        help="Use N synthetic dongles instead of real hardware")
+    parser.add_argument("--scan-node", action="append", default=[], metavar="HOST:PORT",
+                        help="Split the police scan across this rtl_tcp server; repeatable")
+    parser.add_argument("--fake-scan-nodes", type=int, default=0, metavar="N",
+                        help="Start N local fake rtl_tcp servers and scan across them")
+    args = parser.parse_args()
+    
+    preferences = {}
+    for pin in args.device:
+        pipeline, _, dongle = pin.partition("=")
+        if not dongle:
+            parser.error(f"--device expects PIPELINE=DONGLE, got {pin!r}")
+        preferences[pipeline] = dongle
+    devices = DeviceManager(fake_devices(args.fake_devices) if args.fake_devices else None, preferences)
+    
+    scan_nodes = list(args.scan_node)
+    if args.fake_scan_nodes:
+        distscan = lazy_import("sdr_distscan")
+        # Carriers across the default 450-470 MHz scan range
+        signals = distscan.demo_signals(distscan.plan_frequencies(450e6, 470e6, 12.5e3))
+        scan_nodes += [server.address for server in distscan.start_fake_nodes(args.fake_scan_nodes, signals)]
+    
     root = tk.Tk()
-    app = SDRApp(root)
+    app = SDRApp(root, devices, scan_nodes)
+    if args.metrics_port:
+        start_metrics_server(app.metrics, args.metrics_port)
+    if args.metrics_log_interval > 0:
+        start_metrics_logger(app.metrics, args.metrics_log_interval)
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
+    if args.profile_startup:
+        root.update()
+        print(f"Time to first window: {(time.perf_counter() - _MODULE_START) * 1000:.0f} ms")
+        print(f"Subsystems loaded at startup: {', '.join(loaded_subsystems()) or 'none'}")
+        for name, seconds in sorted(_lazy_import_times.items(), key=lambda kv: -kv[1]):
+            print(f"  {name}: {seconds * 1000:.0f} ms")
+        app.on_closing()
+        sys.exit(0)
     root.mainloop()
\ No newline at end of file
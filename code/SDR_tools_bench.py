@@ -0,0 +1,649 @@
+"""Headless benchmark suite for the SDR Tools hot paths.
+
+Every case runs on reproducible synthetic inputs from ``sdr_synth`` and needs
+no radio, audio device or display. Run it from the repository root:
+
+    python code/SDR_tools_bench.py                  # run and compare with baselines
+    python code/SDR_tools_bench.py --save-baseline  # record the current numbers
+    python code/SDR_tools_bench.py -k noaa -k scan  # run a subset of cases
+
+Baselines are machine specific and are stored in ``code/bench_baselines.json``
+unless ``--baseline`` points elsewhere. A case regresses when its median
+per-call latency exceeds the baseline by more than ``--threshold``.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sdr_synth
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baselines.json")
+
+
+class BenchmarkSkipped(Exception):
+    """Raised by a case setup when an optional dependency is missing"""
+
+
+class NullAudioSink:
+    """Stand-in for a PyAudio output stream that discards everything"""
+    def __init__(self):
+        self.bytes_written = 0
+
+    def write(self, data, *args, **kwargs):
+        self.bytes_written += len(data)
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ManualTkRoot:
+    """Stand-in for a Tk root whose ``after`` callbacks run only when ``run_pending`` is called"""
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, fn, *args):
+        self.callbacks.append((fn, args))
+
+    def run_pending(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for fn, args in callbacks:
+            fn(*args)
+
+
+class Benchmark:
+    """A named hot path: ``setup()`` returns the callable to time and its unit count per call
+
+    ``teardown()``, if given, runs once after the last round to release
+    what the setups shared, such as threads and temporary files.
+    """
+    def __init__(self, name, setup, calls=50, rounds=5, unit="samples", teardown=None):
+        self.name = name
+        self.setup = setup
+        self.calls = calls
+        self.rounds = rounds
+        self.unit = unit
+        self.teardown = teardown
+
+    def run(self):
+        latencies = []
+        units = 0
+        try:
+            for _ in range(self.rounds):
+                fn, units_per_call = self.setup()
+                fn()  # Warm up caches and lazy state outside the timed region
+                for _ in range(self.calls):
+                    start = time.perf_counter()
+                    fn()
+                    latencies.append(time.perf_counter() - start)
+                units = units_per_call
+        finally:
+            if self.teardown is not None:
+                self.teardown()
+        latencies = np.array(latencies)
+        p50 = float(np.percentile(latencies, 50))
+        return {
+            "calls": len(latencies),
+            "mean_us": float(latencies.mean() * 1e6),
+            "p50_us": p50 * 1e6,
+            "p95_us": float(np.percentile(latencies, 95) * 1e6),
+            "throughput": units / p50 if p50 > 0 else float("inf"),
+            "unit": self.unit,
+        }
+
+
+def _app_module():
+    import SDR_tools
+    return SDR_tools
+
+
+def setup_noaa():
+    app = _app_module()
+    decoder = app.NOAADecoder()
+    samples = sdr_synth.samples_from_u8(sdr_synth.synthetic_iq_u8(2048, seed=1))
+    return (lambda: decoder.process_samples(samples)), len(samples)
+
+
+def setup_goes():
+    app = _app_module()
+    decoder = app.GOESDecoder()
+    samples = sdr_synth.samples_from_u8(sdr_synth.synthetic_iq_u8(2048, seed=2))
+    return (lambda: decoder.process_samples(samples)), len(samples)
+
+
+def setup_display_apt_line():
+    from PIL import Image
+    import sdr_display
+    # One new APT line displayed late in a pass, where a full LANCZOS resize
+    # of the growing image is slowest; frombuffer views avoid timing a copy
+    lines = np.random.default_rng(8).integers(0, 256, size=(2000, 2080), dtype=np.uint8)
+    backbuffer = sdr_display.ScaledBackBuffer()
+    state = {"height": 1000}
+
+    def display():
+        height = state["height"]
+        if height >= len(lines):
+            height = 1000
+            backbuffer.reset()
+        image = Image.frombuffer("L", (2080, height), lines[:height], "raw", "L", 0, 1)
+        backbuffer.update(image, 800, 400, refresh_rows=64)
+        state["height"] = height + 1
+    return display, 1
+
+
+def setup_spectrum_frame():
+    from PIL import Image
+    import sdr_spectrum
+    # One 25 fps frame of the satellite spectrum panel: the reader thread's
+    # feed of a 4 KB block, then FFT, waterfall row and colour lookup
+    raw = sdr_synth.synthetic_iq_u8(2048, carriers=((300e3, 0.3),), seed=9)
+    analyzer = sdr_spectrum.SpectrumAnalyzer()
+    for _ in range(8):
+        analyzer.feed(raw)
+    waterfall = sdr_spectrum.Waterfall(800, 120)
+
+    def frame():
+        analyzer.feed(raw)
+        waterfall.push(analyzer.compute())
+        Image.fromarray(waterfall.rgb(), "RGB")
+    return frame, 1
+
+
+def setup_ui_dispatch():
+    from sdr_metrics import MetricsRegistry
+    import sdr_uidispatch
+    # A scan-status, channel-list and map-refresh burst from a worker thread,
+    # applied by one main-loop tick after every 100 posts
+    root = ManualTkRoot()
+    ui = sdr_uidispatch.UIDispatcher(root, MetricsRegistry())
+    applied = []
+    state = {"posts": 0}
+
+    def post():
+        ui.post("scan_status", applied.append, "status")
+        ui.post("active_channels", applied.append, "channels")
+        ui.post("airport_map", applied.append, "map")
+        state["posts"] += 3
+        if state["posts"] >= 100:
+            root.run_pending()
+            applied.clear()
+            state["posts"] = 0
+    return post, 3
+
+
+def setup_police_audio():
+    app = _app_module()
+    player = app.PoliceAudioPlayer()
+    player.stream = NullAudioSink()
+    player.playing = True
+    data = sdr_synth.synthetic_audio_s16(2048, seed=3)  # One 4 KB read_police_audio chunk
+    return (lambda: player.play(data)), len(data) // 2
+
+
+def setup_fm_audio():
+    app = _app_module()
+    import sdr_dsp
+    player = app.AudioPlayer()
+    player.chain = sdr_dsp.fm_broadcast_chain()
+    player.stream = NullAudioSink()
+    player.playing = True
+    # One 4 KB read_samples chunk of rtl_fm output at 192k, de-emphasised and resampled to 32k
+    data = sdr_synth.synthetic_audio_s16(2048, sample_rate=sdr_dsp.FM_DEMOD_RATE, seed=11)
+    return (lambda: player.play(data)), len(data) // 2
+
+
+def setup_tone_decode():
+    import sdr_tones
+    # One 4 KB chunk of 32k police audio carrying a 100.0 Hz CTCSS tone
+    decoder = sdr_tones.ToneDecoder()
+    t = np.arange(2048) / sdr_tones.AUDIO_RATE
+    audio = np.frombuffer(sdr_synth.synthetic_audio_s16(2048, seed=12), dtype=np.int16) / np.float32(32768.0)
+    audio = (audio + 0.08 * np.sin(2 * np.pi * 100.0 * t)).astype(np.float32)
+    return (lambda: decoder.process(audio)), len(audio)
+
+
+def setup_scan_tone_identify():
+    import sdr_tones
+    # A 500 ms scan dwell of 170k rtl_fm audio with a DCS 023 code under the voice
+    n = 85000
+    audio = np.frombuffer(sdr_synth.synthetic_audio_s16(n, sample_rate=170e3, seed=13), dtype=np.int16) / np.float32(32768.0)
+    audio = audio + sdr_tones.dcs_waveform("023", 170e3, n, amplitude=0.08)
+    return (lambda: sdr_tones.identify(audio, 170e3)), n
+
+
+def setup_denoise():
+    import sdr_denoise
+    # One 4 KB chunk of police audio through the STFT noise suppressor: 8 frames of 512
+    denoiser = sdr_denoise.SpectralDenoiser()
+    audio = np.frombuffer(sdr_synth.synthetic_audio_s16(2048, noise=0.2, seed=15), dtype=np.int16) / np.float32(32768.0)
+    return (lambda: denoiser.process(audio)), len(audio)
+
+
+_recorder_vox = {}  # The one writer and channel the rounds of recorder_vox share
+
+
+def setup_recorder_vox():
+    import tempfile
+    import sdr_recorder
+    # One 4 KB chunk of open-squelch police audio: resampled to 16k and queued for the writer thread
+    channel = _recorder_vox.get("channel")
+    if channel is None:
+        writer = sdr_recorder.RecordingWriter(tempfile.mkdtemp(prefix="sdr_tools_bench_recordings"))
+        channel = _recorder_vox["channel"] = writer.channel("bench", 460.025)
+    data = sdr_synth.synthetic_audio_s16(2048, seed=14)
+    return (lambda: channel.process(data, True)), len(data) // 2
+
+
+def teardown_recorder_vox():
+    import shutil
+    channel = _recorder_vox.pop("channel", None)
+    if channel is not None:
+        channel.close()
+        channel.writer.close()
+        shutil.rmtree(channel.writer.directory, ignore_errors=True)
+
+
+def setup_airband_channels():
+    import sdr_airband
+    # 32 ms of rtl_sdr IQ demodulated for a dozen airport channels at once, half of them on the air
+    center = 119.5e6
+    channels = [sdr_airband.airband_channel(center + 25e3 + (i - 6) * 75e3) for i in range(12)]
+    keyed = [(ch.carrier_hz - center, 0.05, 500.0 + 60.0 * i, None) for i, ch in enumerate(channels[::2])]
+    raw = sdr_synth.synthetic_airband_iq(4 * sdr_airband.BLOCK, channels=keyed, seed=16)
+    receiver = sdr_airband.AirbandReceiver(center, channels)
+    receiver.process(raw)
+    return (lambda: receiver.process(raw)), len(channels)
+
+
+def setup_scan_power():
+    app = _app_module()
+    # One 500 ms dwell at the default 170k rtl_fm rate, read in 1 KB chunks
+    raw = sdr_synth.synthetic_iq_u8(42500, sample_rate=170e3, seed=4)
+    chunks = [raw[i:i + 1024] for i in range(0, len(raw), 1024)]
+    return (lambda: app.estimate_scan_power(chunks)), len(raw)
+
+
+def setup_distscan_window():
+    import sdr_distscan
+    # One node's tuning window: a 250 ms capture at 2.4 MS/s measured for
+    # every 12.5 kHz channel it covers
+    channels = sdr_distscan.plan_frequencies(450e6, 470e6, 12.5e3)
+    window = sdr_distscan.plan_windows(channels)[0]
+    raw = sdr_synth.synthetic_iq_u8(600000, carriers=((window.channels[40] - window.center_hz, 0.2),), seed=10)
+
+    def measure():
+        sdr_distscan.channel_powers(raw, sdr_distscan.DEFAULT_SAMPLE_RATE, window.center_hz, window.channels, 12.5e3)
+    return measure, len(window.channels)
+
+
+def setup_aircraft_update():
+    import sdr_tracks
+    fixes = sdr_synth.synthetic_aircraft_fixes(1000, seed=5)
+    state = {"aircraft": sdr_tracks.Aircraft("ABC123"), "i": 0}
+
+    def update():
+        i = state["i"]
+        lat, lon, alt, ts = fixes[i % len(fixes)]
+        if i and i % len(fixes) == 0:
+            state["aircraft"] = sdr_tracks.Aircraft("ABC123")
+        state["aircraft"].update_position(lat, lon, alt, ts, 50.0)
+        state["i"] = i + 1
+    return update, 1
+
+
+def _scope(n_aircraft, n_fixes=3):
+    import sdr_tracks
+    aircraft = {}
+    for n in range(n_aircraft):
+        ac = sdr_tracks.Aircraft(f"AC{n:04d}")
+        for lat, lon, alt, ts in sdr_synth.synthetic_aircraft_fixes(n_fixes, heading_deg=n, seed=n):
+            ac.update_position(lat, lon, alt, ts, 50.0)
+        aircraft[ac.icao_id] = ac
+    return aircraft
+
+
+def setup_geo_kinematics():
+    import sdr_geo
+    aircraft = _scope(500)
+    return (lambda: sdr_geo.update_kinematics(aircraft.values())), len(aircraft)
+
+
+def setup_scope_within():
+    import sdr_tracks
+    # The tower's scope: 500 aircraft around JFK, all in the cells the radar range overlaps
+    table = sdr_tracks.AircraftTable()
+    table.update(_scope(500))
+    return (lambda: table.within(40.6413, -73.7781, 50.0)), len(table)
+
+
+def setup_table_within():
+    import sdr_tracks
+    # A wide-area feed: 2000 aircraft over a 9 x 12 degree box, queried at the default radar range
+    rng = np.random.default_rng(7)
+    table = sdr_tracks.AircraftTable()
+    for n in range(2000):
+        icao = f"{n:06X}"
+        table.heard(icao, 0.0)
+        table.update_position(icao, rng.uniform(36.0, 45.0), rng.uniform(-80.0, -68.0), 30000, 0.0, 50.0)
+    return (lambda: table.within(40.6413, -73.7781, 50.0)), len(table)
+
+
+def setup_track_decimate():
+    import sdr_tracks
+    # An hour of 1 Hz fixes, decimated at the renderer's tolerance in projected pixels
+    fixes = sdr_synth.synthetic_aircraft_fixes(3600, seed=6)
+    x = np.array([lon for _, lon, _, _ in fixes]) * 2e4
+    y = np.array([lat for lat, _, _, _ in fixes]) * 2e4
+    return (lambda: sdr_tracks.douglas_peucker(x, y, 0.75)), len(fixes)
+
+
+def setup_json_airports():
+    from sdr_freqdb import load_frequency_json
+    path = os.path.join(REPO_ROOT, "airport_towers.json")
+    return (lambda: load_frequency_json(path, {})), 1
+
+
+def setup_json_police():
+    from sdr_freqdb import load_frequency_json
+    path = os.path.join(REPO_ROOT, "police_frequencies.json")
+    return (lambda: load_frequency_json(path, {})), 1
+
+
+def _built_freqdb():
+    import tempfile
+    import sdr_freqdb
+    db_path = os.path.join(tempfile.gettempdir(), "sdr_tools_bench_frequencies.db")
+    sources = {kind: os.path.join(REPO_ROOT, path) for kind, path in sdr_freqdb.DEFAULT_SOURCES.items()}
+    locations = os.path.join(REPO_ROOT, sdr_freqdb.DEFAULT_LOCATIONS)
+    sdr_freqdb.FrequencyDB(db_path, sources, locations=locations).connection()  # Builds once if missing or stale
+    return sdr_freqdb, db_path, sources
+
+
+def setup_freqdb_lookup_cold():
+    sdr_freqdb, db_path, sources = _built_freqdb()
+
+    def lookup():
+        # A fresh handle every call: open the store and walk country > state > airport > service
+        db = sdr_freqdb.FrequencyDB(db_path, sources, auto_build=False)
+        db.frequencies(sdr_freqdb.AIRPORT, "US", "CA", "Napa County Airport (APC)", "Other")
+        db.close()
+    return lookup, 1
+
+
+def setup_freqdb_lookup_warm():
+    sdr_freqdb, db_path, sources = _built_freqdb()
+    db = sdr_freqdb.FrequencyDB(db_path, sources, auto_build=False)
+    airports = db.places(sdr_freqdb.AIRPORT, "US", "CA")
+    state = {"i": 0}
+
+    def lookup():
+        airport = airports[state["i"] % len(airports)]
+        state["i"] += 1
+        for service in db.services(sdr_freqdb.AIRPORT, "US", "CA", airport):
+            db.frequencies(sdr_freqdb.AIRPORT, "US", "CA", airport, service)
+    return lookup, 1
+
+
+def setup_freq_index_describe():
+    sdr_freqdb, db_path, sources = _built_freqdb()
+    index = sdr_freqdb.FrequencyDB(db_path, sources, auto_build=False).index()
+    # Sweep the default police scan range in 12.5 kHz steps like run_scan does
+    freqs = [450000000 + 12500 * i for i in range(1601)]
+    state = {"i": 0}
+
+    def describe():
+        index.describe(freqs[state["i"] % len(freqs)])
+        state["i"] += 1
+    return describe, 1
+
+
+def setup_freq_index_search():
+    sdr_freqdb, db_path, sources = _built_freqdb()
+    index = sdr_freqdb.FrequencyDB(db_path, sources, auto_build=False).index()
+    # Successive keystrokes of a search-as-you-type session
+    queries = ["b", "bi", "bir", "birm", "birmingham", "birmingham p", "birmingham pd"]
+    state = {"i": 0}
+
+    def search():
+        index.search(queries[state["i"] % len(queries)])
+        state["i"] += 1
+    return search, 1
+
+
+def setup_geogrid_nearest():
+    from sdr_freqdb import GeoGrid
+    # Roughly the density of US airfields: 20k sites over the lower 48
+    grid = GeoGrid((lat, lon, name) for lat, lon, name in sdr_synth.synthetic_sites(20000))
+    observers = sdr_synth.synthetic_sites(500, seed=1)
+    state = {"i": 0}
+
+    def nearest():
+        lat, lon, _ = observers[state["i"] % len(observers)]
+        grid.nearest(lat, lon, k=10, radius_km=100.0)
+        state["i"] += 1
+    return nearest, 1
+
+
+def setup_map_render():
+    import tempfile
+    import sdr_maprender
+    import sdr_tracks
+    # Empty cache: every tile is the placeholder, so only compositing and overlays are timed
+    cache = sdr_maprender.TileCache(os.path.join(tempfile.gettempdir(), "sdr_tools_bench_tiles"))
+    renderer = sdr_maprender.MapRenderer(cache)
+    tower = sdr_tracks.Tower("Benchmark Tower", 40.6413, -73.7781, 119.1)
+    aircraft = {}
+    for n in range(20):
+        ac = sdr_tracks.Aircraft(f"AC{n:04d}", callsign=f"FLT{n:03d}")
+        for lat, lon, alt, ts in sdr_synth.synthetic_aircraft_fixes(60, heading_deg=n * 18, seed=n):
+            ac.update_position(lat, lon, alt, ts, 40.0)
+        aircraft[ac.icao_id] = ac
+
+    def render():
+        renderer.render(800, 500, tower=tower, aircraft=aircraft, radar_range_km=50, show_paths=True)
+    return render, len(aircraft)
+
+
+def setup_map_layered_refresh():
+    import tempfile
+    import sdr_maprender
+    import sdr_tracks
+    cache = sdr_maprender.TileCache(os.path.join(tempfile.gettempdir(), "sdr_tools_bench_tiles"))
+    layers = sdr_maprender.LayeredMap(sdr_maprender.MapRenderer(cache))
+    tower = sdr_tracks.Tower("Benchmark Tower", 40.6413, -73.7781, 119.1)
+    layers.set_view(800, 500, tower=tower, radar_range_km=50)
+    fixes = [sdr_synth.synthetic_aircraft_fixes(5000, heading_deg=n * 18, seed=n) for n in range(20)]
+    aircraft = sdr_tracks.AircraftTable()
+    state = {"i": 0, "version": 0}
+
+    def refresh():
+        # One new fix per aircraft, then what update_airport_map does minus the Tk calls
+        i = state["i"] % 5000
+        for n in range(20):
+            lat, lon, alt, ts = fixes[n][i]
+            icao = f"AC{n:04d}"
+            aircraft.heard(icao, ts.timestamp())
+            aircraft.update_position(icao, lat, lon, alt, ts, 40.0)
+        state["i"] += 1
+        delta = aircraft.changes_since(state["version"])
+        state["version"] = delta.version
+        layers.update_tracks(aircraft, True, delta)
+        layers.take_dirty()
+        list(layers.markers(aircraft, delta.changed))
+    return refresh, 20
+
+
+def setup_adsb_decode():
+    import sdr_adsb
+    # 20 aircraft squittering over a 256 KB read (65 ms at 2 MS/s), about 4x
+    # the frame rate of a busy terminal area
+    fixes = {}
+    for n in range(20):
+        track = sdr_synth.synthetic_aircraft_fixes(4, heading_deg=n * 18, seed=n)
+        fixes["%06X" % (0xA00000 + n)] = [(lat, lon, alt, k * 1.0) for k, (lat, lon, alt, _) in enumerate(track)]
+    frames = [data for _, data in sdr_adsb.synthetic_traffic(fixes, velocity_every=1)]
+    raw = sdr_synth.synthetic_adsb_iq(frames, gap_samples=600, noise=0.05)
+    block = raw[:256 * 1024]
+    import sdr_tracks
+    state = {"aircraft": sdr_tracks.AircraftTable()}
+
+    def decode():
+        decoder = sdr_adsb.ADSBDecoder()
+        tracker = sdr_adsb.ADSBTracker(state["aircraft"], reference=(40.6413, -73.7781))
+        for frame in decoder.process(block):
+            tracker.handle(frame, frame.sample / sdr_adsb.SAMPLE_RATE)
+    return decode, len(block)
+
+
+def setup_replay_session():
+    import tempfile
+    import sdr_adsb
+    import sdr_replay
+    import sdr_tracks
+    # Two minutes of 30 aircraft, replayed as fast as possible into a fresh table
+    path = os.path.join(tempfile.gettempdir(), "sdr_tools_bench.sdrlog")
+    if os.path.exists(path):
+        os.remove(path)
+    sdr_replay.synthetic_session(path, n_aircraft=30, minutes=2)
+    records = list(sdr_replay.read_session(path))
+
+    def replay():
+        tracker = sdr_adsb.ADSBTracker(sdr_tracks.AircraftTable(), reference=(40.6413, -73.7781))
+        for _, batch in sdr_replay.ReplayDriver(records, speed=None, batch_s=1.0).batches():
+            for t, frame in sdr_replay.replay_frames(batch):
+                tracker.handle(frame, t)
+    return replay, len(records)
+
+
+BENCHMARKS = [
+    Benchmark("noaa_process_samples", setup_noaa, calls=200),
+    Benchmark("goes_process_samples", setup_goes, calls=20),
+    Benchmark("display_apt_line", setup_display_apt_line, calls=200, unit="lines"),
+    Benchmark("spectrum_frame", setup_spectrum_frame, calls=200, unit="frames"),
+    Benchmark("ui_dispatch_post", setup_ui_dispatch, calls=3000, unit="updates"),
+    Benchmark("police_audio_play", setup_police_audio, calls=500),
+    Benchmark("fm_audio_play", setup_fm_audio, calls=500),
+    Benchmark("tone_decode", setup_tone_decode, calls=500),
+    Benchmark("scan_tone_identify", setup_scan_tone_identify, calls=20),
+    Benchmark("denoise_chunk", setup_denoise, calls=500),
+    Benchmark("recorder_vox", setup_recorder_vox, calls=500, teardown=teardown_recorder_vox),
+    Benchmark("airband_channels", setup_airband_channels, calls=100, unit="channels"),
+    Benchmark("scan_power_estimate", setup_scan_power, calls=100, unit="bytes"),
+    Benchmark("distscan_window", setup_distscan_window, calls=20, unit="channels"),
+    Benchmark("aircraft_update_position", setup_aircraft_update, calls=2000, unit="fixes"),
+    Benchmark("geo_kinematics", setup_geo_kinematics, calls=200, unit="aircraft"),
+    Benchmark("scope_within", setup_scope_within, calls=200, unit="aircraft"),
+    Benchmark("table_within", setup_table_within, calls=500, unit="aircraft"),
+    Benchmark("track_decimate", setup_track_decimate, calls=50, unit="fixes"),
+    Benchmark("json_load_airports", setup_json_airports, calls=3, rounds=3, unit="files"),
+    Benchmark("json_load_police", setup_json_police, calls=50, rounds=3, unit="files"),
+    Benchmark("freqdb_lookup_cold", setup_freqdb_lookup_cold, calls=50, unit="lookups"),
+    Benchmark("freqdb_lookup_warm", setup_freqdb_lookup_warm, calls=2000, unit="airports"),
+    Benchmark("freq_index_describe", setup_freq_index_describe, calls=5000, rounds=1, unit="lookups"),
+    Benchmark("freq_index_search", setup_freq_index_search, calls=700, rounds=1, unit="queries"),
+    Benchmark("geogrid_nearest", setup_geogrid_nearest, calls=2000, rounds=1, unit="queries"),
+    Benchmark("map_render", setup_map_render, calls=50, unit="aircraft"),
+    Benchmark("map_layered_refresh", setup_map_layered_refresh, calls=500, rounds=1, unit="aircraft"),
+    Benchmark("adsb_decode_block", setup_adsb_decode, calls=50, unit="bytes"),
+    Benchmark("replay_session", setup_replay_session, calls=5, unit="records"),
+]
+
+
+def load_baselines(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def machine_id():
+    return f"{platform.node()} {platform.machine()} py{platform.python_version()}"
+
+
+def compare(results, baselines, threshold):
+    """Return the names of cases whose median latency regressed beyond ``threshold``"""
+    regressions = []
+    if not baselines:
+        return regressions
+    for name, result in results.items():
+        base = baselines.get("cases", {}).get(name)
+        if not base:
+            continue
+        ratio = result["p50_us"] / base["p50_us"] if base["p50_us"] > 0 else 1.0
+        result["vs_baseline"] = ratio
+        if ratio > 1.0 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def print_table(results, skipped):
+    print(f"{'case':<28}{'p50 us':>12}{'p95 us':>12}{'throughput':>18}  {'vs base':>8}")
+    for name, r in results.items():
+        ratio = f"{r['vs_baseline']:.2f}x" if "vs_baseline" in r else "-"
+        print(f"{name:<28}{r['p50_us']:>12.1f}{r['p95_us']:>12.1f}"
+              f"{r['throughput']:>12.3g} {r['unit'] + '/s':<6}{ratio:>8}")
+    for name, reason in skipped.items():
+        print(f"{name:<28}skipped: {reason}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SDR Tools hot path benchmarks")
+    parser.add_argument("-k", dest="select", action="append", default=[],
+                        help="Only run cases whose name contains this substring (repeatable)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed median latency increase before flagging a regression (0.25 = 25%%)")
+    parser.add_argument("--json", dest="json_out", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    skipped = {}
+    for bench in BENCHMARKS:
+        if args.select and not any(s in bench.name for s in args.select):
+            continue
+        try:
+            results[bench.name] = bench.run()
+        except BenchmarkSkipped as e:
+            skipped[bench.name] = str(e)
+
+    baselines = load_baselines(args.baseline)
+    if baselines and baselines.get("machine") != machine_id():
+        print(f"Note: baseline was recorded on '{baselines.get('machine')}'")
+    regressions = compare(results, baselines, args.threshold)
+    print_table(results, skipped)
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"machine": machine_id(), "cases": results, "skipped": skipped}, f, indent=2)
+
+    if args.save_baseline:
+        merged = baselines if baselines and baselines.get("machine") == machine_id() else {"cases": {}}
+        merged["machine"] = machine_id()
+        merged["recorded"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        merged["cases"].update({name: {"p50_us": r["p50_us"], "throughput": r["throughput"]}
+                                for name, r in results.items()})
+        with open(args.baseline, "w") as f:
+            json.dump(merged, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
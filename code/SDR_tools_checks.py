@@ -0,0 +1,160 @@
+"""Headless correctness checks for the SDR Tools decoders.
+
+``SDR_tools_bench.py`` measures how fast the hot paths are; this asserts
+that they still give the right answers, on published ADS-B frames and the
+reproducible synthetic inputs from ``sdr_synth``. No radio, audio device or
+display is needed:
+
+    python code/SDR_tools_checks.py          # run every check
+    python code/SDR_tools_checks.py -k replay
+
+Each check is a function that raises AssertionError on a wrong result. The
+run exits non-zero if any check fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sdr_synth
+
+BLOCK_BYTES = 256 * 1024  # rtl_sdr read size of SDRApp.read_adsb
+
+# Published DF17 frames with known contents: an identification, and an even
+# and odd airborne position pair of one aircraft
+KNOWN_IDENTIFICATION = "8D4840D6202CC371C32CE0576098"  # 4840D6 KLM1023
+KNOWN_EVEN = "8D40621D58C382D690C8AC2863A7"  # 40621D at 38000 ft
+KNOWN_ODD = "8D40621D58C386435CC412692AD6"
+KNOWN_POSITION = (52.25720, 3.91937)
+TONE_RATE = 32000  # Audio rate the DCS waveforms are decoded at
+
+
+def _adsb_traffic():
+    """Mode S frames of two synthetic aircraft near JFK"""
+    import sdr_adsb
+    fixes = {}
+    for n, (lat, lon) in enumerate([(40.70, -73.80), (40.55, -73.60)]):
+        track = sdr_synth.synthetic_aircraft_fixes(6, lat=lat, lon=lon, alt=5000 + 1000 * n, seed=n)
+        fixes["%06X" % (0xA00000 + n)] = [(la, lo, alt, 1000.0 + k) for k, (la, lo, alt, _) in enumerate(track)]
+    return [data for _, data in sdr_adsb.synthetic_traffic(fixes, {icao: "TEST" for icao in fixes})]
+
+
+def _close(actual, expected, tol=1e-4):
+    return actual is not None and all(abs(a - e) < tol for a, e in zip(actual, expected))
+
+
+def check_adsb_known_frames():
+    """CRC-24, ICAO, callsign and CPR global and local decodes of known DF17 frames"""
+    import numpy as np
+    import sdr_adsb
+    frames = [bytes.fromhex(h) for h in (KNOWN_IDENTIFICATION, KNOWN_EVEN, KNOWN_ODD)]
+    assert [sdr_adsb.crc24(data) for data in frames] == [0, 0, 0], "valid frames fail the CRC"
+    rows = np.frombuffer(b"".join(frames), dtype=np.uint8).reshape(len(frames), -1)
+    assert not sdr_adsb.crc24_rows(rows).any(), "crc24_rows disagrees with crc24"
+    flipped = bytearray(frames[0])
+    flipped[6] ^= 0x10
+    assert sdr_adsb.crc24(bytes(flipped)) != 0, "a flipped bit passes the CRC"
+
+    ident, even, odd = (sdr_adsb.decode_frame(data) for data in frames)
+    assert ident == sdr_adsb.Identification("4840D6", "KLM1023"), ident
+    assert (even.icao, even.altitude_ft, even.odd) == ("40621D", 38000, False), even
+    assert (odd.icao, odd.altitude_ft, odd.odd) == ("40621D", 38000, True), odd
+    fix = sdr_adsb.cpr_global((even.lat_cpr, even.lon_cpr), (odd.lat_cpr, odd.lon_cpr), False)
+    assert _close(fix, KNOWN_POSITION), f"global decode {fix}"
+    fix = sdr_adsb.cpr_local(even.lat_cpr, even.lon_cpr, False, 52.258, 3.918)
+    assert _close(fix, KNOWN_POSITION), f"local decode {fix}"
+
+
+def check_dcs_labels():
+    """D023N and D023I decode to their own labels and parse from channel descriptions"""
+    import sdr_tones
+    n = int(1.5 * TONE_RATE)
+    for label, inverted in (("D023N", False), ("D023I", True)):
+        decoder = sdr_tones.ToneDecoder(TONE_RATE)
+        x = sdr_tones.dcs_waveform(label[1:4], TONE_RATE, n, inverted, 0.08)
+        for i in range(0, n, 2048):
+            decoder.process(x[i:i + 2048])
+        assert decoder.code == sdr_tones.canonical_code(label), f"{label} decoded as {decoder.code}"
+        assert sdr_tones.same_code(decoder.code, label), f"{label} decoded as {decoder.code}"
+        assert sdr_tones.parse_code(f"Dispatch (DCS {label[1:]})") == label
+    assert not sdr_tones.same_code("D023N", "D023I"), "normal and inverted D023 compare equal"
+
+
+def check_scan_dwell_tone():
+    """A 0.25 s scan dwell of 170 kHz rtl_fm audio still identifies the tone or code under the voice"""
+    import numpy as np
+    import sdr_tones
+    rate = 170e3
+    n = int(0.25 * rate)
+    voice = np.frombuffer(sdr_synth.synthetic_audio_s16(n, sample_rate=rate, seed=13), dtype=np.int16) / np.float32(32768.0)
+    tone = 0.08 * np.sin(2 * np.pi * 100.0 * np.arange(n) / rate)
+    assert sdr_tones.identify((voice + tone).astype(np.float32), rate) == "100.0 Hz", "100 Hz tone missed"
+    code = sdr_tones.identify(voice + sdr_tones.dcs_waveform("023", rate, n, amplitude=0.08), rate)
+    assert code == "D023N", f"D023N identified as {code}"
+    assert sdr_tones.identify(voice.astype(np.float32), rate) is None, "a tone identified in plain voice"
+
+
+def check_replay_iq_session():
+    """A session recorded with IQ replays each live frame once"""
+    import sdr_adsb
+    import sdr_replay
+    raw = sdr_synth.synthetic_adsb_iq(_adsb_traffic(), seed=1)
+    for record_iq in (False, True):
+        path = os.path.join(tempfile.mkdtemp(prefix="sdr_tools_checks"), "session.sdrlog")
+        recorder = sdr_replay.SessionRecorder(path, record_iq=record_iq)
+        decoder = sdr_adsb.ADSBDecoder()
+        live = 0
+        # As SDRApp.read_adsb records a live receiver
+        for i in range(0, len(raw), BLOCK_BYTES):
+            block = raw[i:i + BLOCK_BYTES]
+            frames = decoder.process(block)
+            live += len(frames)
+            recorder.iq(block, 1000.0 + i / 4e6)
+            recorder.frames(frames, sdr_adsb.frame_times(frames, decoder.samples, 1000.0 + i / 4e6))
+        recorder.close()
+        driver = sdr_replay.ReplayDriver(sdr_replay.read_session(path), speed=None)
+        replayed = sum(len(sdr_replay.replay_frames(batch, sdr_adsb.ADSBDecoder()))
+                       for _, batch in driver.batches())
+        os.remove(path)
+        assert live > 0, "no frames decoded from the synthetic IQ"
+        assert replayed == live, f"record_iq={record_iq}: {live} live frames replayed as {replayed}"
+
+
+CHECKS = [
+    check_adsb_known_frames,
+    check_dcs_labels,
+    check_scan_dwell_tone,
+    check_replay_iq_session,
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SDR Tools decoder correctness checks")
+    parser.add_argument("-k", dest="select", action="append", default=[],
+                        help="Only run checks whose name contains this substring (repeatable)")
+    args = parser.parse_args(argv)
+
+    failed = []
+    for check in CHECKS:
+        name = check.__name__[len("check_"):]
+        if args.select and not any(s in name for s in args.select):
+            continue
+        try:
+            check()
+        except Exception:
+            failed.append(name)
+            print(f"FAIL  {name}")
+            traceback.print_exc(limit=2)
+        else:
+            print(f"ok    {name}")
+    if failed:
+        print(f"{len(failed)} failed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
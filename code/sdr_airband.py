@@ -0,0 +1,367 @@
+"""AM airband reception of every channel of an airport at once.
+
+VHF air traffic control (118-137 MHz) is amplitude modulated, so ``rtl_fm
+-M fm`` on a tower frequency mostly gives noise, and it only hears one
+channel. ``AirbandReceiver`` takes the raw ``rtl_sdr`` IQ of one dongle
+and demodulates every listed channel inside its 2.4 MHz:
+
+- Channelizer: overlap-save fast convolution. Each 8 ms block of IQ, with
+  the previous one, goes through one ``FFT_SIZE`` FFT (62.5 Hz bins). A
+  channel's output is the ``CHANNEL_BINS`` bins around its carrier,
+  weighted by the channel filter's response. A single batched inverse FFT
+  over all channels gives each one decimated straight to 32 kHz. A dozen
+  channels cost little more than one.
+- Channel filters: FIR low-passes for 25 kHz and 8.33 kHz spacing,
+  designed once at the IQ rate. Listed names such as 118.005 are 8.33 kHz
+  channel names and are converted to the real carrier frequency.
+- Envelope detection with a fast AGC: the magnitude is divided by a 20 ms
+  average of itself, which is the carrier level. The audio is the
+  modulation, at the same level however strong the station.
+  Only the magnitude is used, so the phase of the bin shift between blocks
+  needs no correction.
+- Carrier squelch: the strongest bin near the carrier, averaged in dB
+  over a few blocks, against the median bin of the channel, from the same
+  FFT. Averaging dB rather than power lets a strong carrier's level fall
+  away within a few blocks once it is gone. It opens above
+  ``SQUELCH_OPEN_DB``, closes below ``SQUELCH_CLOSE_DB`` after
+  ``SQUELCH_HANG_S``, and fades over one block instead of clicking.
+
+Open channels are summed into one audio stream (or one channel is soloed)
+and the squelch state of each channel is kept for the UI and recorders.
+An airport whose channels span more than one dongle's bandwidth is split
+into windows with ``plan_airport``, one dongle each; ``AirbandMixer``
+sums their audio.
+
+    rtl_sdr -f 119.01e6 -s 2.4e6 - | python code/sdr_airband.py monitor 119.01 118.3 118.975 119.7
+    python code/sdr_airband.py demo --channels 12
+"""
+import argparse
+from collections import deque, namedtuple
+import sys
+import threading
+import time
+
+import numpy as np
+from scipy import signal
+
+from sdr_dsp import AUDIO_RATE
+from sdr_distscan import plan_windows
+
+AIRBAND_LOW_HZ = 118e6
+AIRBAND_HIGH_HZ = 137e6
+SAMPLE_RATE = 2400000
+DECIMATION = SAMPLE_RATE // AUDIO_RATE      # 75
+CHANNEL_BINS = 512                           # Bins per channel; the output block of each inverse FFT
+FFT_SIZE = DECIMATION * CHANNEL_BINS         # 38400: 62.5 Hz bins, 16 ms
+BLOCK = FFT_SIZE // 2                        # New IQ samples per FFT (50% overlap); 8 ms, 256 audio samples
+MAX_FILTER_TAPS = FFT_SIZE - BLOCK + 1       # Longest filter overlap-save handles without wrap-around
+SPACING_25K = 25e3
+SPACING_8K33 = 25e3 / 3
+# (passband edge, stopband edge) of the channel filters, either side of the carrier
+FILTER_EDGES_HZ = {SPACING_25K: (6000.0, 8000.0), SPACING_8K33: (3000.0, 4000.0)}
+CARRIER_SEARCH_HZ = {SPACING_25K: 2500.0, SPACING_8K33: 1000.0}  # Transmitter frequency tolerance
+FILTER_ATTENUATION_DB = 60.0
+CARRIER_S = 0.02             # AGC: time constant of the carrier level the envelope is divided by
+AUDIO_GAIN = 0.8             # Audio level at 100% modulation
+SQUELCH_SMOOTHING_S = 0.03   # Averaging of the carrier bins' level in dB between blocks
+SQUELCH_OPEN_DB = 15.0       # Carrier bin over the channel's median bin; noise alone peaks near 3 dB
+SQUELCH_CLOSE_DB = 10.0
+SQUELCH_CONFIRM = 2          # Blocks above the open level before the squelch opens
+SQUELCH_HANG_S = 0.15        # Carrier below the close level this long before the squelch closes
+MIXER_BACKLOG_S = 0.25       # Audio a secondary receiver may run ahead of the primary one
+
+AirbandChannel = namedtuple("AirbandChannel", "listed_hz carrier_hz spacing_hz label")
+
+_U8_LUT = ((np.arange(256, dtype=np.float32) - 127.5) / 127.5).astype(np.float32)
+
+
+def in_airband(hz):
+    return AIRBAND_LOW_HZ <= hz <= AIRBAND_HIGH_HZ
+
+
+def airband_channel(listed_hz, label=""):
+    """Carrier frequency and spacing of a listed channel
+
+    On the 25 kHz grid it is a 25 kHz channel. 8.33 kHz channels are listed
+    by name: in each 25 kHz block, .x05/.x10/.x15 (and .x30/.x35/.x40, ...)
+    are the carriers 0, 8.33 and 16.67 kHz above the block. Anything else
+    off the grid is taken as a narrow channel at its listed frequency.
+    """
+    khz = round(listed_hz / 1e3, 3)
+    block = np.floor(khz / 25.0) * 25.0
+    rest = round(khz - block, 3)
+    if rest == 0.0:
+        return AirbandChannel(listed_hz, listed_hz, SPACING_25K, label)
+    if rest in (5.0, 10.0, 15.0):
+        return AirbandChannel(listed_hz, (block + (rest - 5.0) / 5.0 * 25.0 / 3.0) * 1e3, SPACING_8K33, label)
+    return AirbandChannel(listed_hz, listed_hz, SPACING_8K33, label)
+
+
+def plan_airport(channels, sample_rate=SAMPLE_RATE):
+    """[(center_hz, [AirbandChannel])] covering ``channels``, as few dongles as possible"""
+    by_carrier = {}
+    for channel in channels:
+        by_carrier.setdefault(int(round(channel.carrier_hz)), channel)
+    return [(window.center_hz, [by_carrier[hz] for hz in window.channels])
+            for window in plan_windows(by_carrier, sample_rate, SPACING_25K)]
+
+
+def channel_filter(spacing_hz, sample_rate=SAMPLE_RATE, fft_size=FFT_SIZE, bins=CHANNEL_BINS):
+    """The channel filter's response on the ``bins`` FFT bins around the carrier, in FFT order"""
+    passband, stopband = FILTER_EDGES_HZ[spacing_hz]
+    numtaps, beta = signal.kaiserord(FILTER_ATTENUATION_DB, (stopband - passband) / (0.5 * sample_rate))
+    numtaps = min(numtaps | 1, MAX_FILTER_TAPS)
+    taps = signal.firwin(numtaps, (passband + stopband) / 2.0, window=("kaiser", beta), fs=sample_rate)
+    response = np.fft.fft(taps, fft_size)
+    index = np.fft.fftfreq(bins, 1.0 / bins).astype(np.int64)  # 0..bins/2-1, then -bins/2..-1
+    # Scaled so the inverse FFT of ``bins`` points gives full-scale output for a full-scale carrier
+    return (response[index] * bins / fft_size).astype(np.complex64)
+
+
+def u8_to_complex(raw):
+    """rtl_sdr bytes as complex64, -1..1"""
+    data = np.frombuffer(raw, dtype=np.uint8, count=len(raw) & ~1)
+    return _U8_LUT[data].view(np.complex64)
+
+
+class AirbandReceiver:
+    """AM demodulation and carrier squelch of every channel in one dongle's window
+
+    ``process(raw)`` takes rtl_sdr bytes of any length and returns the mixed
+    audio completed so far (float32 at 32 kHz). Afterwards ``audio`` holds
+    each channel's audio for the same span and ``squelch`` / ``snr_db``
+    each channel's state. ``stage`` labels its timing metric; metrics have
+    a single writer, so give each receiver thread its own.
+    """
+    def __init__(self, center_hz, channels, sample_rate=SAMPLE_RATE, metrics=None, stage="airband"):
+        if sample_rate != SAMPLE_RATE:
+            raise ValueError(f"the channelizer is built for {SAMPLE_RATE} samples/s")
+        self.center_hz = center_hz
+        self.channels = list(channels)
+        self.solo = None  # listed_hz of the one channel to play, or None for all open channels
+        count = len(self.channels)
+        bin_hz = sample_rate / FFT_SIZE
+        around = np.fft.fftfreq(CHANNEL_BINS, 1.0 / CHANNEL_BINS).astype(np.int64)
+        filters = {spacing: channel_filter(spacing, sample_rate) for spacing in FILTER_EDGES_HZ}
+        self._bins = np.zeros((count, CHANNEL_BINS), dtype=np.int64)
+        self._filters = np.zeros((count, CHANNEL_BINS), dtype=np.complex64)
+        self._search = []  # Bins (within a channel's CHANNEL_BINS) where its carrier may be
+        for i, channel in enumerate(self.channels):
+            offset = channel.carrier_hz - center_hz
+            if abs(offset) > sample_rate / 2 - FILTER_EDGES_HZ[channel.spacing_hz][1]:
+                raise ValueError(f"{channel.listed_hz / 1e6:.3f} MHz is outside the window at {center_hz / 1e6:.3f} MHz")
+            self._bins[i] = (int(round(offset / bin_hz)) + around) % FFT_SIZE
+            self._filters[i] = filters[channel.spacing_hz]
+            self._search.append(np.flatnonzero(np.abs(around) <= CARRIER_SEARCH_HZ[channel.spacing_hz] / bin_hz))
+        self._search_width = max(len(s) for s in self._search)
+        self._search_index = np.array([np.resize(s, self._search_width) for s in self._search], dtype=np.int64)
+        self._carrier_a = np.array([1.0, -np.exp(-1.0 / (CARRIER_S * AUDIO_RATE))], dtype=np.float32)
+        self._carrier_b = np.array([1.0 + self._carrier_a[1]], dtype=np.float32)
+        self._psd_a = np.exp(-BLOCK / (SQUELCH_SMOOTHING_S * sample_rate))
+        self._hang_blocks = max(1, int(round(SQUELCH_HANG_S * AUDIO_RATE / (BLOCK // DECIMATION))))
+        self._ramp = np.linspace(0.0, 1.0, BLOCK // DECIMATION, endpoint=False, dtype=np.float32)
+        self.block_time = metrics.histogram("stage_seconds", stage=stage) if metrics is not None else None
+        self.reset()
+
+    def reset(self):
+        count = len(self.channels)
+        self._pending = np.zeros(FFT_SIZE - BLOCK, dtype=np.complex64)  # The previous block, then new samples
+        self._odd = b""
+        self._carrier_zi = None
+        self._carrier_db = None  # Smoothed level of the bins the carrier is searched in
+        self._gain = np.zeros(count, dtype=np.float32)
+        self._above = np.zeros(count, dtype=np.int64)   # Consecutive blocks above the open level
+        self._below = np.zeros(count, dtype=np.int64)   # Consecutive blocks below the close level
+        self.squelch = np.zeros(count, dtype=bool)
+        self.snr_db = np.zeros(count, dtype=np.float32)
+        self.audio = np.zeros((count, 0), dtype=np.float32)
+
+    def process(self, raw):
+        start = time.perf_counter()
+        raw = self._odd + raw
+        self._odd = raw[len(raw) & ~1:]
+        samples = np.concatenate((self._pending, u8_to_complex(raw)))
+        blocks = (len(samples) - (FFT_SIZE - BLOCK)) // BLOCK
+        if blocks <= 0 or not self.channels:
+            self._pending = samples
+            self.audio = np.zeros((len(self.channels), 0), dtype=np.float32)
+            return np.zeros(0, dtype=np.float32)
+        frames = np.lib.stride_tricks.sliding_window_view(samples, FFT_SIZE)[::BLOCK][:blocks]
+        spectra = np.fft.fft(frames, axis=1)
+        self._pending = samples[blocks * BLOCK:]
+        selected = spectra[:, self._bins]                         # (blocks, channels, CHANNEL_BINS)
+        power = selected.real ** 2 + selected.imag ** 2
+        self._update_squelch(power)
+        selected *= self._filters
+        baseband = np.fft.ifft(selected, axis=2)[:, :, CHANNEL_BINS // 2:]  # Overlap-save: keep the valid half
+        envelope = np.abs(baseband).transpose(1, 0, 2).reshape(len(self.channels), -1).astype(np.float32)
+        if self._carrier_zi is None:
+            self._carrier_zi = (envelope[:, :1] * -self._carrier_a[1]).astype(np.float32)
+        carrier, self._carrier_zi = signal.lfilter(self._carrier_b, self._carrier_a, envelope, axis=1,
+                                                   zi=self._carrier_zi)
+        audio = envelope / np.maximum(carrier, 1e-6)
+        audio -= 1.0
+        audio *= AUDIO_GAIN * self._gains
+        np.clip(audio, -1.0, 1.0, out=audio)
+        self.audio = audio
+        if self.solo is not None:
+            mix = np.zeros(audio.shape[1], dtype=np.float32)
+            for i, channel in enumerate(self.channels):
+                if channel.listed_hz == self.solo:
+                    mix += audio[i]
+        else:
+            mix = audio.sum(axis=0)
+            np.clip(mix, -1.0, 1.0, out=mix)
+        if self.block_time is not None:
+            self.block_time.observe(time.perf_counter() - start)
+        return mix
+
+    def _update_squelch(self, power):
+        """Per-block squelch decisions and the (channels, samples) gain ramps that apply them"""
+        blocks = len(power)
+        floor_db = 10.0 * np.log10(np.maximum(np.median(power, axis=2), 1e-20))
+        search = np.take_along_axis(power, np.broadcast_to(self._search_index, power.shape[:2] + (self._search_width,)),
+                                    axis=2)
+        search_db = 10.0 * np.log10(np.maximum(search, 1e-20))
+        if self._carrier_db is None:
+            self._carrier_db = search_db[0].copy()
+        snr = np.empty_like(floor_db)
+        hop = len(self._ramp)
+        gains = np.empty((len(self.channels), blocks * hop), dtype=np.float32)
+        for b in range(blocks):
+            self._carrier_db *= self._psd_a
+            self._carrier_db += (1.0 - self._psd_a) * search_db[b]
+            snr[b] = self._carrier_db.max(axis=1) - floor_db[b]
+        for b in range(blocks):
+            above = snr[b] >= SQUELCH_OPEN_DB
+            below = snr[b] < SQUELCH_CLOSE_DB
+            self._above = np.where(above, self._above + 1, 0)
+            self._below = np.where(below, self._below + 1, 0)
+            self.squelch = np.where(self.squelch, self._below < self._hang_blocks, self._above >= SQUELCH_CONFIRM)
+            target = self.squelch.astype(np.float32)
+            # Fade from the last block's gain to this one's over the block
+            gains[:, b * hop:(b + 1) * hop] = self._gain[:, None] + (target - self._gain)[:, None] * self._ramp
+            self._gain = target
+        self.snr_db = snr[-1].astype(np.float32)
+        self._gains = gains
+
+    def open_channels(self):
+        return [channel for channel, open_ in zip(self.channels, self.squelch) if open_]
+
+
+class AirbandMixer:
+    """Sums the audio of several receivers, one per dongle; receiver 0 paces the output
+
+    Secondary receivers' audio waits in a short backlog and is added to the
+    primary's as it arrives. Their clocks are not locked together, so
+    anything more than ``MIXER_BACKLOG_S`` ahead is dropped.
+    """
+    def __init__(self, count):
+        self._backlogs = [deque() for _ in range(count)]
+        self._sizes = [0] * count
+        self._limit = int(MIXER_BACKLOG_S * AUDIO_RATE)
+        self._lock = threading.Lock()
+
+    def add(self, index, audio):
+        """Audio from receiver ``index``; returns the mix to play when ``index`` is 0, else None"""
+        with self._lock:
+            if index != 0:
+                backlog = self._backlogs[index]
+                backlog.append(audio)
+                self._sizes[index] += len(audio)
+                while self._sizes[index] > self._limit:
+                    self._sizes[index] -= len(backlog.popleft())
+                return None
+            mix = audio.copy()
+            for i in range(1, len(self._backlogs)):
+                filled = 0
+                backlog = self._backlogs[i]
+                while backlog and filled < len(mix):
+                    chunk = backlog.popleft()
+                    take = min(len(chunk), len(mix) - filled)
+                    mix[filled:filled + take] += chunk[:take]
+                    if take < len(chunk):
+                        backlog.appendleft(chunk[take:])
+                    filled += take
+                    self._sizes[i] -= take
+            np.clip(mix, -1.0, 1.0, out=mix)
+            return mix
+
+
+def to_s16(audio):
+    return (np.clip(audio, -1.0, 32767.0 / 32768.0) * 32768.0).astype(np.int16).tobytes()
+
+
+def parse_channels(values):
+    return [airband_channel(float(value) * 1e6) for value in values]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AM airband demodulation of several channels from one dongle")
+    sub = parser.add_subparsers(dest="command", required=True)
+    monitor = sub.add_parser("monitor", help="Demodulate rtl_sdr -s 2.4e6 IQ from stdin and print squelch changes")
+    monitor.add_argument("center", type=float, help="Tuned frequency in MHz")
+    monitor.add_argument("channels", nargs="+", help="Listed channel frequencies in MHz")
+    monitor.add_argument("--wav", help="Also write the mixed audio to this WAV file")
+    demo = sub.add_parser("demo", help="Run synthetic AM channels through the receiver and report the cost")
+    demo.add_argument("--channels", type=int, default=12)
+    demo.add_argument("--seconds", type=float, default=4.0)
+    args = parser.parse_args(argv)
+
+    if args.command == "demo":
+        import sdr_synth
+        center = 119.5e6
+        channels = [airband_channel(center + (i - args.channels // 2) * 75e3 + 25e3) for i in range(args.channels)]
+        keyed = [(ch.carrier_hz - center, 0.05, 500.0 + 60.0 * i, (0.5 + 0.2 * i, 2.0 + 0.2 * i) if i % 2 else None)
+                 for i, ch in enumerate(channels)]
+        raw = sdr_synth.synthetic_airband_iq(int(args.seconds * SAMPLE_RATE), SAMPLE_RATE, keyed)
+        receiver = AirbandReceiver(center, channels)
+        chunk = 2 * 4 * BLOCK
+        start = time.perf_counter()
+        opened = np.zeros(len(channels), dtype=np.int64)
+        for i in range(0, len(raw), chunk):
+            receiver.process(raw[i:i + chunk])
+            opened += receiver.squelch
+        elapsed = time.perf_counter() - start
+        for channel, blocks in zip(channels, opened):
+            print(f"{channel.carrier_hz / 1e6:9.4f} MHz  open {blocks * 4 * BLOCK / SAMPLE_RATE:4.1f} s")
+        print(f"{len(channels)} channels: {elapsed:.2f} s for {args.seconds:.1f} s of IQ "
+              f"({100.0 * elapsed / args.seconds:.0f}% of real time)")
+        return 0
+
+    channels = parse_channels(args.channels)
+    receiver = AirbandReceiver(args.center * 1e6, channels)
+    out = None
+    if args.wav:
+        import wave
+        out = wave.open(args.wav, "wb")
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(AUDIO_RATE)
+    was_open = receiver.squelch.copy()
+    samples = 0
+    try:
+        while True:
+            raw = sys.stdin.buffer.read(2 * 4 * BLOCK)
+            if not raw:
+                break
+            mix = receiver.process(raw)
+            samples += len(mix)
+            if out is not None:
+                out.writeframes(to_s16(mix))
+            for channel, now, before, snr in zip(channels, receiver.squelch, was_open, receiver.snr_db):
+                if now != before:
+                    state = "open" if now else "closed"
+                    print(f"{samples / AUDIO_RATE:8.2f} s  {channel.listed_hz / 1e6:8.3f} MHz  {state}  ({snr:.0f} dB)",
+                          flush=True)
+            was_open = receiver.squelch.copy()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if out is not None:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
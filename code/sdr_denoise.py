@@ -0,0 +1,155 @@
+"""Streaming spectral noise reduction for voice channels.
+
+The noise gate only decides between on and off, so it cuts the ends of
+quiet syllables and lets the hiss through while someone is talking.
+``SpectralDenoiser`` attenuates the noise bin by bin instead:
+
+- The audio is cut into 512-sample frames (16 ms at 32 kHz) with 50%
+  overlap, windowed with a square-root Hann window and transformed. Every
+  complete frame in a chunk is handled in one ``rfft``/``irfft`` call on a
+  2-D array, and the frame, spectrum and gain buffers are reused.
+- The noise power in each bin is learned while the squelch is closed (the
+  carrier is present but nobody is talking). When there is no squelch to
+  ask, or while it is open, the estimate follows the minimum of the
+  smoothed spectrum and may rise by only ``NOISE_RISE_DB_S``, so speech
+  does not get learned as noise.
+- Each bin gets a Wiener gain from a decision-directed a priori SNR
+  (Ephraim-Malah), or plain power spectral subtraction. The gain never
+  drops below ``GAIN_FLOOR_DB``; a deeper floor leaves "musical noise".
+- The same square-root Hann window is applied again after the inverse
+  transform. At 50% overlap the two windows sum to one, so with unit gain
+  the output is the input delayed.
+
+The algorithmic latency is one frame, 16 ms. Each chunk returns the
+samples completed so far, so the output of a call can be up to half a
+frame shorter or longer than its input.
+"""
+from math import exp
+
+import numpy as np
+
+from sdr_dsp import AUDIO_RATE
+
+FRAME = 512                  # 16 ms at 32 kHz: 62.5 Hz bins; also the latency
+PSD_SMOOTHING_S = 0.03       # Smoothing of the frame spectrum that the noise minimum follows
+NOISE_SMOOTHING_S = 0.1      # Noise average time constant while the squelch is closed
+NOISE_RISE_DB_S = 3.0        # Fastest rise of the minimum-tracked noise floor
+STARTUP_S = 0.5              # After a reset the floor may rise 10x faster, to find the noise quickly
+MINIMUM_BIAS = 1.5           # Mean noise power over the tracked minimum of its smoothed spectrum
+DD_ALPHA = 0.98              # Weight of the previous frame in the a priori SNR
+GAIN_FLOOR_DB = -18.0
+OVERSUBTRACTION = 2.0        # Noise multiple removed by spectral subtraction
+METHODS = ("wiener", "subtract")
+EPS = 1e-12
+
+
+class SpectralDenoiser:
+    """STFT overlap-add noise suppressor; a stage for an sdr_dsp AudioChain
+
+    ``squelch_closed()``, if given, is asked once per chunk: True means the
+    chunk is noise only, False or None that it may contain speech.
+    """
+    def __init__(self, rate=AUDIO_RATE, frame=FRAME, method="wiener", floor_db=GAIN_FLOOR_DB,
+                 squelch_closed=None):
+        if frame % 2:
+            raise ValueError("frame must be even")
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {', '.join(METHODS)}")
+        self.rate = rate
+        self.frame = frame
+        self.hop = frame // 2
+        self.method = method
+        self.squelch_closed = squelch_closed
+        self.enabled = True
+        self.floor = 10.0 ** (floor_db / 20.0)
+        # Periodic Hann, so overlapping squared windows sum to exactly one
+        self.window = np.sqrt(0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(frame) / frame)).astype(np.float32)
+        frame_rate = rate / self.hop
+        self._psd_a = exp(-1.0 / (PSD_SMOOTHING_S * frame_rate))
+        self._noise_a = exp(-1.0 / (NOISE_SMOOTHING_S * frame_rate))
+        self._rise = 10.0 ** (NOISE_RISE_DB_S / 10.0 / frame_rate)
+        self._startup_rise = 10.0 ** (10.0 * NOISE_RISE_DB_S / 10.0 / frame_rate)
+        self._startup = int(STARTUP_S * frame_rate)
+        self._rows = 0
+        self._buffers(8)
+        self.reset()
+
+    @property
+    def latency_s(self):
+        return self.frame / self.rate
+
+    def reset(self):
+        self._history = np.zeros(self.frame - self.hop, dtype=np.float32)
+        self._tail = np.zeros(self.hop, dtype=np.float32)
+        self.noise = None   # Per-bin noise power
+        self._psd = None
+        self._clean = None  # Previous frame's estimated clean power, for the decision-directed SNR
+        self._seen = 0      # Frames since the reset
+
+    def _buffers(self, n):
+        if n > self._rows:
+            bins = self.frame // 2 + 1
+            self._frames = np.zeros((n, self.frame), dtype=np.float32)
+            self._spec = np.zeros((n, bins), dtype=np.complex64)
+            self._power = np.zeros((n, bins), dtype=np.float32)
+            self._gain = np.zeros((n, bins), dtype=np.float32)
+            self._time = np.zeros((n, self.frame), dtype=np.float32)
+            self._rows = n
+
+    def process(self, x):
+        if not self.enabled:
+            return x
+        buf = np.concatenate((self._history, x))
+        n = (len(buf) - self.frame) // self.hop + 1 if len(buf) >= self.frame else 0
+        if n <= 0:
+            self._history = buf
+            return x[:0]
+        self._buffers(n)
+        frames = self._frames[:n]
+        windows = np.lib.stride_tricks.sliding_window_view(buf, self.frame)[::self.hop][:n]
+        np.multiply(windows, self.window, out=frames)
+        spec = np.fft.rfft(frames, axis=1, out=self._spec[:n])
+        power = np.abs(spec, out=self._power[:n])
+        np.square(power, out=power)
+        closed = self.squelch_closed() if self.squelch_closed is not None else None
+        gain = self._gains(power, closed)
+        spec *= gain
+        out = np.fft.irfft(spec, n=self.frame, axis=1, out=self._time[:n])
+        out *= self.window
+        # 50% overlap: each hop is the first half of a frame plus the second half of the one before
+        y = out[:, :self.hop].copy()
+        y[0] += self._tail
+        y[1:] += out[:-1, self.hop:]
+        self._tail[:] = out[-1, self.hop:]
+        self._history = buf[n * self.hop:].copy()
+        return y.ravel()
+
+    def _gains(self, power, closed):
+        n = len(power)
+        gains = self._gain[:n]
+        if self.noise is None:
+            self.noise = power[0].copy()
+            self._psd = power[0].copy()
+            self._clean = np.zeros_like(self.noise)
+        noise, psd = self.noise, self._psd
+        for i in range(n):
+            p = power[i]
+            psd *= self._psd_a
+            psd += (1.0 - self._psd_a) * p
+            if closed:
+                noise *= self._noise_a
+                noise += (1.0 - self._noise_a) * p
+            else:
+                rise = self._rise if self._seen >= self._startup else self._startup_rise
+                np.minimum(psd * MINIMUM_BIAS, noise * rise, out=noise)
+            self._seen += 1
+            g = gains[i]
+            if self.method == "wiener":
+                gamma = p / (noise + EPS)
+                xi = DD_ALPHA * self._clean / (noise + EPS) + (1.0 - DD_ALPHA) * np.maximum(gamma - 1.0, 0.0)
+                np.divide(xi, 1.0 + xi, out=g)
+                np.maximum(g, self.floor, out=g)
+                np.multiply(g * g, p, out=self._clean)
+            else:
+                np.sqrt(np.maximum(1.0 - OVERSUBTRACTION * noise / (p + EPS), self.floor * self.floor), out=g)
+        return gains
@@ -0,0 +1,336 @@
+"""RTL-SDR dongle enumeration and leasing, so pipelines can run side by side.
+
+Each pipeline (satellite/FM reception, police or airport audio, the police
+scan, ADS-B) asks ``DeviceManager.acquire`` for a dongle before starting its
+``rtl_*`` process and gives it back with ``release`` when it stops. A dongle
+is leased to one pipeline at a time. A pipeline can be pinned to a dongle
+by index or serial number; otherwise it gets the lowest free dongle that is
+not pinned to some other pipeline. ``DeviceLease.command`` adds the
+``-d <index>`` that makes the rtl tool open that dongle.
+
+Dongles are listed with ``rtl_test -t`` the first time they are needed. If
+that finds nothing (rtl_test missing, or an older librtlsdr that prints
+differently) a single dongle 0 is assumed, which is how the app behaved
+before it knew about more than one.
+
+Fake dongles run this file as a stand-in for ``rtl_fm``/``rtl_sdr``. It
+writes synthetic audio or IQ from ``sdr_synth`` at the real rate, with
+ADS-B traffic when tuned to 1090 MHz. The whole app (supervisor, readers,
+decoders, leases) can then be exercised without hardware:
+
+    python code/SDR_tools.py --fake-devices 2
+    python code/sdr_devices.py list
+    python code/sdr_devices.py fake -- rtl_sdr -f 137.5e6 -s 2.4e6 -n 2400000 - > pass.iq
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+ENUMERATE_TIMEOUT_S = 5.0
+# "  0:  Realtek, RTL2838UHIDIR, SN: 00000001" in rtl_test's device list
+DEVICE_LINE = re.compile(r"^\s*(\d+):\s+(.*?),\s+(.*?),\s+SN:\s*(\S*)\s*$")
+
+FAKE_BLOCK_S = 0.1        # Fake output is written in blocks of this many seconds
+FAKE_LOOP_S = 1.0         # Length of the pre-generated signal the fakes repeat
+FAKE_ADSB_AIRCRAFT = 5
+FAKE_ADSB_TRACK_S = 120   # Synthetic traffic loops after this many seconds
+
+
+class DeviceBusy(RuntimeError):
+    """No dongle matching the request is free"""
+
+
+class RTLDevice:
+    """One attached (or fake) RTL-SDR dongle"""
+    def __init__(self, index, serial="", name="RTL-SDR", fake=False):
+        self.index = index
+        self.serial = serial
+        self.name = name
+        self.fake = fake
+
+    def __repr__(self):
+        return f"RTLDevice({self.index}, {self.serial!r}, {self.name!r}{', fake=True' if self.fake else ''})"
+
+    @property
+    def label(self):
+        return f"dongle {self.index} SN {self.serial}" if self.serial else f"dongle {self.index}"
+
+    def matches(self, selector):
+        """True if ``selector`` (an index, or a serial number) names this dongle"""
+        if isinstance(selector, int) or str(selector).isdigit():
+            return int(selector) == self.index
+        return str(selector) == self.serial
+
+    def command(self, cmd):
+        """``cmd`` (an rtl_* argv) made to run on this dongle"""
+        if self.fake:
+            return [sys.executable, os.path.abspath(__file__), "fake", "--device", str(self.index), "--"] + list(cmd)
+        return [cmd[0], "-d", str(self.index)] + list(cmd[1:])
+
+
+def parse_rtl_test(output):
+    """Dongles listed in rtl_test's output"""
+    devices = []
+    for line in output.splitlines():
+        match = DEVICE_LINE.match(line)
+        if match:
+            index, vendor, product, serial = match.groups()
+            devices.append(RTLDevice(int(index), serial, f"{vendor} {product}"))
+    return devices
+
+
+def enumerate_devices(run=subprocess.run):
+    """Attached dongles according to ``rtl_test -t``; [] if it is missing or lists none"""
+    try:
+        result = run(["rtl_test", "-t"], capture_output=True, timeout=ENUMERATE_TIMEOUT_S)
+        output = result.stderr + result.stdout
+    except subprocess.TimeoutExpired as e:
+        # The list is printed first; a hung tuner test does not lose it
+        output = (e.stderr or b"") + (e.stdout or b"")
+    except OSError:
+        return []
+    if isinstance(output, bytes):
+        output = output.decode("utf-8", "replace")
+    return parse_rtl_test(output)
+
+
+def fake_devices(count):
+    """``count`` synthetic dongles"""
+    return [RTLDevice(i, f"FAKE{i:04d}", "Synthetic RTL2832U", fake=True) for i in range(count)]
+
+
+class DeviceLease:
+    """Exclusive use of one dongle by one pipeline until released"""
+    def __init__(self, manager, pipeline, device):
+        self.manager = manager
+        self.pipeline = pipeline
+        self.device = device
+
+    def command(self, cmd):
+        return self.device.command(cmd)
+
+    def release(self):
+        self.manager.release(self.pipeline, self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class DeviceManager:
+    """Leases dongles to pipelines, one pipeline per dongle
+
+    ``devices`` fixes the dongle list (e.g. ``fake_devices(2)``); without it
+    the list comes from ``enumerate`` on first use. ``preferences`` pins
+    pipelines to dongles: {pipeline: index or serial}.
+    """
+    def __init__(self, devices=None, preferences=None, enumerate=enumerate_devices):
+        self._devices = list(devices) if devices is not None else None
+        self.preferences = dict(preferences or {})
+        self._enumerate = enumerate
+        self._lock = threading.Lock()
+        self._leases = {}  # pipeline -> DeviceLease
+
+    def _ensure_devices(self):
+        # Caller holds the lock
+        if self._devices is None:
+            self._devices = self._enumerate() or [RTLDevice(0, name="RTL-SDR (not enumerated)")]
+        return self._devices
+
+    def devices(self):
+        with self._lock:
+            return list(self._ensure_devices())
+
+    def refresh(self):
+        """List the dongles again, e.g. after one is plugged in; leases are kept"""
+        devices = self._enumerate()
+        with self._lock:
+            if devices or self._devices is None:
+                self._devices = devices or [RTLDevice(0, name="RTL-SDR (not enumerated)")]
+            return list(self._devices)
+
+    def owner(self, device):
+        """Pipeline leasing ``device`` (an RTLDevice or index), or None"""
+        index = device.index if isinstance(device, RTLDevice) else int(device)
+        with self._lock:
+            for pipeline, lease in self._leases.items():
+                if lease.device.index == index:
+                    return pipeline
+        return None
+
+    def leases(self):
+        """{pipeline: RTLDevice} for every current lease"""
+        with self._lock:
+            return {pipeline: lease.device for pipeline, lease in self._leases.items()}
+
+    def acquire(self, pipeline, selector=None):
+        """Lease a dongle to ``pipeline``; raises DeviceBusy if none is free
+
+        ``selector`` (index or serial) overrides the pipeline's preference.
+        A pipeline that already holds a lease gets the same one back.
+        """
+        with self._lock:
+            held = self._leases.get(pipeline)
+            if held is not None:
+                return held
+            devices = self._ensure_devices()
+            if selector is None:
+                selector = self.preferences.get(pipeline)
+            busy = {lease.device.index: name for name, lease in self._leases.items()}
+            if selector is not None:
+                candidates = [d for d in devices if d.matches(selector)]
+                if not candidates:
+                    raise DeviceBusy(f"No RTL-SDR dongle matches {selector!r}")
+            else:
+                # Leave dongles pinned to other pipelines for them when there is a choice
+                pinned = [d for d in devices
+                          if any(d.matches(sel) for name, sel in self.preferences.items() if name != pipeline)]
+                candidates = [d for d in devices if d not in pinned] + pinned
+            for device in candidates:
+                if device.index not in busy:
+                    lease = DeviceLease(self, pipeline, device)
+                    self._leases[pipeline] = lease
+                    return lease
+            owners = ", ".join(f"{d.label} by {busy[d.index]}" for d in candidates)
+            raise DeviceBusy(f"No free RTL-SDR dongle for {pipeline}: in use {owners}")
+
+    def release(self, pipeline, lease=None):
+        """End ``pipeline``'s lease (only if it is still ``lease``, when given); True if one ended"""
+        with self._lock:
+            held = self._leases.get(pipeline)
+            if held is None or (lease is not None and held is not lease):
+                return False
+            del self._leases[pipeline]
+            return True
+
+
+def _parse_rtl_args(cmd):
+    """(tool, {flag: value}) for an rtl_fm/rtl_sdr argv; the output file is ignored"""
+    tool = os.path.basename(cmd[0])
+    options = {}
+    args = list(cmd[1:])
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.startswith("-") and len(arg) == 2 and i + 1 < len(args):
+            options[arg] = args[i + 1]
+            i += 2
+        else:
+            i += 1
+    return tool, options
+
+
+def _parse_hz(value, default):
+    """rtl-style number with an optional k/M/G suffix, e.g. 170k or 2.4e6"""
+    if value is None:
+        return default
+    scale = {"k": 1e3, "K": 1e3, "M": 1e6, "G": 1e9}.get(value[-1:])
+    return float(value[:-1]) * scale if scale else float(value)
+
+
+def _fake_blocks(tool, options, device_index):
+    """Endless (bytes, seconds) blocks of what ``tool`` would write for these options"""
+    import sdr_synth
+    freq = _parse_hz(options.get("-f"), 100e6)
+    if tool == "rtl_fm":
+        rate = int(_parse_hz(options.get("-r"), _parse_hz(options.get("-s"), 24000)))
+        audio = sdr_synth.synthetic_audio_s16(int(rate * FAKE_LOOP_S), rate,
+                                              tone_hz=400.0 + 200.0 * device_index, seed=device_index)
+        block = int(rate * FAKE_BLOCK_S) * 2
+        while True:
+            for start in range(0, len(audio) - block + 1, block):
+                yield audio[start:start + block], FAKE_BLOCK_S
+
+    rate = int(_parse_hz(options.get("-s"), 2.048e6))
+    if abs(freq - 1090e6) < 1e6:
+        yield from _fake_adsb_blocks(rate)
+        return
+    iq = sdr_synth.synthetic_iq_u8(int(rate * FAKE_LOOP_S), rate, carriers=((10e3 * (device_index + 1), 0.3),),
+                                   seed=device_index)
+    block = int(rate * FAKE_BLOCK_S) * 2
+    while True:
+        for start in range(0, len(iq) - block + 1, block):
+            yield iq[start:start + block], FAKE_BLOCK_S
+
+
+def _fake_adsb_blocks(rate):
+    """One second of IQ at a time carrying that second's synthetic traffic near JFK"""
+    import sdr_adsb
+    import sdr_synth
+    fixes = {}
+    for n in range(FAKE_ADSB_AIRCRAFT):
+        track = sdr_synth.synthetic_aircraft_fixes(FAKE_ADSB_TRACK_S, heading_deg=n * 72, seed=n)
+        fixes["%06X" % (0xF00000 + n)] = [(lat, lon, alt, k * 1.0) for k, (lat, lon, alt, _) in enumerate(track)]
+    frames = sdr_adsb.synthetic_traffic(fixes, {icao: f"FAKE{n}" for n, icao in enumerate(fixes)})
+    noise = sdr_synth.synthetic_iq_u8(rate, rate, carriers=(), noise=0.03)
+    while True:
+        for second in range(FAKE_ADSB_TRACK_S):
+            burst = sdr_synth.synthetic_adsb_iq([data for t, data in frames if second <= t < second + 1],
+                                                seed=second)
+            yield burst[:len(noise)] + noise[len(burst):], 1.0
+
+
+def run_fake(cmd, device_index=0, out=None, clock=time.monotonic, sleep=time.sleep):
+    """Behave like ``cmd`` (rtl_fm or rtl_sdr) on a fake dongle, writing to ``out`` at the real rate"""
+    out = out or sys.stdout.buffer
+    tool, options = _parse_rtl_args(cmd)
+    if tool not in ("rtl_fm", "rtl_sdr"):
+        print(f"Fake dongles only emulate rtl_fm and rtl_sdr, not {tool}", file=sys.stderr)
+        return 1
+    print(f"Found 1 device(s):\n  {device_index}:  Synthetic, RTL2832U, SN: FAKE{device_index:04d}\n\n"
+          f"Using device {device_index}: Synthetic RTL2832U\nTuned to {options.get('-f', '?')} Hz.",
+          file=sys.stderr, flush=True)
+    # rtl_sdr -n counts IQ samples, two bytes each; 0 or absent means run until killed
+    count = int(float(options.get("-n", 0))) if tool == "rtl_sdr" else 0
+    remaining = 2 * count if count else None
+    start = clock()
+    elapsed = 0.0
+    try:
+        for data, seconds in _fake_blocks(tool, options, device_index):
+            if remaining is not None:
+                data = data[:remaining]
+                remaining -= len(data)
+            out.write(data)
+            out.flush()
+            if remaining == 0:
+                break
+            elapsed += seconds
+            delay = start + elapsed - clock()
+            if delay > 0:
+                sleep(delay)
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass  # The reader went away, as it does when a pipeline stops
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List RTL-SDR dongles or emulate one with synthetic signals")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List attached dongles (rtl_test -t)")
+    fake = sub.add_parser("fake", help="Run an rtl_fm/rtl_sdr command line against a synthetic dongle")
+    fake.add_argument("--device", type=int, default=0)
+    fake.add_argument("cmd", nargs=argparse.REMAINDER, help="-- rtl_fm|rtl_sdr [options] -")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        devices = enumerate_devices()
+        if not devices:
+            print("No RTL-SDR dongles found (is rtl_test installed?)")
+        for device in devices:
+            print(f"{device.index}: {device.name}, SN: {device.serial}")
+        return 0
+
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    if not cmd:
+        parser.error("fake needs an rtl_fm or rtl_sdr command line")
+    return run_fake(cmd, args.device)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Incremental, frame-rate-capped display of growing satellite images.
+
+The APT decoder hands the display a taller copy of the same image for every
+line it decodes. Resizing the whole image each time costs more on every
+line of a pass. ``ScaledBackBuffer`` instead keeps a display-sized copy and
+resamples only the rows that arrived since the last update into it, using
+``Image.resize(box=...)`` so the result matches a full resize.
+
+The scale only changes when the image outgrows the canvas. At that point
+the buffer is rebuilt for ``HEADROOM`` times the current height, so
+rebuilds get rarer as the pass goes on and the cost per line stays flat.
+
+``ScaledImageView`` shows the buffer in one persistent canvas image,
+pasted in place, and ``FrameLimiter`` caps how often that happens.
+"""
+import math
+import time
+
+from PIL import Image, ImageTk
+
+DEFAULT_FPS = 10.0
+
+
+class ScaledBackBuffer:
+    """Display-sized copy of an image that grows downwards, kept current by resampling new rows"""
+    HEADROOM = 1.25   # Room left for growth when the scale has to change
+    EDGE_ROWS = 3     # Destination rows at the bottom edge redone once the rows below them exist
+
+    def __init__(self, resample=Image.Resampling.LANCZOS):
+        self.resample = resample
+        self.buffer = None
+        self.rebuilds = 0
+        self.rows_resampled = 0
+        self._key = None  # (mode, source width, target width, target height)
+        self._scale = 1.0
+        self._planned_height = 0
+        self._source_height = 0
+        self._rows_done = 0
+
+    def reset(self):
+        self.buffer = None
+        self._key = None
+        self._source_height = 0
+        self._rows_done = 0
+
+    def _rebuild(self, image, width, height):
+        src_w, src_h = image.size
+        planned = max(src_h, int(math.ceil(src_h * self.HEADROOM)))
+        self._scale = min(width / src_w, height / planned)
+        # Planned height in source rows that fits the canvas at this scale
+        self._planned_height = max(planned, int(height / self._scale))
+        size = (max(1, round(src_w * self._scale)), max(1, min(height, round(self._planned_height * self._scale))))
+        self.buffer = Image.new(image.mode, size)
+        self._key = (image.mode, src_w, width, height)
+        self._source_height = 0
+        self._rows_done = 0
+        self.rebuilds += 1
+
+    def _resample(self, image, d0, d1):
+        """Resample the source rows behind destination rows [d0, d1) into the buffer"""
+        d1 = min(d1, self.buffer.height)
+        if d1 <= d0:
+            return
+        box = (0, d0 / self._scale, image.width, min(image.height, d1 / self._scale))
+        band = image.resize((self.buffer.width, d1 - d0), self.resample, box=box)
+        self.buffer.paste(band, (0, d0))
+        self.rows_resampled += d1 - d0
+
+    def update(self, image, width, height, refresh_rows=0):
+        """Bring the buffer up to date with ``image`` for a ``width`` x ``height`` target
+
+        Rows added since the last update are resampled, plus the top
+        ``refresh_rows`` source rows, for decoders that redraw a label
+        there or replace the whole image. Returns True if the buffer was
+        rebuilt (new size), False if it was updated in place.
+        """
+        src_w, src_h = image.size
+        rebuilt = False
+        if (self._key != (image.mode, src_w, width, height) or src_h < self._source_height or
+                src_h > self._planned_height):
+            self._rebuild(image, width, height)
+            rebuilt = True
+        scale = self._scale
+        done = min(self.buffer.height, int(src_h * scale))
+        if refresh_rows and self._rows_done:
+            self._resample(image, 0, min(self._rows_done, int(math.ceil(refresh_rows * scale)) + self.EDGE_ROWS))
+        self._resample(image, max(0, self._rows_done - self.EDGE_ROWS), done)
+        self._rows_done = done
+        self._source_height = src_h
+        return rebuilt
+
+
+class FrameLimiter:
+    """Allows at most ``fps`` redraws a second and counts the frames it drops"""
+    def __init__(self, fps=DEFAULT_FPS, clock=time.monotonic):
+        self.interval = 1.0 / fps
+        self.clock = clock
+        self._last = -math.inf
+        self.drawn = 0
+        self.skipped = 0
+
+    def due(self):
+        """Seconds until the next redraw is allowed, 0 if it is allowed now"""
+        return max(0.0, self._last + self.interval - self.clock())
+
+    def drawn_now(self):
+        self._last = self.clock()
+        self.drawn += 1
+
+    def skip(self):
+        """Count a frame replaced by a newer one before it was drawn"""
+        self.skipped += 1
+
+
+class ScaledImageView:
+    """Shows a growing image centred on a Tk canvas through a ScaledBackBuffer
+
+    The canvas keeps one image item and one caption item. A frame pastes
+    the buffer into the existing PhotoImage; only a rebuilt buffer (new
+    pass, resize, rescale) creates a new PhotoImage.
+    """
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.backbuffer = ScaledBackBuffer()
+        self._photo = None
+        self._image_item = None
+        self._text_item = None
+
+    def reset(self):
+        """Forget the current image, e.g. at the start of a pass; the canvas was cleared by the caller"""
+        self.backbuffer.reset()
+        self._photo = None
+        self._image_item = None
+        self._text_item = None
+
+    def show(self, image, caption="", refresh_rows=0):
+        """Draw ``image``; returns False if the canvas is not laid out yet"""
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return False
+        rebuilt = self.backbuffer.update(image, width, height, refresh_rows)
+        buffer = self.backbuffer.buffer
+        if rebuilt or self._photo is None or self.canvas.type(self._image_item) is None:
+            self._photo = ImageTk.PhotoImage(buffer)
+            self.canvas.delete("all")
+            self._image_item = self.canvas.create_image(width // 2, height // 2, image=self._photo,
+                                                        anchor="center")
+            self._text_item = self.canvas.create_text(width // 2, 20, text=caption, fill="yellow",
+                                                      font=('Helvetica', 12), tags="progress")
+        else:
+            self._photo.paste(buffer)
+            self.canvas.itemconfig(self._text_item, text=caption)
+        return True
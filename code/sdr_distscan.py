@@ -0,0 +1,660 @@
+"""Distributed channel scanning across rtl_tcp nodes.
+
+The sequential scan retunes one ``rtl_fm`` per channel and listens for the
+dwell time, so a 20 MHz police band at 12.5 kHz steps takes minutes. Here
+each node is an ``rtl_tcp`` server, local or on another machine, streaming
+raw IQ. One capture at a 2.4 MS/s sample rate covers ``USABLE_SPAN`` of
+that bandwidth. ``channel_powers`` therefore measures every channel inside
+a tuning window with one averaged FFT, rather than measuring one channel
+per dwell.
+
+``plan_windows`` groups the scan plan (a start/end/step range or a list of
+channels from the frequency database) into tuning windows. For each sweep
+``ScanCoordinator`` puts the windows on a shared queue. Every node has a
+worker thread that takes the next window, retunes, discards the samples
+from before the retune, captures for the dwell time and records its
+channels in one ``ActivityTable``. Each window costs its dwell on
+whichever node takes it, so sweep time falls, and coverage per second
+grows, in proportion to the number of nodes. A node that fails puts its
+window back for the others and is reconnected on the next sweep.
+
+``FakeRTLTCPServer`` speaks the rtl_tcp protocol with synthetic carriers at
+the real sample rate, so the coordinator can be exercised without hardware:
+
+    python code/sdr_distscan.py serve-fake --port 1234 --signal 460.125=0.2
+    python code/sdr_distscan.py scan --node 127.0.0.1:1234 --start 450 --end 470
+    python code/sdr_distscan.py demo --nodes 4
+"""
+import argparse
+from collections import namedtuple
+from datetime import datetime
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from sdr_metrics import MetricsRegistry
+from sdr_signal import DC_GUARD_BINS, USABLE_SPAN
+
+RTL_TCP_PORT = 1234
+DEFAULT_SAMPLE_RATE = 2.4e6
+DEFAULT_DWELL_S = 0.25     # Capture per tuning window
+SETTLE_S = 0.1             # Samples discarded after a retune while the tuner and rtl_tcp's queue catch up
+CONNECT_TIMEOUT_S = 5.0
+FFT_SIZE = 4096            # 586 Hz bins at 2.4 MS/s, about 21 to a 12.5 kHz channel
+ACTIVE_SNR_DB = 10.0       # Channel power over the noise floor that counts as activity
+
+# rtl_tcp sends "RTL0", the tuner type and its gain count on connect, then
+# streams u8 IQ. Commands are a one-byte opcode and a big-endian uint32.
+HEADER = struct.Struct(">4sII")
+COMMAND = struct.Struct(">BI")
+MAGIC = b"RTL0"
+CMD_SET_FREQ = 0x01
+CMD_SET_SAMPLE_RATE = 0x02
+CMD_SET_GAIN_MODE = 0x03     # 0 automatic, 1 manual
+CMD_SET_GAIN = 0x04          # Tenths of a dB
+CMD_SET_FREQ_CORRECTION = 0x05
+CMD_SET_AGC_MODE = 0x08
+TUNERS = {0: "unknown", 1: "E4000", 2: "FC0012", 3: "FC0013", 4: "FC2580", 5: "R820T", 6: "R828D"}
+
+FAKE_BLOCK_SAMPLES = 16384   # Fake server writes and checks for commands every 6.8 ms at 2.4 MS/s
+FAKE_NOISE_S = 0.25          # Length of the pre-generated noise the fake repeats
+
+ScanWindow = namedtuple("ScanWindow", "center_hz channels")
+SweepReport = namedtuple("SweepReport", "duration_s windows measured missed span_hz nodes")
+
+
+class RTLTCPError(OSError):
+    """The peer is not an rtl_tcp server or broke off mid-stream"""
+
+
+def parse_address(text, default_port=RTL_TCP_PORT):
+    """(host, port) from "host", "host:port" or "[v6]:port\""""
+    text = text.strip()
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        port = rest[1:] if rest.startswith(":") else ""
+    elif text.count(":") == 1:
+        host, _, port = text.partition(":")
+    else:
+        host, port = text, ""
+    if not host:
+        raise ValueError(f"No host in node address {text!r}")
+    return host, int(port) if port else default_port
+
+
+class RTLTCPClient:
+    """One connection to an rtl_tcp server"""
+    def __init__(self, host, port=RTL_TCP_PORT, timeout=CONNECT_TIMEOUT_S):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sock = None
+        self.tuner = None
+        self.gain_count = 0
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        magic, tuner, gain_count = HEADER.unpack(self.read_exact(HEADER.size))
+        if magic != MAGIC:
+            self.close()
+            raise RTLTCPError(f"{self.host}:{self.port} is not an rtl_tcp server")
+        self.tuner = TUNERS.get(tuner, f"tuner {tuner}")
+        self.gain_count = gain_count
+        return self
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def command(self, opcode, param):
+        self.sock.sendall(COMMAND.pack(opcode, int(param) & 0xFFFFFFFF))
+
+    def set_frequency(self, hz):
+        self.command(CMD_SET_FREQ, round(hz))
+
+    def set_sample_rate(self, rate):
+        self.command(CMD_SET_SAMPLE_RATE, round(rate))
+
+    def set_gain(self, gain_db=None):
+        """Manual gain in dB, or tuner AGC when None"""
+        if gain_db is None:
+            self.command(CMD_SET_GAIN_MODE, 0)
+        else:
+            self.command(CMD_SET_GAIN_MODE, 1)
+            self.command(CMD_SET_GAIN, round(gain_db * 10))
+
+    def read_exact(self, n):
+        """Exactly ``n`` bytes of the stream"""
+        buf = bytearray(n)
+        view = memoryview(buf)
+        got = 0
+        while got < n:
+            count = self.sock.recv_into(view[got:])
+            if not count:
+                raise RTLTCPError(f"{self.host}:{self.port} closed the connection")
+            got += count
+        return bytes(buf)
+
+    def flush(self):
+        """Throw away whatever the socket has already buffered; returns the byte count"""
+        dropped = 0
+        self.sock.setblocking(False)
+        try:
+            while True:
+                chunk = self.sock.recv(1 << 20)
+                if not chunk:
+                    raise RTLTCPError(f"{self.host}:{self.port} closed the connection")
+                dropped += len(chunk)
+        except BlockingIOError:
+            pass
+        finally:
+            self.sock.settimeout(self.timeout)
+        return dropped
+
+
+def plan_frequencies(start_hz, end_hz, step_hz):
+    """Channel frequencies from ``start_hz`` to ``end_hz`` inclusive, in Hz"""
+    if step_hz <= 0:
+        raise ValueError("Step size must be positive")
+    count = int(np.floor((end_hz - start_hz) / step_hz + 1e-6)) + 1
+    return [round(start_hz + i * step_hz) for i in range(max(0, count))]
+
+
+def plan_windows(channels_hz, sample_rate=DEFAULT_SAMPLE_RATE, channel_bw_hz=12.5e3):
+    """Group channels into as few tuning windows as cover them within the usable span
+
+    A window's centre is the middle of its channels, nudged half a channel
+    off any channel it would land on so the DC spike misses its centre.
+    """
+    span = USABLE_SPAN * sample_rate - 2 * channel_bw_hz  # Room for the outer channels' width and the nudge
+    channels = sorted(set(int(round(f)) for f in channels_hz))
+    windows = []
+    i = 0
+    while i < len(channels):
+        j = i
+        while j + 1 < len(channels) and channels[j + 1] - channels[i] <= span:
+            j += 1
+        members = tuple(channels[i:j + 1])
+        center = (members[0] + members[-1]) / 2.0
+        if any(abs(f - center) < channel_bw_hz / 2 for f in members):
+            center += channel_bw_hz / 2
+        windows.append(ScanWindow(center, members))
+        i = j + 1
+    return windows
+
+
+def average_spectrum(raw, fft_size=FFT_SIZE):
+    """Mean Hann-windowed power per bin of u8 IQ bytes, fftshifted, in linear full-scale units"""
+    data = np.frombuffer(raw, dtype=np.uint8)
+    segments = len(data) // (2 * fft_size)
+    if not segments:
+        return None
+    iq = data[:segments * 2 * fft_size].astype(np.float32)
+    iq -= 127.5
+    iq *= 1.0 / 127.5
+    samples = iq.view(np.complex64).reshape(segments, fft_size)
+    window = np.hanning(fft_size).astype(np.float32)
+    spectra = np.fft.fft(samples * window, axis=1)
+    power = np.mean(spectra.real ** 2 + spectra.imag ** 2, axis=0) / float(np.sum(window)) ** 2
+    return np.fft.fftshift(power)
+
+
+def channel_powers(raw, sample_rate, center_hz, channels_hz, channel_bw_hz, fft_size=FFT_SIZE):
+    """(power_dbfs, snr_db) arrays for each channel in one capture tuned to ``center_hz``
+
+    Power is what the channel's bins hold. SNR compares it with the median
+    bin of the usable span, which is the noise floor as long as most of the
+    span is quiet. Bins next to DC are left out of both.
+    """
+    power = average_spectrum(raw, fft_size)
+    channels_hz = np.asarray(channels_hz, dtype=np.float64)
+    if power is None:
+        nothing = np.full(len(channels_hz), np.nan)
+        return nothing, nothing
+    offsets = np.arange(fft_size) - fft_size // 2
+    freqs = offsets * (sample_rate / fft_size)
+    usable = (np.abs(freqs) <= USABLE_SPAN * sample_rate / 2) & (np.abs(offsets) > DC_GUARD_BINS)
+    noise = max(float(np.median(power[usable])), 1e-15)
+    # Bin range of every channel at once; searchsorted keeps this linear in bins plus channels
+    rel = channels_hz - center_hz
+    lo = np.searchsorted(freqs, rel - channel_bw_hz / 2, side="left")
+    hi = np.searchsorted(freqs, rel + channel_bw_hz / 2, side="right")
+    kept = np.where(usable, power, 0.0)
+    cumulative = np.concatenate(([0.0], np.cumsum(kept)))
+    counts = np.concatenate(([0], np.cumsum(usable)))
+    band = cumulative[hi] - cumulative[lo]
+    bins = counts[hi] - counts[lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        power_db = np.where(bins > 0, 10.0 * np.log10(np.maximum(band, 1e-15)), np.nan)
+        snr_db = np.where(bins > 0, 10.0 * np.log10(np.maximum(band, 1e-15) / (noise * bins)), np.nan)
+    return power_db, snr_db
+
+
+class ChannelActivity:
+    """Latest measurement and activity history of one channel"""
+    __slots__ = ("freq_hz", "power_db", "snr_db", "node", "measured_at", "first_active", "last_active", "hits")
+
+    def __init__(self, freq_hz):
+        self.freq_hz = freq_hz
+        self.power_db = None
+        self.snr_db = None
+        self.node = None
+        self.measured_at = None
+        self.first_active = None
+        self.last_active = None
+        self.hits = 0
+
+    @property
+    def active(self):
+        return self.last_active is not None and self.last_active == self.measured_at
+
+
+class ActivityTable:
+    """Merged per-channel results from every node; safe to update from worker threads"""
+    def __init__(self, threshold_db=ACTIVE_SNR_DB):
+        self.threshold_db = threshold_db
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def __len__(self):
+        return len(self._channels)
+
+    def clear(self):
+        with self._lock:
+            self._channels.clear()
+
+    def record(self, channels_hz, power_db, snr_db, node, t):
+        """Add one window's measurements; returns the channels active in it"""
+        active = []
+        with self._lock:
+            for freq, power, snr in zip(channels_hz, power_db.tolist(), snr_db.tolist()):
+                if power != power:  # NaN: the channel fell outside the capture
+                    continue
+                entry = self._channels.get(freq)
+                if entry is None:
+                    entry = self._channels[freq] = ChannelActivity(freq)
+                entry.power_db = power
+                entry.snr_db = snr
+                entry.node = node
+                entry.measured_at = t
+                if snr >= self.threshold_db:
+                    if entry.first_active is None:
+                        entry.first_active = t
+                    entry.last_active = t
+                    entry.hits += 1
+                    active.append(entry)
+        return active
+
+    def get(self, freq_hz):
+        return self._channels.get(int(round(freq_hz)))
+
+    def active(self, since=None):
+        """Channels that have ever been active (or active since ``since``), strongest first"""
+        with self._lock:
+            rows = [c for c in self._channels.values()
+                    if c.last_active is not None and (since is None or c.last_active >= since)]
+        rows.sort(key=lambda c: c.snr_db, reverse=True)
+        return rows
+
+
+class ScanNode:
+    """A remote or local rtl_tcp server taking tuning windows from a coordinator"""
+    def __init__(self, address, gain_db=None, timeout=CONNECT_TIMEOUT_S):
+        self.address = address
+        self.host, self.port = parse_address(address)
+        self.gain_db = gain_db
+        self.timeout = timeout
+        self.client = None
+        self.sample_rate = None
+        self.windows = 0
+        self.failures = 0
+        self.last_error = None
+
+    def __repr__(self):
+        return f"ScanNode({self.address!r})"
+
+    @property
+    def connected(self):
+        return self.client is not None
+
+    def connect(self, sample_rate):
+        if self.client is None:
+            self.client = RTLTCPClient(self.host, self.port, self.timeout).connect()
+            self.client.set_gain(self.gain_db)
+            self.sample_rate = None
+        if self.sample_rate != sample_rate:
+            self.client.set_sample_rate(sample_rate)
+            self.sample_rate = sample_rate
+
+    def capture(self, center_hz, n_bytes, settle_bytes):
+        """Retune and return ``n_bytes`` of IQ from after the retune"""
+        client = self.client
+        client.set_frequency(center_hz)
+        client.flush()
+        if settle_bytes:
+            client.read_exact(settle_bytes)
+        return client.read_exact(n_bytes)
+
+    def fail(self, error):
+        self.failures += 1
+        self.last_error = str(error)
+        self.close()
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+
+class ScanCoordinator:
+    """Splits a scan plan across nodes each sweep and merges their results
+
+    ``on_window(node, window, active)`` is called from node worker threads
+    after every window with the channels found active in it.
+    """
+    def __init__(self, nodes, channels_hz, metrics, sample_rate=DEFAULT_SAMPLE_RATE, dwell_s=DEFAULT_DWELL_S,
+                 channel_bw_hz=12.5e3, settle_s=SETTLE_S, table=None, on_window=None, clock=time.time):
+        if not nodes:
+            raise ValueError("Distributed scan needs at least one node")
+        self.nodes = [node if isinstance(node, ScanNode) else ScanNode(node) for node in nodes]
+        self.sample_rate = sample_rate
+        self.channel_bw_hz = channel_bw_hz
+        self.windows = plan_windows(channels_hz, sample_rate, channel_bw_hz)
+        self.channels = sum(len(w.channels) for w in self.windows)
+        # Whole FFT frames only, and an even count of bytes so I and Q stay paired
+        frame = 2 * FFT_SIZE
+        self.capture_bytes = max(1, int(dwell_s * sample_rate * 2) // frame) * frame
+        self.settle_bytes = int(settle_s * sample_rate) * 2
+        self.table = table if table is not None else ActivityTable()
+        self.on_window = on_window
+        self.clock = clock
+        self.sweeps = 0
+        self.metrics = metrics
+        self._window_time = metrics.histogram("stage_seconds", stage="distscan_window")
+        self._sweep_time = metrics.histogram("stage_seconds", stage="distscan_sweep")
+        self._coverage = metrics.gauge("distscan_coverage_hz_per_second")
+        self._nodes_up = metrics.gauge("distscan_nodes_connected")
+
+    @property
+    def span_hz(self):
+        """Spectrum covered by one sweep"""
+        return len(self.windows) * (USABLE_SPAN * self.sample_rate)
+
+    def sweep(self, stop_event=None):
+        """Measure every window once across all nodes; returns a SweepReport"""
+        stop_event = stop_event or threading.Event()
+        work = queue.Queue()
+        for window in self.windows:
+            work.put(window)
+        measured = []
+        start = time.perf_counter()
+        workers = [threading.Thread(target=self._work, args=(node, work, stop_event, measured), daemon=True)
+                   for node in self.nodes]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        duration = time.perf_counter() - start
+        self.sweeps += 1
+        self._sweep_time.observe(duration)
+        up = sum(1 for node in self.nodes if node.connected)
+        self._nodes_up.set(up)
+        if duration > 0 and measured:
+            self._coverage.set(len(measured) * USABLE_SPAN * self.sample_rate / duration)
+        return SweepReport(duration, len(self.windows), len(measured), work.qsize(),
+                           len(measured) * USABLE_SPAN * self.sample_rate, up)
+
+    def _work(self, node, work, stop_event, measured):
+        """Node worker: take windows until the queue is empty, the scan stops or the node fails"""
+        try:
+            node.connect(self.sample_rate)
+        except OSError as e:
+            node.fail(e)
+            self.metrics.counter("distscan_node_failures_total", node=node.address).inc()
+            return
+        windows = self.metrics.counter("distscan_windows_total", node=node.address)
+        while not stop_event.is_set():
+            try:
+                window = work.get_nowait()
+            except queue.Empty:
+                return
+            start = time.perf_counter()
+            try:
+                raw = node.capture(window.center_hz, self.capture_bytes, self.settle_bytes)
+            except OSError as e:
+                work.put(window)  # Another node takes it; this one is retried next sweep
+                node.fail(e)
+                self.metrics.counter("distscan_node_failures_total", node=node.address).inc()
+                return
+            power_db, snr_db = channel_powers(raw, self.sample_rate, window.center_hz, window.channels,
+                                              self.channel_bw_hz)
+            active = self.table.record(window.channels, power_db, snr_db, node.address, self.clock())
+            node.windows += 1
+            windows.inc()
+            measured.append(window)
+            self._window_time.observe(time.perf_counter() - start)
+            if self.on_window is not None:
+                try:
+                    self.on_window(node, window, active)
+                except Exception as e:
+                    print(f"Distributed scan callback error: {e}")
+
+    def run(self, stop_event, on_sweep=None, pause_s=0.0):
+        """Sweep until ``stop_event`` is set; ``on_sweep(report)`` after each sweep"""
+        while not stop_event.is_set():
+            report = self.sweep(stop_event)
+            if on_sweep is not None:
+                on_sweep(report)
+            if not report.measured and not any(node.connected for node in self.nodes):
+                # Every node is down; wait before reconnecting rather than spinning
+                stop_event.wait(max(pause_s, 1.0))
+            elif pause_s:
+                stop_event.wait(pause_s)
+
+    def close(self):
+        for node in self.nodes:
+            node.close()
+
+
+class FakeRTLTCPServer:
+    """rtl_tcp stand-in streaming noise and fixed carriers at the real sample rate
+
+    ``signals`` are (frequency_hz, amplitude) pairs; a carrier is heard when
+    it falls inside the band the client has tuned.
+    """
+    def __init__(self, signals=(), host="127.0.0.1", port=0, noise=0.05, tuner=5, seed=0):
+        self.signals = list(signals)
+        self.noise = noise
+        self.tuner = tuner
+        self.seed = seed
+        self._sock = socket.create_server((host, port))
+        self.host, self.port = self._sock.getsockname()[:2]
+        self._stopping = threading.Event()
+        self._clients = []
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        for conn in list(self._clients):
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _accept(self):
+        while not self._stopping.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self._clients.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        state = {"freq": 100e6, "rate": DEFAULT_SAMPLE_RATE}
+        rng = np.random.default_rng(self.seed)
+        n_noise = int(FAKE_NOISE_S * DEFAULT_SAMPLE_RATE) // FAKE_BLOCK_SAMPLES * FAKE_BLOCK_SAMPLES
+        noise = (self.noise * (rng.standard_normal(n_noise) + 1j * rng.standard_normal(n_noise))).astype(np.complex64)
+        ticks = np.arange(FAKE_BLOCK_SAMPLES, dtype=np.float64)
+        pending = b""
+        sent = 0
+        start = time.monotonic()
+        try:
+            conn.sendall(HEADER.pack(MAGIC, self.tuner, 29))
+            conn.setblocking(False)
+            while not self._stopping.is_set():
+                # Apply any complete commands before generating the next block
+                try:
+                    while True:
+                        chunk = conn.recv(4096)
+                        if not chunk:
+                            return
+                        pending += chunk
+                except BlockingIOError:
+                    pass
+                while len(pending) >= COMMAND.size:
+                    opcode, param = COMMAND.unpack(pending[:COMMAND.size])
+                    pending = pending[COMMAND.size:]
+                    if opcode == CMD_SET_FREQ:
+                        state["freq"] = float(param)
+                    elif opcode == CMD_SET_SAMPLE_RATE:
+                        state["rate"], sent, start = float(param), 0, time.monotonic()
+
+                rate = state["rate"]
+                offset = sent % len(noise)
+                iq = noise[offset:offset + FAKE_BLOCK_SAMPLES].copy()
+                t = (sent + ticks) / rate
+                for freq, amplitude in self.signals:
+                    delta = freq - state["freq"]
+                    if abs(delta) < rate / 2:
+                        iq += (amplitude * np.exp(2j * np.pi * delta * t)).astype(np.complex64)
+                out = np.clip(iq.view(np.float32) * 127.5 + 127.5, 0, 255).astype(np.uint8)
+                self._send(conn, out.tobytes())
+                sent += FAKE_BLOCK_SAMPLES
+                # Pace to the sample rate, as a dongle would
+                delay = start + sent / rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        except OSError:
+            pass
+        finally:
+            try:
+                conn.close()
+            except OSError:
+                pass
+            if conn in self._clients:
+                self._clients.remove(conn)
+
+    def _send(self, conn, data):
+        view = memoryview(data)
+        while view and not self._stopping.is_set():
+            try:
+                view = view[conn.send(view):]
+            except BlockingIOError:
+                time.sleep(0.001)
+
+
+def demo_signals(channels_hz, count=5, amplitude=0.2):
+    """(hz, amplitude) carriers spread evenly over a channel plan"""
+    stride = max(1, len(channels_hz) // count)
+    return [(channels_hz[i], amplitude) for i in range(stride // 2, len(channels_hz), stride)][:count]
+
+
+def start_fake_nodes(count, signals):
+    """Start ``count`` local fake rtl_tcp servers hearing the same carriers"""
+    return [FakeRTLTCPServer(signals, seed=i).start() for i in range(count)]
+
+
+def _parse_signal(text):
+    """(hz, amplitude) from "MHZ=AMPLITUDE\""""
+    freq, _, amplitude = text.partition("=")
+    return float(freq) * 1e6, float(amplitude or 0.2)
+
+
+def print_report(report, coordinator):
+    print(f"Sweep {coordinator.sweeps}: {report.measured}/{report.windows} windows on {report.nodes} node(s) "
+          f"in {report.duration_s:.2f} s, {report.span_hz / report.duration_s / 1e6:.1f} MHz/s")
+    for channel in coordinator.table.active():
+        seen = datetime.fromtimestamp(channel.last_active).strftime('%H:%M:%S')
+        print(f"  {channel.freq_hz / 1e6:10.4f} MHz  {channel.snr_db:5.1f} dB  {channel.power_db:6.1f} dBFS  "
+              f"{seen}  x{channel.hits}  {channel.node}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan a band across rtl_tcp nodes, or run fake nodes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    scan = sub.add_parser("scan", help="Sweep a range across one or more rtl_tcp nodes")
+    scan.add_argument("--node", action="append", required=True, metavar="HOST:PORT")
+    demo = sub.add_parser("demo", help="Sweep a range across local fake nodes")
+    demo.add_argument("--nodes", type=int, default=2)
+    for p in (scan, demo):
+        p.add_argument("--start", type=float, default=450.0, help="MHz")
+        p.add_argument("--end", type=float, default=470.0, help="MHz")
+        p.add_argument("--step", type=float, default=12.5, help="kHz")
+        p.add_argument("--dwell", type=float, default=DEFAULT_DWELL_S, help="Seconds per tuning window")
+        p.add_argument("--sample-rate", type=float, default=DEFAULT_SAMPLE_RATE)
+        p.add_argument("--threshold", type=float, default=ACTIVE_SNR_DB, help="SNR in dB that counts as active")
+        p.add_argument("--sweeps", type=int, default=1)
+    serve = sub.add_parser("serve-fake", help="Run a fake rtl_tcp server with synthetic carriers")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=RTL_TCP_PORT)
+    serve.add_argument("--signal", action="append", default=[], metavar="MHZ=AMPLITUDE")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve-fake":
+        server = FakeRTLTCPServer([_parse_signal(s) for s in args.signal], args.host, args.port).start()
+        print(f"Fake rtl_tcp listening on {server.address}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+        return 0
+
+    step_hz = args.step * 1e3
+    channels = plan_frequencies(args.start * 1e6, args.end * 1e6, step_hz)
+    servers = []
+    if args.command == "demo":
+        servers = start_fake_nodes(args.nodes, demo_signals(channels))
+        nodes = [server.address for server in servers]
+    else:
+        nodes = args.node
+    coordinator = ScanCoordinator(nodes, channels, MetricsRegistry(), args.sample_rate, args.dwell, step_hz,
+                                  table=ActivityTable(args.threshold))
+    print(f"{len(channels)} channels in {len(coordinator.windows)} tuning windows across {len(nodes)} node(s)")
+    try:
+        for _ in range(args.sweeps):
+            print_report(coordinator.sweep(), coordinator)
+        for node in coordinator.nodes:
+            if node.last_error:
+                print(f"{node.address}: {node.failures} failure(s), last: {node.last_error}")
+    finally:
+        coordinator.close()
+        for server in servers:
+            server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
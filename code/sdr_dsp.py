@@ -0,0 +1,263 @@
+"""Streaming filters for audio processed in chunks.
+
+The readers hand audio over in 4 KB chunks. A filter applied to each chunk
+on its own restarts from rest at every boundary, which is audible as a
+click 16 times a second. The hard per-sample noise gate, with a fade at
+both ends of every chunk, had the same effect. Every stage here carries
+its state (``zi``, resampler history, gate envelope) from one call to the
+next, so the output is the same however the input is split up.
+
+- ``SOSFilter`` runs IIR filters as second-order sections. The design
+  functions below return sections that can be stacked into one filter, so
+  a whole chain of IIR filters costs one ``sosfilt`` call per chunk.
+- ``FIRFilter`` runs FIR taps through ``lfilter``.
+- ``Resampler`` is a polyphase rational resampler equivalent to
+  ``scipy.signal.resample_poly``. It keeps the input history between
+  calls, and each output sample costs one row of the polyphase filter.
+- ``SmoothGate`` is a noise gate driven by an envelope follower, with a
+  hold time and a ramped gain in place of per-sample switching.
+- ``AudioChain`` converts s16 bytes to float32, runs its stages and
+  converts back, reusing the same buffers for every chunk.
+
+All stages work on float32 full-scale (-1..1) samples.
+"""
+from math import ceil, exp, gcd, pi
+
+import numpy as np
+from scipy import signal
+
+AUDIO_RATE = 32000           # Rate of every rtl_fm audio path and the PyAudio output
+FM_DEMOD_RATE = 192000       # rtl_fm output rate for broadcast FM; resampled to AUDIO_RATE here
+DEEMPHASIS_S = 75e-6         # FM broadcast time constant (Americas; 50e-6 elsewhere)
+DC_CUTOFF_HZ = 10.0
+CTCSS_MAX_HZ = 254.1         # Highest standard sub-audible squelch tone
+CTCSS_CUTOFF_HZ = 300.0      # Voice high-pass edge, which puts every CTCSS tone in the stopband
+VOICE_CUTOFF_HZ = 3400.0     # Top of the voice band; NFM hiss above it is removed
+GATE_ENVELOPE_S = 0.010      # Envelope follower time constant
+GATE_HOLD_S = 0.25           # Gate stays open this long after the envelope drops below the threshold
+GATE_RAMP_S = 0.005          # Time constant of the gain opening and closing
+
+S16_SCALE = 1.0 / 32768.0
+
+
+def deemphasis_sos(rate, tau_s=DEEMPHASIS_S):
+    """One-pole FM de-emphasis with unity gain at DC"""
+    alpha = exp(-1.0 / (rate * tau_s))
+    return np.array([[1.0 - alpha, 0.0, 0.0, 1.0, -alpha, 0.0]])
+
+
+def dc_blocker_sos(rate, cutoff_hz=DC_CUTOFF_HZ):
+    """First-order DC blocker, y[n] = x[n] - x[n-1] + R * y[n-1]"""
+    r = exp(-2.0 * pi * cutoff_hz / rate)
+    return np.array([[1.0, -1.0, 0.0, 1.0, -r, 0.0]])
+
+
+def ctcss_highpass_sos(rate, cutoff_hz=CTCSS_CUTOFF_HZ):
+    """Elliptic high-pass that leaves voice alone and takes CTCSS tones 40 dB down"""
+    order, wn = signal.ellipord(cutoff_hz, CTCSS_MAX_HZ, 1.0, 40.0, fs=rate)
+    return signal.ellip(order, 1.0, 40.0, wn, btype="highpass", output="sos", fs=rate)
+
+
+def voice_lowpass_sos(rate, cutoff_hz=VOICE_CUTOFF_HZ, order=4):
+    return signal.butter(order, cutoff_hz, btype="lowpass", output="sos", fs=rate)
+
+
+class SOSFilter:
+    """IIR filter in second-order sections with its state carried between calls"""
+    def __init__(self, *sections, dtype=np.float32):
+        self.sos = np.vstack(sections).astype(dtype)
+        self.zi = None
+
+    def reset(self):
+        self.zi = None
+
+    def process(self, x):
+        if not len(x):
+            return x
+        if self.zi is None:
+            # Start from the steady state for the first sample rather than from rest
+            self.zi = (signal.sosfilt_zi(self.sos) * x[0]).astype(self.sos.dtype)
+        y, self.zi = signal.sosfilt(self.sos, x, zi=self.zi)
+        return y
+
+
+class FIRFilter:
+    """FIR filter with its delay line carried between calls"""
+    def __init__(self, taps, dtype=np.float32):
+        self.taps = np.asarray(taps, dtype=dtype)
+        self._one = np.ones(1, dtype=dtype)
+        self.zi = None
+
+    def reset(self):
+        self.zi = None
+
+    def process(self, x):
+        if not len(x):
+            return x
+        if self.zi is None:
+            self.zi = (signal.lfilter_zi(self.taps, self._one) * x[0]).astype(self.taps.dtype)
+        y, self.zi = signal.lfilter(self.taps, self._one, x, zi=self.zi)
+        return y
+
+
+def resample_taps(up, down):
+    """The anti-aliasing filter ``resample_poly`` designs for this ratio"""
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    return signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * up
+
+
+class Resampler:
+    """Streaming polyphase resampling by ``up / down``
+
+    Output ``m`` is ``sum_j h[j] * xu[m*down - j]``, where ``xu`` is the
+    input with ``up - 1`` zeros stuffed after each sample (what ``upfirdn``
+    computes on the whole stream). Only the taps that meet real samples
+    are evaluated. The filter is causal, so the output lags by half the
+    filter length, ``len(taps) / (2 * up)`` input samples.
+    """
+    def __init__(self, up, down, taps=None, dtype=np.float32):
+        g = gcd(up, down)
+        self.up, self.down = up // g, down // g
+        taps = resample_taps(self.up, self.down) if taps is None else np.asarray(taps, dtype=np.float64)
+        self.k = ceil(len(taps) / self.up)
+        padded = np.zeros(self.k * self.up)
+        padded[:len(taps)] = taps
+        # Row p holds the taps for output phase p, oldest input first, so a row is a dot with a window
+        self.phases = padded.reshape(self.k, self.up).T[:, ::-1].astype(dtype).copy()
+        self.dtype = dtype
+        self.reset()
+
+    def reset(self):
+        self._history = np.zeros(self.k - 1, dtype=self.dtype)
+        self._consumed = 0   # Input samples before the current call
+        self._next = 0       # Zero-stuffed index of the next output, m * down
+
+    def output_length(self, n):
+        """Outputs produced by the next ``n`` input samples"""
+        end = (self._consumed + n) * self.up
+        return max(0, -(-(end - self._next) // self.down))
+
+    def process(self, x):
+        x = np.asarray(x, dtype=self.dtype)
+        total = self._consumed + len(x)
+        buf = np.concatenate((self._history, x))
+        count = self.output_length(len(x))
+        if count:
+            stuffed = self._next + self.down * np.arange(count, dtype=np.int64)
+            # Newest input sample under each output, as an index into buf
+            newest = stuffed // self.up - (self._consumed - (self.k - 1))
+            windows = np.lib.stride_tricks.sliding_window_view(buf, self.k)[newest - (self.k - 1)]
+            y = np.einsum("ij,ij->i", self.phases[stuffed % self.up], windows)
+            self._next = int(stuffed[-1]) + self.down
+        else:
+            y = np.zeros(0, dtype=self.dtype)
+        if self.k > 1:
+            self._history = buf[-(self.k - 1):].copy()
+        self._consumed = total
+        return y
+
+
+class SmoothGate:
+    """Noise gate with an envelope follower, a hold time and a smoothed gain
+
+    Below ``threshold`` (envelope, full scale 1.0) for longer than the hold
+    time, the gain ramps down to zero; above it, the gain ramps back up.
+    A threshold of 0 leaves the signal untouched. While ``muted`` (set by a
+    tone squelch) the gain ramps to zero whatever the level.
+    """
+    def __init__(self, rate, threshold=0.0, envelope_s=GATE_ENVELOPE_S, hold_s=GATE_HOLD_S, ramp_s=GATE_RAMP_S,
+                 dtype=np.float32):
+        self.threshold = threshold
+        self.muted = False
+        self.hold = int(hold_s * rate)
+        self._env_a = np.array([1.0, -exp(-1.0 / (envelope_s * rate))], dtype=dtype)
+        self._env_b = np.array([1.0 + self._env_a[1]], dtype=dtype)
+        self._gain_a = np.array([1.0, -exp(-1.0 / (ramp_s * rate))], dtype=dtype)
+        self._gain_b = np.array([1.0 + self._gain_a[1]], dtype=dtype)
+        self.dtype = dtype
+        self._ticks = np.zeros(0, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        self._env_zi = np.zeros(1, dtype=self.dtype)
+        self._gain_zi = np.zeros(1, dtype=self.dtype)
+        self._count = 0
+        self._last_above = -(1 << 62)  # Sample index at which the envelope last exceeded the threshold
+
+    @property
+    def open(self):
+        return float(self._gain_zi[0]) > 0.5
+
+    def process(self, x):
+        n = len(x)
+        if not n:
+            return x
+        if self.muted:
+            target = np.zeros(n, dtype=self.dtype)
+        elif self.threshold <= 0:
+            if self._gain_zi[0] >= -0.999 * self._gain_a[1]:  # The state is pole * gain
+                return x
+            target = np.ones(n, dtype=self.dtype)  # Unmuted with no threshold: ramp back up, then pass through
+        else:
+            if len(self._ticks) < n:
+                self._ticks = np.arange(n, dtype=np.int64)
+            env, self._env_zi = signal.lfilter(self._env_b, self._env_a, np.abs(x), zi=self._env_zi)
+            index = self._ticks[:n] + self._count
+            last = np.where(env > self.threshold, index, self._last_above)
+            np.maximum.accumulate(last, out=last)
+            target = (index - last <= self.hold).astype(self.dtype)
+            self._last_above = int(last[-1])
+        gain, self._gain_zi = signal.lfilter(self._gain_b, self._gain_a, target, zi=self._gain_zi)
+        self._count += n
+        return x * gain
+
+
+class AudioChain:
+    """s16 bytes through float32 stages and back, with buffers reused between chunks"""
+    def __init__(self, *stages):
+        self.stages = list(stages)
+        self._in = np.zeros(0, dtype=np.float32)
+        self._out = np.zeros(0, dtype=np.int16)
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def process(self, data):
+        samples = np.frombuffer(data, dtype=np.int16, count=len(data) // 2)
+        n = len(samples)
+        if len(self._in) < n:
+            self._in = np.zeros(n, dtype=np.float32)
+        x = np.multiply(samples, S16_SCALE, out=self._in[:n], casting="unsafe")
+        for stage in self.stages:
+            x = stage.process(x)
+        m = len(x)
+        if len(self._out) < m:
+            self._out = np.zeros(m, dtype=np.int16)
+        out = self._out[:m]
+        np.multiply(np.clip(x, -1.0, 32767.0 / 32768.0), 32768.0, out=out, casting="unsafe")
+        return out.tobytes()
+
+
+def voice_chain(rate=AUDIO_RATE, gate=None, decoder=None, denoiser=None):
+    """Police/airport audio: CTCSS tones and hiss filtered out, then ``gate`` (a SmoothGate) if given
+
+    ``decoder`` (an sdr_tones.ToneDecoder) goes first, so it hears the
+    sub-audible band before the high-pass removes it. ``denoiser`` (an
+    sdr_denoise.SpectralDenoiser) goes before the gate, so the gate judges
+    the cleaned-up level.
+    """
+    stages = [] if decoder is None else [decoder]
+    stages.append(SOSFilter(ctcss_highpass_sos(rate), voice_lowpass_sos(rate)))
+    if denoiser is not None:
+        stages.append(denoiser)
+    if gate is not None:
+        stages.append(gate)
+    return AudioChain(*stages)
+
+
+def fm_broadcast_chain(input_rate=FM_DEMOD_RATE, output_rate=AUDIO_RATE, tau_s=DEEMPHASIS_S):
+    """Broadcast FM: DC offset removed and de-emphasis at the demodulator rate, then resampled"""
+    return AudioChain(SOSFilter(dc_blocker_sos(input_rate), deemphasis_sos(input_rate, tau_s)),
+                      Resampler(output_rate, input_rate))
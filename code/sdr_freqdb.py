@@ -0,0 +1,639 @@
+"""Compact, indexed frequency database built from the bundled JSON files.
+
+``police_frequencies.json`` and ``airport_towers.json`` are nested
+Country > State > City/Airport > Service > ["122.9 MHz - CTAF", ...]
+dictionaries. Parsing them in full at startup is slow, so this module
+compiles both into one SQLite file with:
+
+* a ``nodes`` tree table (one row per country, state, place and service),
+* an interned ``strings`` table so repeated descriptions such as "CTAF" are
+  stored once,
+* a ``channels`` table holding each frequency as integer Hz,
+* a ``places_geo`` table with airport coordinates, joined from an optional
+  OurAirports ``airports.csv`` (https://ourairports.com/data/) placed next
+  to the JSON files.
+
+``FrequencyDB`` opens the store lazily, rebuilds it when a source JSON file is
+newer than the store, and caches every hierarchy lookup. ``GeoGrid`` answers
+"nearest towers to me" queries over the airport coordinates. Build the store
+explicitly with:
+
+    python code/sdr_freqdb.py build
+"""
+import argparse
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+import numpy as np
+
+from sdr_geo import grid_cells_near, grid_key, haversine_m
+
+POLICE = "police"
+AIRPORT = "airport"
+
+# Node levels in the hierarchy
+COUNTRY, STATE, PLACE, SERVICE = range(4)
+
+SCHEMA_VERSION = "2"
+DEFAULT_DB_PATH = "frequencies.db"
+DEFAULT_SOURCES = {
+    POLICE: "police_frequencies.json",
+    AIRPORT: "airport_towers.json",
+}
+DEFAULT_LOCATIONS = "airports.csv"
+
+
+# Minimal structures used when a source file is missing, matching what the
+# app showed before the database existed
+DEFAULT_DATA = {
+    POLICE: {
+        "United States": {
+            "Example State": {
+                "Example City": {
+                    "Police": [
+                        "460.500 MHz - Example Police Dispatch"
+                    ]
+                }
+            }
+        }
+    },
+    AIRPORT: {
+        "United States": {
+            "Example State": {
+                "Example Airport (XXX)": {
+                    "Tower": [
+                        "118.000 MHz - Example Tower"
+                    ]
+                }
+            }
+        }
+    },
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+FrequencyEntry = namedtuple(
+    "FrequencyEntry", "hz kind country state place service description")
+
+NearbyPlace = namedtuple("NearbyPlace", "distance_km country state place lat lon")
+
+# Airport names in airport_towers.json carry their IATA code, e.g. "Boswell (BWL) Airport"
+_CODE_RE = re.compile(r"\(([A-Z0-9]{3,4})\)")
+
+_ENTRY_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(?:MHz)?\s*(?:-\s*(.*?))?\s*$")
+
+
+def load_frequency_json(path, default):
+    """Load a nested frequency dictionary from JSON, falling back to ``default``"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading {path}: {e}")
+        return default
+
+
+def parse_frequency_entry(entry):
+    """Split ``"122.9 MHz - CTAF"`` into ``(122900000, "CTAF")``; returns None if unparseable"""
+    m = _ENTRY_RE.match(entry)
+    if not m:
+        return None
+    return int(round(float(m.group(1)) * 1e6)), (m.group(2) or None)
+
+
+def format_mhz(hz):
+    """Format integer Hz as MHz with at least three decimals, e.g. 122.900 or 118.0125"""
+    text = f"{hz / 1e6:.6f}".rstrip("0")
+    whole, _, frac = text.partition(".")
+    return f"{whole}.{frac.ljust(3, '0')}"
+
+
+def load_airport_locations(path):
+    """Read an OurAirports ``airports.csv`` into name and code lookups
+
+    Returns ``(by_name, by_code)``: ``by_name`` maps (iso_country, region,
+    lowercase name) and ``by_code`` maps (iso_country, code) to (lat, lon),
+    where region is the part of ``iso_region`` after the dash ("US-CA" -> "CA")
+    and code is any of the IATA, local or GPS codes. Returns empty lookups if
+    the file is missing.
+    """
+    by_name = {}
+    by_code = {}
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    point = (float(row["latitude_deg"]), float(row["longitude_deg"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+                country = row.get("iso_country", "")
+                region = row.get("iso_region", "").partition("-")[2]
+                by_name.setdefault((country, region, row.get("name", "").lower()), point)
+                for field in ("iata_code", "local_code", "gps_code"):
+                    code = row.get(field)
+                    if code:
+                        by_code.setdefault((country, code), point)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading {path}: {e}")
+    return by_name, by_code
+
+
+def locate_airport(country, state, name, by_name, by_code):
+    """Coordinates for an airport_towers.json place, or None if it cannot be matched"""
+    point = by_name.get((country, state, name.lower()))
+    if point is None:
+        m = _CODE_RE.search(name)
+        if m:
+            point = by_code.get((country, m.group(1)))
+    return point
+
+
+def build_frequency_db(db_path=DEFAULT_DB_PATH, sources=None, locations=DEFAULT_LOCATIONS):
+    """Compile the JSON sources into a fresh SQLite store at ``db_path``
+
+    ``sources`` maps POLICE/AIRPORT to a JSON path or an already-loaded dict.
+    ``locations`` is an OurAirports CSV used to place airports; airports that
+    cannot be matched, or all of them if the file is absent, get no position.
+    Returns the number of channels written.
+    """
+    sources = dict(DEFAULT_SOURCES if sources is None else sources)
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript("""
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE strings (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE);
+        CREATE TABLE nodes (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            parent INTEGER NOT NULL,
+            ord INTEGER NOT NULL,
+            name TEXT NOT NULL
+        );
+        CREATE TABLE channels (
+            service INTEGER NOT NULL,
+            ord INTEGER NOT NULL,
+            hz INTEGER NOT NULL,
+            description INTEGER,
+            PRIMARY KEY (service, ord)
+        ) WITHOUT ROWID;
+        CREATE TABLE places_geo (
+            node INTEGER PRIMARY KEY,
+            lat REAL NOT NULL,
+            lon REAL NOT NULL
+        );
+    """)
+
+    strings = {}
+
+    def intern(text):
+        if text is None:
+            return None
+        sid = strings.get(text)
+        if sid is None:
+            sid = len(strings) + 1
+            strings[text] = sid
+        return sid
+
+    nodes = []
+    channels = []
+    places_geo = []
+    skipped = 0
+    source_mtimes = {}
+    by_name, by_code = load_airport_locations(locations) if locations else ({}, {})
+    if locations and os.path.exists(locations):
+        source_mtimes["locations"] = os.path.getmtime(locations)
+
+    def add_node(kind, level, parent, ord_, name):
+        node_id = len(nodes) + 1
+        nodes.append((node_id, kind, level, parent, ord_, name))
+        return node_id
+
+    for kind, source in sources.items():
+        if isinstance(source, dict):
+            data = source
+        else:
+            data = load_frequency_json(source, DEFAULT_DATA[kind])
+            if os.path.exists(source):
+                source_mtimes[kind] = os.path.getmtime(source)
+        for i, (country, states) in enumerate(data.items()):
+            country_id = add_node(kind, COUNTRY, 0, i, country)
+            for j, (state, places) in enumerate(states.items()):
+                state_id = add_node(kind, STATE, country_id, j, state)
+                for k, (place, services) in enumerate(places.items()):
+                    place_id = add_node(kind, PLACE, state_id, k, place)
+                    if kind == AIRPORT and by_name:
+                        point = locate_airport(country, state, place, by_name, by_code)
+                        if point is not None:
+                            places_geo.append((place_id,) + point)
+                    for m, (service, entries) in enumerate(services.items()):
+                        service_id = add_node(kind, SERVICE, place_id, m, service)
+                        for n, entry in enumerate(entries):
+                            parsed = parse_frequency_entry(entry)
+                            if parsed is None:
+                                skipped += 1
+                                continue
+                            hz, desc = parsed
+                            channels.append((service_id, n, hz, intern(desc)))
+
+    conn.executemany("INSERT INTO strings (id, text) VALUES (?, ?)",
+                     ((sid, text) for text, sid in strings.items()))
+    conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?)", nodes)
+    conn.executemany("INSERT INTO channels VALUES (?, ?, ?, ?)", channels)
+    conn.executemany("INSERT INTO places_geo VALUES (?, ?, ?)", places_geo)
+    conn.executescript("""
+        CREATE INDEX nodes_by_name ON nodes (parent, name);
+    """)
+    conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+        ("schema", SCHEMA_VERSION),
+        ("built", str(time.time())),
+        ("source_mtimes", json.dumps(source_mtimes)),
+    ])
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(tmp_path, db_path)
+    if skipped:
+        print(f"Skipped {skipped} unparseable frequency entries")
+    if by_name:
+        print(f"Located {len(places_geo)} airports from {locations}")
+    return len(channels)
+
+
+class FrequencyDB:
+    """Lazily opened, cached read access to the compiled frequency store"""
+    def __init__(self, db_path=DEFAULT_DB_PATH, sources=None, auto_build=True,
+                 locations=DEFAULT_LOCATIONS):
+        self.db_path = db_path
+        self.sources = dict(DEFAULT_SOURCES if sources is None else sources)
+        self.locations = locations
+        self.auto_build = auto_build
+        self._conn = None
+        self._lock = threading.Lock()
+        self._node_ids = {}
+        self._children = {}
+        self._frequencies = {}
+        self._index = None
+        self._index_lock = threading.Lock()    # Held for the whole index build, so callers share one
+        self._waiters_lock = threading.Lock()
+        self._index_waiters = []               # Callbacks of index_or_notify waiting for the build
+        self._grid = None
+
+    def _is_stale(self):
+        if not os.path.exists(self.db_path):
+            return True
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                meta = dict(conn.execute("SELECT key, value FROM meta"))
+            finally:
+                conn.close()
+        except sqlite3.DatabaseError:
+            return True
+        if meta.get("schema") != SCHEMA_VERSION:
+            return True
+        built_from = json.loads(meta.get("source_mtimes", "{}"))
+        watched = dict(self.sources, locations=self.locations)
+        for kind, source in watched.items():
+            if isinstance(source, str) and os.path.exists(source):
+                if built_from.get(kind) != os.path.getmtime(source):
+                    return True
+        return False
+
+    def connection(self):
+        """Open (and if needed build) the store on first use"""
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    if self.auto_build and self._is_stale():
+                        start = time.perf_counter()
+                        count = build_frequency_db(self.db_path, self.sources, self.locations)
+                        print(f"Built frequency database: {count} channels "
+                              f"in {time.perf_counter() - start:.2f}s")
+                    uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+                    self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return self._conn
+
+    def _query(self, sql, params):
+        conn = self.connection()
+        with self._lock:
+            return conn.execute(sql, params).fetchall()
+
+    def _node_id(self, kind, path):
+        key = (kind,) + tuple(path)
+        node_id = self._node_ids.get(key)
+        if node_id is None:
+            parent = self._node_id(kind, path[:-1]) if len(path) > 1 else 0
+            if parent is None:
+                return None
+            rows = self._query("SELECT id FROM nodes WHERE parent = ? AND name = ? AND kind = ?",
+                               (parent, path[-1], kind))
+            if not rows:
+                return None
+            node_id = self._node_ids[key] = rows[0][0]
+        return node_id
+
+    def children(self, kind, *path):
+        """Names one level below ``path`` in insertion order, e.g. children(POLICE, "Canada")"""
+        key = (kind,) + path
+        names = self._children.get(key)
+        if names is None:
+            parent = self._node_id(kind, path) if path else 0
+            if parent is None:
+                return []
+            # Node ids are assigned in source order, so they double as the sort key
+            rows = self._query("SELECT name FROM nodes WHERE parent = ? AND kind = ? ORDER BY id",
+                               (parent, kind))
+            names = self._children[key] = [r[0] for r in rows]
+        return names
+
+    def countries(self, kind):
+        return self.children(kind)
+
+    def states(self, kind, country):
+        return self.children(kind, country)
+
+    def places(self, kind, country, state):
+        """Cities for POLICE, airports for AIRPORT"""
+        return self.children(kind, country, state)
+
+    def services(self, kind, country, state, place):
+        return self.children(kind, country, state, place)
+
+    def frequencies(self, kind, country, state, place, service):
+        """Return [(hz, description)] for one service; descriptions default to the service name"""
+        key = (kind, country, state, place, service)
+        result = self._frequencies.get(key)
+        if result is None:
+            service_id = self._node_id(kind, (country, state, place, service))
+            if service_id is None:
+                return []
+            rows = self._query(
+                "SELECT c.hz, s.text FROM channels c LEFT JOIN strings s ON s.id = c.description "
+                "WHERE c.service = ? ORDER BY c.ord", (service_id,))
+            result = self._frequencies[key] = [(hz, desc or service) for hz, desc in rows]
+        return result
+
+    def all_channels(self):
+        """Every channel as a FrequencyEntry, sorted by frequency"""
+        rows = self._query("""
+            SELECT c.hz, svc.kind, country.name, state.name, place.name, svc.name, s.text
+            FROM channels c
+            JOIN nodes svc ON svc.id = c.service
+            JOIN nodes place ON place.id = svc.parent
+            JOIN nodes state ON state.id = place.parent
+            JOIN nodes country ON country.id = state.parent
+            LEFT JOIN strings s ON s.id = c.description
+            ORDER BY c.hz, svc.id, c.ord
+        """, ())
+        return [FrequencyEntry(hz, kind, country, state, place, service, desc or service)
+                for hz, kind, country, state, place, service, desc in rows]
+
+    def index(self):
+        """Return the shared FrequencyIndex, building it on first use
+
+        A caller that arrives while another thread is building waits for
+        that build instead of starting its own.
+        """
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    try:
+                        index = FrequencyIndex(self.all_channels())
+                    except Exception:
+                        with self._waiters_lock:
+                            self._index_waiters = []  # The next caller starts another attempt
+                        raise
+                    with self._waiters_lock:
+                        self._index = index
+                        waiters, self._index_waiters = self._index_waiters, []
+                    for callback in waiters:
+                        callback()
+        return self._index
+
+    def index_or_notify(self, callback):
+        """The index if it is built; otherwise None, and ``callback()`` runs on a worker thread once it is
+
+        For the Tk thread, which must not wait the best part of a second for
+        the build.
+        """
+        with self._waiters_lock:
+            if self._index is not None:
+                return self._index
+            self._index_waiters.append(callback)
+            first = len(self._index_waiters) == 1
+        if first:
+            threading.Thread(target=self.index, daemon=True).start()
+        return None
+
+    def place_location(self, kind, country, state, place):
+        """(lat, lon) of a place, or None if the store has no position for it"""
+        place_id = self._node_id(kind, (country, state, place))
+        if place_id is None:
+            return None
+        rows = self._query("SELECT lat, lon FROM places_geo WHERE node = ?", (place_id,))
+        return rows[0] if rows else None
+
+    def place_frequencies(self, kind, country, state, place):
+        """Return [(service, hz, description)] across every service of one place"""
+        return [(service, hz, desc)
+                for service in self.services(kind, country, state, place)
+                for hz, desc in self.frequencies(kind, country, state, place, service)]
+
+    def airport_grid(self):
+        """Return the shared GeoGrid of located airports, building it on first use"""
+        if self._grid is None:
+            rows = self._query("""
+                SELECT country.name, state.name, place.name, g.lat, g.lon
+                FROM places_geo g
+                JOIN nodes place ON place.id = g.node
+                JOIN nodes state ON state.id = place.parent
+                JOIN nodes country ON country.id = state.parent
+                WHERE place.kind = ?
+            """, (AIRPORT,))
+            grid = GeoGrid(((lat, lon, (country, state, place))
+                            for country, state, place, lat, lon in rows))
+            with self._lock:
+                if self._grid is None:
+                    self._grid = grid
+        return self._grid
+
+    def nearest_places(self, kind, lat, lon, k=10, radius_km=100.0):
+        """Up to ``k`` located places within ``radius_km`` of (lat, lon), closest first"""
+        if kind != AIRPORT:
+            return []
+        return [NearbyPlace(dist, country, state, place, plat, plon)
+                for dist, plat, plon, (country, state, place)
+                in self.airport_grid().nearest(lat, lon, k, radius_km)]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class FrequencyIndex:
+    """In-memory reverse lookup and search over every police and airport channel
+
+    Frequencies are kept in a sorted integer array so range and nearest
+    queries are a bisect away. Names, descriptions and formatted frequencies
+    are split into lowercase tokens held in one sorted list, so a prefix
+    query is also two bisects regardless of how many entries exist.
+    """
+    def __init__(self, entries):
+        intern = sys.intern
+        self.entries = [FrequencyEntry(e.hz, intern(e.kind), intern(e.country), intern(e.state),
+                                       intern(e.place), intern(e.service), intern(e.description))
+                        for e in sorted(entries, key=lambda e: e.hz)]
+        self.hz = array("q", (e.hz for e in self.entries))
+
+        postings = set()
+        for i, e in enumerate(self.entries):
+            text = " ".join((e.country, e.state, e.place, e.service, e.description, format_mhz(e.hz)))
+            for token in _TOKEN_RE.findall(text.lower()):
+                postings.add((token, i))
+        postings = sorted(postings)
+        self.tokens = [t for t, _ in postings]
+        self.token_entries = array("l", (i for _, i in postings))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def in_range(self, lo_hz, hi_hz, kind=None):
+        """Entries with lo_hz <= frequency <= hi_hz"""
+        lo = bisect_left(self.hz, lo_hz)
+        hi = bisect_right(self.hz, hi_hz)
+        return [e for e in self.entries[lo:hi] if kind is None or e.kind == kind]
+
+    def nearest(self, hz, tolerance_hz=None, kind=None):
+        """All entries on the assigned frequency closest to ``hz``, or [] if none within tolerance"""
+        # Walk outwards from the insertion point until the kind filter is satisfied
+        hi = bisect_left(self.hz, hz)
+        lo = hi - 1
+        while lo >= 0 or hi < len(self.hz):
+            left = hz - self.hz[lo] if lo >= 0 else None
+            right = self.hz[hi] - hz if hi < len(self.hz) else None
+            if right is None or (left is not None and left <= right):
+                j, dist, lo = lo, left, lo - 1
+            else:
+                j, dist, hi = hi, right, hi + 1
+            if tolerance_hz is not None and dist > tolerance_hz:
+                return []
+            if kind is None or self.entries[j].kind == kind:
+                return self.in_range(self.hz[j], self.hz[j], kind)
+        return []
+
+    def describe(self, hz, tolerance_hz=6250, kind=None, prefer=None):
+        """Short human label for whoever is assigned near ``hz``, or "" if nobody is
+
+        ``prefer(entry)`` picks among agencies sharing the frequency, e.g. by squelch tone.
+        """
+        matches = self.nearest(hz, tolerance_hz, kind)
+        if not matches:
+            return ""
+        first = next((e for e in matches if prefer(e)), matches[0]) if prefer else matches[0]
+        label = f"{first.description} ({first.place})"
+        if len(matches) > 1:
+            label += f" +{len(matches) - 1} more"
+        return label
+
+    def _prefix_matches(self, prefix):
+        lo = bisect_left(self.tokens, prefix)
+        hi = bisect_left(self.tokens, prefix + "\uffff")
+        return set(self.token_entries[lo:hi])
+
+    def search(self, query, limit=200, kind=None):
+        """Entries matching every word of ``query`` as a token prefix, in frequency order"""
+        words = _TOKEN_RE.findall(query.lower())
+        if not words:
+            return []
+        # Start from the rarest word so the intersections stay small
+        matches = sorted((self._prefix_matches(w) for w in words), key=len)
+        ids = matches[0]
+        for other in matches[1:]:
+            ids &= other
+            if not ids:
+                return []
+        results = []
+        for i in sorted(ids):
+            e = self.entries[i]
+            if kind is None or e.kind == kind:
+                results.append(e)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class GeoGrid:
+    """Fixed-size lat/lon bucket grid for k-nearest-within-radius queries
+
+    Points are bucketed into ``cell_deg`` square cells with the same
+    ``sdr_geo`` grid as the aircraft table. A query only visits the cells
+    overlapping the bounding box of its search radius and ranks the few
+    hundred candidates there by great-circle distance in one vectorized
+    call, so it stays well under a millisecond for every airport in the world.
+    """
+    def __init__(self, points, cell_deg=1.0):
+        self.cell_deg = cell_deg
+        self.cells = {}
+        self.count = 0
+        for lat, lon, payload in points:
+            self.cells.setdefault(grid_key(lat, lon, cell_deg), []).append((lat, lon, payload))
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def nearest(self, lat, lon, k=10, radius_km=100.0):
+        """Up to ``k`` (distance_km, lat, lon, payload) tuples within ``radius_km``, closest first"""
+        if not self.count:
+            return []
+        candidates = [point for key in grid_cells_near(lat, lon, radius_km, self.cell_deg)
+                      for point in self.cells.get(key, ())]
+        if not candidates:
+            return []
+        points = np.array([point[:2] for point in candidates], dtype=np.float64)
+        distance = haversine_m(lat, lon, points[:, 0], points[:, 1]) / 1000.0
+        inside = np.flatnonzero(distance <= radius_km)
+        closest = inside[np.argsort(distance[inside], kind="stable")[:k]]
+        return [(float(distance[i]),) + candidates[i] for i in closest.tolist()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the compact SDR Tools frequency database")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Compile the JSON frequency files")
+    build.add_argument("--police", default=DEFAULT_SOURCES[POLICE])
+    build.add_argument("--airports", default=DEFAULT_SOURCES[AIRPORT])
+    build.add_argument("--locations", default=DEFAULT_LOCATIONS,
+                       help="OurAirports airports.csv used to place airports on the map")
+    build.add_argument("--out", default=DEFAULT_DB_PATH)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = build_frequency_db(args.out, {POLICE: args.police, AIRPORT: args.airports},
+                               args.locations)
+    print(f"Wrote {count} channels to {args.out} "
+          f"({os.path.getsize(args.out) / 1024:.0f} KiB) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
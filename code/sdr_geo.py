@@ -0,0 +1,123 @@
+"""Vectorized geodesy for tracked aircraft.
+
+Every function takes scalars or NumPy arrays and broadcasts, so distance
+and bearing for a whole scope of aircraft are one call instead of a Python
+loop of ``math`` calls. ``range_bearing`` uses a cached
+``pyproj.Geod`` (WGS84, computed in C over the whole array) when pyproj is
+installed and falls back to the spherical formulas otherwise.
+
+The lat/lon bucket grid (``grid_key``, ``grid_cells_near``,
+``grid_cells_in_box``) is shared by the aircraft table and the airport
+index in ``sdr_freqdb``, so both wrap the antimeridian and clamp at the
+poles the same way.
+"""
+from functools import lru_cache
+import math
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+REPORTED_VELOCITY_S = 10.0  # Trust a transmitted velocity over derived kinematics for this long
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres between points given in degrees"""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = phi2 - phi1
+    dlam = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def initial_bearing_deg(lat1, lon1, lat2, lon2):
+    """Initial great-circle bearing from point 1 to point 2, 0-360 degrees clockwise from north"""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dlam = np.radians(np.subtract(lon2, lon1))
+    y = np.sin(dlam) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlam)
+    return (np.degrees(np.arctan2(y, x)) + 360.0) % 360.0
+
+
+@lru_cache(maxsize=1)
+def geod():
+    """Shared WGS84 ``pyproj.Geod``, or None if pyproj is not installed"""
+    try:
+        from pyproj import Geod
+    except ImportError:
+        return None
+    return Geod(ellps="WGS84")
+
+
+def range_bearing(lat0, lon0, lats, lons):
+    """Distance in metres and bearing in degrees from (lat0, lon0) to each point"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    g = geod()
+    if g is not None and lats.size:
+        lat0s = np.full(lats.shape, lat0, dtype=np.float64)
+        lon0s = np.full(lons.shape, lon0, dtype=np.float64)
+        azimuth, _, distance = g.inv(lon0s, lat0s, lons, lats)
+        return np.asarray(distance), np.asarray(azimuth) % 360.0
+    return haversine_m(lat0, lon0, lats, lons), initial_bearing_deg(lat0, lon0, lats, lons)
+
+
+def grid_key(lat, lon, cell_deg):
+    """(row, col) of the ``cell_deg`` square lat/lon grid cell containing a point"""
+    return int(math.floor(lat / cell_deg)), int(math.floor(((lon + 180.0) % 360.0 - 180.0) / cell_deg))
+
+
+def _grid_columns(col_lo, col_hi, cell_deg):
+    lon_cells = int(round(360 / cell_deg))
+    if col_hi - col_lo + 1 >= lon_cells:
+        col_lo, col_hi = 0, lon_cells - 1
+    half = lon_cells // 2
+    # Wrap columns across the antimeridian
+    return sorted({(col + half) % lon_cells - half for col in range(col_lo, col_hi + 1)})
+
+
+def grid_cells_in_box(south, west, north, east, cell_deg):
+    """Keys of the grid cells overlapping a lat/lon box; ``west > east`` crosses the antimeridian"""
+    if west > east:
+        east += 360.0
+    cols = _grid_columns(int(math.floor(west / cell_deg)), int(math.floor(east / cell_deg)), cell_deg)
+    rows = range(int(math.floor(max(south, -90.0) / cell_deg)), int(math.floor(min(north, 90.0) / cell_deg)) + 1)
+    return [(row, col) for row in rows for col in cols]
+
+
+def grid_cells_near(lat, lon, radius_km, cell_deg):
+    """Keys of the grid cells overlapping the bounding box of a ``radius_km`` circle"""
+    dlat = math.degrees(radius_km * 1000.0 / EARTH_RADIUS_M)
+    widest = min(90.0, max(abs(lat - dlat), abs(lat + dlat)))
+    dlon = 180.0 if widest >= 89.9 else min(180.0, dlat / math.cos(math.radians(widest)))
+    return grid_cells_in_box(lat - dlat, lon - dlon, lat + dlat, lon + dlon, cell_deg)
+
+
+def update_kinematics(aircraft):
+    """Recompute speed (m/s) and heading for every aircraft from its last two fixes in one batch
+
+    ``aircraft`` is an iterable of objects with a ``track`` (``TrackBuffer``)
+    and writable ``speed``/``heading``. Aircraft with fewer than two fixes or
+    no time between them keep their previous values, as do aircraft that
+    reported their own velocity within ``REPORTED_VELOCITY_S``. Returns how
+    many were updated.
+    """
+    moving = [ac for ac in aircraft if len(ac.track) > 1 and
+              ac.last_update - getattr(ac, "velocity_time", 0.0) > REPORTED_VELOCITY_S]
+    if not moving:
+        return 0
+    prev = np.array([ac.track.fix(-2) for ac in moving])
+    last = np.array([ac.track.fix(-1) for ac in moving])
+    dt = last[:, 3] - prev[:, 3]
+    distance = haversine_m(prev[:, 0], prev[:, 1], last[:, 0], last[:, 1])
+    heading = initial_bearing_deg(prev[:, 0], prev[:, 1], last[:, 0], last[:, 1])
+    valid = dt > 0
+    speed = np.divide(distance, dt, out=np.zeros_like(distance), where=valid)
+    updated = 0
+    for ac, ok, v, h in zip(moving, valid.tolist(), speed.tolist(), heading.tolist()):
+        if ok:
+            ac.speed = v
+            ac.heading = h
+            updated += 1
+    return updated
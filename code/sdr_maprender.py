@@ -0,0 +1,618 @@
+"""Offline slippy-map renderer for the airport radar display.
+
+Composites 256 px Web Mercator PNG tiles from a local disk cache and draws the
+tower, aircraft, flight paths and radar range circle straight onto the image
+with PIL, so a frame takes milliseconds and needs no browser or network.
+Tiles that are not cached render as a plain grid. Pre-seed the cache for the
+operating area while online with:
+
+    python code/sdr_maprender.py seed --lat 40.64 --lon -73.78 --radius-km 100 --zooms 6-12
+
+Seeding follows the OpenStreetMap tile usage policy: it identifies itself,
+fetches one tile at a time and never re-downloads a cached tile.
+"""
+import argparse
+from collections import OrderedDict
+import math
+import os
+import sys
+import time
+import urllib.request
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageTk
+
+from sdr_tracks import douglas_peucker
+
+TILE_SIZE = 256
+MAX_LAT = 85.05112878
+MIN_ZOOM = 2
+MAX_ZOOM = 16
+DEFAULT_TILE_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "sdr_tools", "tiles")
+DEFAULT_TILE_URL = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+USER_AGENT = "sdr-tools/1.0 (offline tile seeding)"
+ATTRIBUTION = "(c) OpenStreetMap contributors"
+
+# Earth circumference in metres divided by the tile size, i.e. m/px at zoom 0 on the equator
+_METERS_PER_PIXEL_Z0 = 2 * math.pi * 6378137.0 / TILE_SIZE
+
+
+def latlon_to_pixel(lat, lon, zoom):
+    """Web Mercator world pixel coordinates of (lat, lon) at ``zoom``"""
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    scale = TILE_SIZE * (1 << zoom)
+    x = (lon + 180.0) / 360.0 * scale
+    sin_lat = math.sin(math.radians(lat))
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+
+def latlon_to_pixel_array(lats, lons, zoom):
+    """Vectorized ``latlon_to_pixel`` over arrays of coordinates"""
+    lats = np.clip(np.asarray(lats, dtype=np.float64), -MAX_LAT, MAX_LAT)
+    scale = TILE_SIZE * (1 << zoom)
+    x = (np.asarray(lons, dtype=np.float64) + 180.0) / 360.0 * scale
+    sin_lat = np.sin(np.radians(lats))
+    y = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+
+def meters_per_pixel(lat, zoom):
+    return _METERS_PER_PIXEL_Z0 * math.cos(math.radians(lat)) / (1 << zoom)
+
+
+def zoom_for_radius(lat, radius_km, size_px, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """Highest zoom at which a circle of ``radius_km`` fits within ``size_px`` pixels"""
+    for zoom in range(max_zoom, min_zoom - 1, -1):
+        if 2 * radius_km * 1000 / meters_per_pixel(lat, zoom) <= 0.9 * size_px:
+            return zoom
+    return min_zoom
+
+
+def tiles_for_area(lat, lon, radius_km, zoom):
+    """Yield (x, y) indices of every tile touching the square around a circle"""
+    radius_px = radius_km * 1000 / meters_per_pixel(lat, zoom)
+    cx, cy = latlon_to_pixel(lat, lon, zoom)
+    n = 1 << zoom
+    y_lo = max(0, int((cy - radius_px) // TILE_SIZE))
+    y_hi = min(n - 1, int((cy + radius_px) // TILE_SIZE))
+    x_lo = int((cx - radius_px) // TILE_SIZE)
+    x_hi = int((cx + radius_px) // TILE_SIZE)
+    seen = set()
+    for ty in range(y_lo, y_hi + 1):
+        for tx in range(x_lo, x_hi + 1):
+            key = (tx % n, ty)
+            if key not in seen:
+                seen.add(key)
+                yield key
+
+
+class TileCache:
+    """Disk-backed tile store with a small in-memory LRU of decoded tiles"""
+    def __init__(self, cache_dir=DEFAULT_TILE_CACHE, memory_tiles=256, url_template=DEFAULT_TILE_URL):
+        self.cache_dir = cache_dir
+        self.url_template = url_template
+        self.memory_tiles = memory_tiles
+        self._tiles = OrderedDict()
+        self._placeholder = None
+        self.misses = 0
+
+    def path(self, z, x, y):
+        return os.path.join(self.cache_dir, str(z), str(x), f"{y}.png")
+
+    def placeholder(self):
+        """Neutral grid tile drawn where no cached tile exists"""
+        if self._placeholder is None:
+            tile = Image.new("RGB", (TILE_SIZE, TILE_SIZE), (232, 232, 228))
+            draw = ImageDraw.Draw(tile)
+            for i in range(0, TILE_SIZE, 64):
+                draw.line([(i, 0), (i, TILE_SIZE)], fill=(215, 215, 210))
+                draw.line([(0, i), (TILE_SIZE, i)], fill=(215, 215, 210))
+            self._placeholder = tile
+        return self._placeholder
+
+    def get(self, z, x, y):
+        """Decoded tile image, or the placeholder if it is not cached"""
+        n = 1 << z
+        if not 0 <= y < n:
+            return self.placeholder()
+        key = (z, x % n, y)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+        try:
+            with Image.open(self.path(*key)) as img:
+                tile = img.convert("RGB")
+        except (OSError, ValueError):
+            self.misses += 1
+            tile = self.placeholder()
+        self._tiles[key] = tile
+        if len(self._tiles) > self.memory_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def has(self, z, x, y):
+        return os.path.exists(self.path(z, x, y))
+
+    def fetch(self, z, x, y, timeout=10):
+        """Download one tile into the cache; returns True on success"""
+        url = self.url_template.format(z=z, x=x, y=y)
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                data = response.read()
+        except Exception as e:
+            print(f"Error fetching tile {z}/{x}/{y}: {e}")
+            return False
+        path = self.path(z, x, y)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._tiles.pop((z, x, y), None)
+        return True
+
+
+def seed_tiles(cache, lat, lon, radius_km, zooms, delay_s=0.1):
+    """Download every missing tile covering ``radius_km`` around (lat, lon) at each zoom
+
+    Returns (fetched, cached, failed) counts.
+    """
+    fetched = cached = failed = 0
+    for zoom in zooms:
+        for x, y in tiles_for_area(lat, lon, radius_km, zoom):
+            if cache.has(zoom, x, y):
+                cached += 1
+                continue
+            if cache.fetch(zoom, x, y):
+                fetched += 1
+            else:
+                failed += 1
+            time.sleep(delay_s)
+        print(f"Zoom {zoom}: {fetched} fetched, {cached} already cached, {failed} failed")
+    return fetched, cached, failed
+
+
+_font = None
+
+
+def label_font():
+    """PIL's bitmap default font, loaded once
+
+    Drawing with the FreeType default costs ~0.4 ms per label, the bitmap font
+    ~15 us, which matters with dozens of aircraft labels per frame.
+    """
+    global _font
+    if _font is None:
+        load = getattr(ImageFont, "load_default_imagefont", ImageFont.load_default)
+        _font = load()
+    return _font
+
+
+def signal_color(signal_strength):
+    """Marker colour by signal strength, matching the old folium icon colours"""
+    if signal_strength > 50:
+        return (40, 160, 40)
+    if signal_strength > 25:
+        return (240, 150, 30)
+    return (210, 40, 40)
+
+
+class MapView:
+    """Pixel geometry of one map frame: size, zoom and the world pixel at its top-left corner"""
+    def __init__(self, width, height, center_lat, center_lon, zoom):
+        self.width = width
+        self.height = height
+        self.center = (center_lat, center_lon)
+        self.zoom = zoom
+        self.cx, self.cy = latlon_to_pixel(center_lat, center_lon, zoom)
+        self.left = int(self.cx - width / 2)
+        self.top = int(self.cy - height / 2)
+        self.world = TILE_SIZE * (1 << zoom)
+
+    def key(self):
+        return (round(self.center[0], 6), round(self.center[1], 6), self.zoom, self.width, self.height)
+
+    def project(self, lat, lon):
+        """Frame pixel coordinates of (lat, lon)"""
+        x, y = latlon_to_pixel(lat, lon, self.zoom)
+        # Keep points on the same side of the antimeridian as the centre
+        x += round((self.cx - x) / self.world) * self.world
+        return x - self.left, y - self.top
+
+    def project_arrays(self, lats, lons):
+        """Vectorized ``project``; returns (xs, ys) arrays"""
+        x, y = latlon_to_pixel_array(lats, lons, self.zoom)
+        x += np.round((self.cx - x) / self.world) * self.world
+        return x - self.left, y - self.top
+
+
+def draw_range_ring(img, view, tower, radar_range_km):
+    """Radar range circle with a translucent fill, blended only where the circle is"""
+    tx, ty = view.project(tower.lat, tower.lon)
+    radius_px = radar_range_km * 1000 / meters_per_pixel(tower.lat, view.zoom)
+    x0, y0 = max(0, int(tx - radius_px) - 2), max(0, int(ty - radius_px) - 2)
+    x1, y1 = min(view.width, int(tx + radius_px) + 3), min(view.height, int(ty + radius_px) + 3)
+    if x1 > x0 and y1 > y0:
+        overlay = Image.new("RGBA", (x1 - x0, y1 - y0), (0, 0, 0, 0))
+        box = [tx - radius_px - x0, ty - radius_px - y0, tx + radius_px - x0, ty + radius_px - y0]
+        ImageDraw.Draw(overlay).ellipse(box, fill=(40, 90, 220, 26), outline=(40, 90, 220, 255), width=2)
+        img.paste(overlay, (x0, y0), overlay)
+
+
+def draw_tower(draw, view, tower):
+    tx, ty = view.project(tower.lat, tower.lon)
+    draw.polygon([(tx, ty - 9), (tx - 7, ty + 6), (tx + 7, ty + 6)],
+                 fill=(200, 30, 30), outline=(255, 255, 255))
+    draw.text((tx + 10, ty - 6), tower.name, fill=(120, 0, 0), font=label_font())
+
+
+def draw_attribution(draw, view):
+    font = label_font()
+    text_width = draw.textlength(ATTRIBUTION, font=font)
+    draw.text((view.width - text_width - 4, view.height - 14), ATTRIBUTION, fill=(60, 60, 60), font=font)
+
+
+def aircraft_polygon(x, y, heading_deg):
+    """Arrowhead outline pointing along the heading, as a flat [x0, y0, x1, y1, ...] list"""
+    h = math.radians(heading_deg or 0.0)
+    points = []
+    for angle, r in ((0.0, 9), (2.5, 7), (math.pi, 3), (-2.5, 7)):
+        points.append(x + r * math.sin(h + angle))
+        points.append(y - r * math.cos(h + angle))
+    return points
+
+
+def aircraft_label(icao, ac):
+    return f"{ac.callsign or icao} {ac.altitude} ft"
+
+
+def _hex(color):
+    return "#%02x%02x%02x" % color
+
+
+class MapRenderer:
+    """Render radar frames from cached tiles, reusing the tile mosaic while the view is unchanged"""
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else TileCache()
+        self._base_key = None
+        self._base = None
+
+    def view(self, width, height, center, radar_range_km, zoom=None):
+        """MapView for a frame; ``zoom`` defaults to the highest level that fits the range circle"""
+        if zoom is None:
+            zoom = zoom_for_radius(center[0], radar_range_km, min(width, height))
+        return MapView(width, height, center[0], center[1], zoom)
+
+    def base_layer(self, view):
+        """Tile mosaic for a view, composited once per distinct view"""
+        key = view.key()
+        if key == self._base_key:
+            return self._base
+        left, top = view.left, view.top
+        base = Image.new("RGB", (view.width, view.height))
+        for ty in range(top // TILE_SIZE, (top + view.height - 1) // TILE_SIZE + 1):
+            for tx in range(left // TILE_SIZE, (left + view.width - 1) // TILE_SIZE + 1):
+                base.paste(self.cache.get(view.zoom, tx, ty),
+                           (tx * TILE_SIZE - left, ty * TILE_SIZE - top))
+        self._base_key = key
+        self._base = base
+        return base
+
+    def render(self, width, height, center=None, tower=None, aircraft=None,
+               radar_range_km=50, show_paths=True, zoom=None):
+        """Return a complete RGB image of the radar view
+
+        ``center`` defaults to the tower position. The live display uses
+        ``LayeredMap`` instead, which only redraws what changed.
+        """
+        layers = LayeredMap(self)
+        layers.set_view(width, height, center, tower, radar_range_km, zoom)
+        layers.update_tracks(aircraft or {}, show_paths)
+        return layers.compose(aircraft or {})
+
+
+class LayeredMap:
+    """Radar view split into cached layers that are only redrawn when dirty
+
+    * base: tile mosaic, rebuilt when the view moves or resizes
+    * static: base plus range ring, tower and attribution, rebuilt with the view,
+      tower or range
+    * tracks: static plus flight paths; new path segments are drawn onto it
+      incrementally and their bounding boxes recorded as dirty rectangles
+    * aircraft: live markers, not rasterized here at all; ``CanvasMapView``
+      keeps one canvas item per aircraft and just moves it
+
+    A refresh therefore costs one line segment and one marker move per
+    moving aircraft, independent of map size. Given an ``AircraftTable``
+    delta, only the aircraft it names are visited at all. Whole paths, drawn after a
+    rebuild, are Douglas-Peucker decimated to ``DECIMATE_PX`` first. Fixes
+    that age out of a track are erased by a rebuild at most every
+    ``TRIM_REBUILD_S`` seconds.
+    """
+    TRACK_WIDTH = 2
+    DECIMATE_PX = 0.75
+    TRIM_REBUILD_S = 10.0
+    SCALAR_SEGMENT = 8
+
+    def __init__(self, renderer=None):
+        self.renderer = renderer if renderer is not None else MapRenderer()
+        self.view = None
+        self.static = None
+        self.tracks = None
+        self._static_key = None
+        self._show_paths = True
+        self._drawn = {}  # icao: (track.appended, track.trimmed) when last drawn
+        self._last_rebuild = 0.0
+        self._trim_pending = False
+        self.dirty = []
+        self.full_redraw = True
+
+    def set_view(self, width, height, center=None, tower=None, radar_range_km=50, zoom=None):
+        """Set the frame geometry and static overlays; returns True if the static layer changed"""
+        if center is None:
+            center = (tower.lat, tower.lon)
+        view = self.renderer.view(width, height, center, radar_range_km, zoom)
+        tower_key = (tower.name, tower.lat, tower.lon) if tower is not None else None
+        key = (view.key(), tower_key, round(radar_range_km, 1))
+        if key == self._static_key:
+            return False
+
+        self.view = view
+        static = self.renderer.base_layer(view).copy()
+        if tower is not None:
+            draw_range_ring(static, view, tower, radar_range_km)
+        draw = ImageDraw.Draw(static)
+        if tower is not None:
+            draw_tower(draw, view, tower)
+        draw_attribution(draw, view)
+        self.static = static
+        self._static_key = key
+        self._reset_tracks()
+        return True
+
+    def _reset_tracks(self):
+        self.tracks = self.static.copy()
+        self._drawn = {}
+        self._last_rebuild = time.monotonic()
+        self._trim_pending = False
+        self.dirty = []
+        self.full_redraw = True
+
+    def _needs_rebuild(self, aircraft, icaos, removed):
+        if any(icao in self._drawn for icao in removed):
+            return True
+        drawn = self._drawn
+        if not self._trim_pending:
+            self._trim_pending = any(icao in drawn and aircraft[icao].track.trimmed != drawn[icao][1]
+                                     for icao in icaos)
+        return self._trim_pending and time.monotonic() - self._last_rebuild >= self.TRIM_REBUILD_S
+
+    def update_tracks(self, aircraft, show_paths=True, delta=None):
+        """Draw path segments added since the last call, rebuilding when aircraft or old fixes went away
+
+        With a ``TableDelta`` only the changed and removed aircraft are
+        looked at; without one every aircraft is.
+        """
+        if delta is None or delta.reset:
+            icaos = list(aircraft)
+            removed = [icao for icao in self._drawn if icao not in aircraft]
+        else:
+            icaos = [icao for icao in delta.changed if icao in aircraft]
+            removed = delta.removed
+        if show_paths != self._show_paths or self._needs_rebuild(aircraft, icaos, removed):
+            self._show_paths = show_paths
+            self._reset_tracks()
+        if not show_paths:
+            return
+        if not self._drawn:
+            icaos = list(aircraft)  # Fresh layer: every path has to be drawn
+
+        draw = ImageDraw.Draw(self.tracks)
+        project = self.view.project
+        project_arrays = self.view.project_arrays
+        pad = self.TRACK_WIDTH + 1
+        for icao in icaos:
+            ac = aircraft[icao]
+            track = ac.track
+            if not track:
+                continue
+            state = self._drawn.get(icao)
+            if state is None:
+                # Whole path, decimated
+                lats, lons, _, _ = track.arrays()
+                xs, ys = project_arrays(lats, lons)
+                keep = douglas_peucker(xs, ys, self.DECIMATE_PX)
+                xs, ys = xs[keep].tolist(), ys[keep].tolist()
+            else:
+                new = track.appended - state[0]
+                if new <= 0:
+                    continue
+                # Start from the last drawn fix so the new segment joins the old path
+                first = max(0, len(track) - new - 1)
+                if len(track) - first <= self.SCALAR_SEGMENT:
+                    # A fix or two per refresh: scalar projection beats array setup
+                    points = [project(*track.fix(k)[:2]) for k in range(first, len(track))]
+                    xs = [x for x, _ in points]
+                    ys = [y for _, y in points]
+                else:
+                    lats, lons, _, _ = track.arrays(first)
+                    xs, ys = (a.tolist() for a in project_arrays(lats, lons))
+            self._drawn[icao] = (track.appended, state[1] if state else track.trimmed)
+            if len(xs) < 2:
+                continue
+            draw.line(list(zip(xs, ys)), fill=signal_color(ac.signal_strength), width=self.TRACK_WIDTH)
+            if not self.full_redraw:
+                self.dirty.append((int(min(xs)) - pad, int(min(ys)) - pad,
+                                   int(max(xs)) + pad + 1, int(max(ys)) + pad + 1))
+
+    def take_dirty(self):
+        """Return (full_redraw, dirty rectangles) accumulated since the last call and reset them"""
+        full, dirty = self.full_redraw, self.dirty
+        self.full_redraw = False
+        self.dirty = []
+        return full, dirty
+
+    def markers(self, aircraft, icaos=None):
+        """Yield (icao, x, y, heading, color, label) for every aircraft, or those in ``icaos``, with a position"""
+        project = self.view.project
+        for icao in (aircraft if icaos is None else icaos):
+            ac = aircraft.get(icao)
+            if ac is not None and ac.track:
+                lat, lon, _, _ = ac.track.last()
+                x, y = project(lat, lon)
+                yield icao, x, y, ac.heading, signal_color(ac.signal_strength), aircraft_label(icao, ac)
+
+    def compose(self, aircraft):
+        """Flatten the tracks layer and aircraft markers into one image, for export and the CLI"""
+        img = self.tracks.copy()
+        draw = ImageDraw.Draw(img)
+        font = label_font()
+        for _, x, y, heading, color, label in self.markers(aircraft):
+            draw.polygon(aircraft_polygon(x, y, heading), fill=color, outline=(255, 255, 255))
+            draw.text((x + 9, y - 6), label, fill=(20, 20, 20), font=font)
+        return img
+
+
+class CanvasMapView:
+    """Shows a LayeredMap on a Tk canvas, blitting only the cells that changed
+
+    The tracks layer is shown as a grid of ``cell``-sized PhotoImages, so a
+    dirty rectangle only re-uploads the few cells it touches. Aircraft are
+    canvas polygons and text items moved in place.
+    """
+    def __init__(self, canvas, cell=128):
+        self.canvas = canvas
+        self.cell = cell
+        self._cells = {}  # (col, row): (PhotoImage, canvas item)
+        self._grid_size = None
+        self._markers = {}  # icao: (polygon item, text item)
+        self.cells_blitted = 0
+
+    def _cell_box(self, col, row, width, height):
+        x0, y0 = col * self.cell, row * self.cell
+        return (x0, y0, min(width, x0 + self.cell), min(height, y0 + self.cell))
+
+    def _rebuild_cells(self, image):
+        for _, item in self._cells.values():
+            self.canvas.delete(item)
+        self._cells = {}
+        width, height = image.size
+        for row in range((height + self.cell - 1) // self.cell):
+            for col in range((width + self.cell - 1) // self.cell):
+                box = self._cell_box(col, row, width, height)
+                photo = ImageTk.PhotoImage(image.crop(box))
+                item = self.canvas.create_image(box[0], box[1], anchor="nw", image=photo, tags=("map_cell",))
+                self._cells[(col, row)] = (photo, item)
+        self.canvas.tag_lower("map_cell")
+        self._grid_size = image.size
+        self.cells_blitted += len(self._cells)
+
+    def _blit(self, image, rects):
+        width, height = image.size
+        touched = set()
+        for x0, y0, x1, y1 in rects:
+            x0, y0 = max(0, x0), max(0, y0)
+            x1, y1 = min(width, x1), min(height, y1)
+            if x1 <= x0 or y1 <= y0:
+                continue
+            for row in range(y0 // self.cell, (y1 - 1) // self.cell + 1):
+                for col in range(x0 // self.cell, (x1 - 1) // self.cell + 1):
+                    touched.add((col, row))
+        for key in touched:
+            photo, _ = self._cells[key]
+            photo.paste(image.crop(self._cell_box(key[0], key[1], width, height)))
+        self.cells_blitted += len(touched)
+
+    def show(self, layers, aircraft, delta=None):
+        """Push pending layer changes and move aircraft markers
+
+        With a ``TableDelta`` and an unchanged view only the markers of
+        changed and removed aircraft are touched.
+        """
+        full, dirty = layers.take_dirty()
+        image = layers.tracks
+        if full or image.size != self._grid_size:
+            self._rebuild_cells(image)
+        elif dirty:
+            self._blit(image, dirty)
+
+        if full or delta is None or delta.reset:
+            icaos = None
+            gone = None
+        else:
+            icaos = delta.changed
+            gone = delta.removed
+        seen = set()
+        for icao, x, y, heading, color, label in layers.markers(aircraft, icaos):
+            seen.add(icao)
+            items = self._markers.get(icao)
+            if items is None:
+                items = (
+                    self.canvas.create_polygon(aircraft_polygon(x, y, heading), fill=_hex(color),
+                                               outline="white", tags=("map_aircraft",)),
+                    self.canvas.create_text(x + 9, y - 6, text=label, anchor="w",
+                                            fill="#141414", tags=("map_aircraft",)),
+                )
+                self._markers[icao] = items
+            else:
+                self.canvas.coords(items[0], *aircraft_polygon(x, y, heading))
+                self.canvas.itemconfig(items[0], fill=_hex(color))
+                self.canvas.coords(items[1], x + 9, y - 6)
+                self.canvas.itemconfig(items[1], text=label)
+        if gone is None:
+            gone = [icao for icao in self._markers if icao not in seen]
+        else:
+            # Changed aircraft that lost their position lose their marker too
+            gone = list(gone) + [icao for icao in icaos if icao not in seen]
+        for icao in gone:
+            for item in self._markers.pop(icao, ()):
+                self.canvas.delete(item)
+
+
+def _parse_zooms(text):
+    lo, _, hi = text.partition("-")
+    return range(int(lo), int(hi or lo) + 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed and test the offline map tile cache")
+    parser.add_argument("--cache-dir", default=DEFAULT_TILE_CACHE)
+    parser.add_argument("--url", default=DEFAULT_TILE_URL, help="Tile URL template with {z} {x} {y}")
+    sub = parser.add_subparsers(dest="command", required=True)
+    seed = sub.add_parser("seed", help="Download tiles for an operating area")
+    seed.add_argument("--lat", type=float, required=True)
+    seed.add_argument("--lon", type=float, required=True)
+    seed.add_argument("--radius-km", type=float, default=100.0)
+    seed.add_argument("--zooms", type=_parse_zooms, default=_parse_zooms("6-12"),
+                      help="Zoom level or range, e.g. 6-12")
+    seed.add_argument("--delay", type=float, default=0.1, help="Seconds between downloads")
+    render = sub.add_parser("render", help="Render a view from the cache to a PNG")
+    render.add_argument("--lat", type=float, required=True)
+    render.add_argument("--lon", type=float, required=True)
+    render.add_argument("--range-km", type=float, default=50.0)
+    render.add_argument("--size", default="800x600")
+    render.add_argument("--out", default="map.png")
+    args = parser.parse_args(argv)
+
+    cache = TileCache(args.cache_dir, url_template=args.url)
+    if args.command == "seed":
+        tiles = sum(1 for z in args.zooms for _ in tiles_for_area(args.lat, args.lon, args.radius_km, z))
+        print(f"Seeding {tiles} tiles into {args.cache_dir}")
+        _, _, failed = seed_tiles(cache, args.lat, args.lon, args.radius_km, args.zooms, args.delay)
+        return 1 if failed else 0
+
+    width, _, height = args.size.partition("x")
+    start = time.perf_counter()
+    img = MapRenderer(cache).render(int(width), int(height), center=(args.lat, args.lon),
+                                    radar_range_km=args.range_km)
+    elapsed = time.perf_counter() - start
+    img.save(args.out)
+    print(f"Rendered {args.out} in {elapsed * 1e3:.1f} ms ({cache.misses} tiles not cached)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""Low-overhead pipeline instrumentation for SDR Tools.
+
+Counters, gauges and latency histograms live in a ``MetricsRegistry``. Each
+metric is meant to be written by a single pipeline thread, so updates are
+plain attribute arithmetic with no locking on the hot path; readers (the HTTP
+endpoint and the periodic log line) only ever take snapshots.
+"""
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import queue
+import threading
+import time
+
+# Latency buckets in seconds, from 50 us up to 2.5 s
+DEFAULT_BUCKETS = (
+    50e-6, 100e-6, 250e-6, 500e-6,
+    1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3, 100e-3, 250e-3, 500e-3,
+    1.0, 2.5,
+)
+
+
+class Counter:
+    """Monotonic event or sample counter"""
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+
+class Gauge:
+    """Point-in-time value that also remembers its high-water mark"""
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0
+        self.high_water = 0
+
+    def set(self, value):
+        self.value = value
+        if value > self.high_water:
+            self.high_water = value
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is a bisect and two increments"""
+    kind = "histogram"
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Approximate quantile as the upper bound of the bucket holding it"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for i, n in enumerate(self.counts):
+            running += n
+            if running >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class MetricsRegistry:
+    """Named metrics with optional labels, e.g. ``counter("samples_total", stage="read")``"""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def _get(self, cls, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(key, cls())
+        return metric
+
+    def counter(self, name, **labels):
+        return self._get(Counter, name, labels)
+
+    def gauge(self, name, **labels):
+        return self._get(Gauge, name, labels)
+
+    def histogram(self, name, **labels):
+        return self._get(Histogram, name, labels)
+
+    def items(self):
+        with self._lock:
+            return sorted(self._metrics.items(), key=lambda kv: kv[0])
+
+    def snapshot(self):
+        """Return a JSON-serializable copy of every metric"""
+        snap = {"uptime_s": time.time() - self.started, "metrics": []}
+        for (name, labels), m in self.items():
+            entry = {"name": name, "labels": dict(labels), "type": m.kind}
+            if m.kind == "counter":
+                entry["value"] = m.value
+            elif m.kind == "gauge":
+                entry["value"] = m.value
+                entry["high_water"] = m.high_water
+            else:
+                entry.update(count=m.count, sum=m.sum,
+                             p50=m.quantile(0.5), p95=m.quantile(0.95))
+            snap["metrics"].append(entry)
+        return snap
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        seen = set()
+        for (name, labels), m in self.items():
+            if name not in seen:
+                lines.append(f"# TYPE {name} {m.kind}")
+                seen.add(name)
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+            braces = f"{{{label_str}}}" if label_str else ""
+            if m.kind == "histogram":
+                running = 0
+                for bound, n in zip(m.buckets + (float("inf"),), m.counts):
+                    running += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    sep = "," if label_str else ""
+                    lines.append(f'{name}_bucket{{{label_str}{sep}le="{le}"}} {running}')
+                lines.append(f"{name}_sum{braces} {m.sum}")
+                lines.append(f"{name}_count{braces} {m.count}")
+            elif m.kind == "gauge":
+                lines.append(f"{name}{braces} {m.value}")
+                lines.append(f"{name}_high_water{braces} {m.high_water}")
+            else:
+                lines.append(f"{name}{braces} {m.value}")
+        return "\n".join(lines) + "\n"
+
+    def summary_line(self):
+        """One-line human summary for the periodic log"""
+        parts = []
+        for (name, labels), m in self.items():
+            label = "/".join(str(v) for _, v in labels)
+            tag = f"{name}[{label}]" if label else name
+            if m.kind == "counter" and m.value:
+                parts.append(f"{tag}={m.value}")
+            elif m.kind == "gauge" and m.high_water:
+                parts.append(f"{tag}={m.value}(hwm {m.high_water})")
+            elif m.kind == "histogram" and m.count:
+                parts.append(f"{tag} p50={m.quantile(0.5) * 1e3:.2f}ms p95={m.quantile(0.95) * 1e3:.2f}ms")
+        return " | ".join(parts) if parts else "no activity"
+
+
+class InstrumentedQueue(queue.Queue):
+    """``queue.Queue`` that records depth, high-water mark, blocked and dropped puts and starved gets
+
+    A get only counts as starved when a blocking get times out; draining with
+    ``get_nowait`` until ``queue.Empty`` is normal and is not counted.
+    """
+    def __init__(self, maxsize, metrics, name):
+        super().__init__(maxsize)
+        self.depth = metrics.gauge("queue_depth", queue=name)
+        self.blocked_puts = metrics.counter("queue_blocked_puts_total", queue=name)
+        self.dropped_puts = metrics.counter("queue_dropped_puts_total", queue=name)
+        self.starved_gets = metrics.counter("queue_starved_gets_total", queue=name)
+
+    def put(self, item, block=True, timeout=None):
+        try:
+            super().put(item, block=False)
+        except queue.Full:
+            if not block:
+                self.dropped_puts.inc()
+                raise
+            self.blocked_puts.inc()
+            try:
+                super().put(item, block=True, timeout=timeout)
+            except queue.Full:
+                self.dropped_puts.inc()
+                raise
+        self.depth.set(self.qsize())
+
+    def get(self, block=True, timeout=None):
+        try:
+            item = super().get(block, timeout)
+        except queue.Empty:
+            if block:
+                self.starved_gets.inc()  # Consumer waited out its timeout with nothing to do
+            raise
+        self.depth.set(self.qsize())
+        return item
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body = json.dumps(self.registry.snapshot(), indent=2).encode()
+            content_type = "application/json"
+        elif self.path.startswith("/metrics"):
+            body = self.registry.render_prometheus().encode()
+            content_type = "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the console
+
+
+def start_metrics_server(registry, port, host="127.0.0.1"):
+    """Serve /metrics (Prometheus text) and /metrics.json on a local port in a daemon thread"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Metrics endpoint at http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def start_metrics_logger(registry, interval_s):
+    """Print ``registry.summary_line()`` every ``interval_s`` seconds from a daemon thread"""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval_s):
+            print(f"[metrics] {registry.summary_line()}")
+    threading.Thread(target=run, daemon=True).start()
+    return stop
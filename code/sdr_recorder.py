@@ -0,0 +1,425 @@
+"""Voice-activated recording of police and airport audio.
+
+A monitored channel is silent most of the night, so only the time the
+squelch is open is kept. ``ChannelRecorder`` runs on the reader thread of
+each channel and does the cheap part:
+
+- The 32 kHz audio is resampled to ``RECORD_RATE``. Voice stops at 3.4 kHz,
+  so 16 kHz loses nothing and halves the disk.
+- While the squelch is closed, the last ``PRE_ROLL_S`` of audio is kept in
+  a ring, so the first syllable before the squelch opened is not lost.
+- A segment starts when the squelch opens and ends once it has been closed
+  for ``HANG_S``. A reply within the hang time stays in the same segment.
+
+The squelch state comes from the pipeline (the player's gate or an AM
+carrier squelch). When the pipeline has none, the recorder opens on the
+audio level itself.
+
+``RecordingWriter`` owns the files. Chunks reach it through a queue, and
+its thread wakes every ``BATCH_S`` and writes everything that arrived in
+one call per file. Files are per channel and per day:
+
+    ~/sdr_recordings/2024-05-01/police-460.0250.flac
+    ~/sdr_recordings/2024-05-01/police-460.0250.segments.jsonl
+
+The index holds one JSON line per segment: wall-clock start, offset into
+the audio file, duration, frequency and peak level. A player can seek
+straight to a transmission. FLAC is written when the optional
+``soundfile`` package is installed, otherwise WAV. The WAV header is
+rewritten after every batch, so a crash loses at most the last second.
+
+    python code/sdr_recorder.py list ~/sdr_recordings/2024-05-01
+    python code/sdr_recorder.py extract police-460.0250.flac 3 call.wav
+"""
+import argparse
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+from sdr_dsp import AUDIO_RATE, Resampler
+
+RECORD_RATE = 16000          # Voice band only; half the 32 kHz of the audio paths
+PRE_ROLL_S = 0.5             # Audio kept from before the squelch opened
+HANG_S = 2.0                 # Squelch closed this long ends the segment
+VOX_LEVEL = 0.05             # RMS (full scale 1.0) that opens the recorder when the pipeline has no squelch
+BATCH_S = 1.0                # Writer thread wakes this often and writes what has queued up
+QUEUE_CHUNKS = 1024          # ~2 minutes of 4 KB chunks before the audio threads start dropping
+DEFAULT_RECORDING_DIR = os.path.join(os.path.expanduser("~"), "sdr_recordings")
+INDEX_SUFFIX = ".segments.jsonl"
+
+# Writer queue operations
+START, AUDIO, END, CLOSE = range(4)
+
+
+@lru_cache(maxsize=1)
+def soundfile():
+    """The optional ``soundfile`` module for FLAC, or None if it is not installed"""
+    try:
+        import soundfile
+    except ImportError:
+        return None
+    return soundfile
+
+
+def recording_format():
+    return "flac" if soundfile() is not None else "wav"
+
+
+def peak_dbfs(peak):
+    """Peak sample magnitude (int16) as dB below full scale"""
+    return round(20.0 * np.log10(max(int(peak), 1) / 32768.0), 1)
+
+
+def channel_stem(name, freq_mhz):
+    return f"{name}-{freq_mhz:.4f}"
+
+
+class AudioFile:
+    """One day's recording of a channel and its segment index"""
+    def __init__(self, path, rate=RECORD_RATE):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + INDEX_SUFFIX
+        self.day = os.path.basename(os.path.dirname(path))
+        self.rate = rate
+        self.frames = 0
+        if path.endswith(".flac"):
+            self._raw = None
+            self._sound = soundfile().SoundFile(path, mode="w", samplerate=rate, channels=1,
+                                                format="FLAC", subtype="PCM_16")
+        else:
+            self._sound = None
+            self._raw = open(path, "wb")
+            self._wave = wave.open(self._raw, "wb")
+            self._wave.setnchannels(1)
+            self._wave.setsampwidth(2)
+            self._wave.setframerate(rate)
+        self._index = open(self.index_path, "a", encoding="utf-8")
+
+    @property
+    def position_s(self):
+        return self.frames / self.rate
+
+    def write(self, samples):
+        if self._sound is not None:
+            self._sound.write(samples)
+        else:
+            self._wave.writeframes(samples.tobytes())  # Also patches the header lengths
+        self.frames += len(samples)
+
+    def add_segment(self, entry):
+        self._index.write(json.dumps(entry) + "\n")
+
+    def flush(self):
+        if self._sound is not None:
+            self._sound.flush()
+        else:
+            self._raw.flush()
+        self._index.flush()
+
+    def close(self):
+        if self._sound is not None:
+            self._sound.close()
+        else:
+            self._wave.close()
+            self._raw.close()
+        self._index.close()
+
+
+def day_path(directory, stem, day, extension):
+    """Path for ``stem`` on ``day``; a second run on the same day gets -2, -3, ... since files are not appended"""
+    folder = os.path.join(directory, day)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{stem}.{extension}")
+    part = 1
+    while os.path.exists(path):
+        part += 1
+        path = os.path.join(folder, f"{stem}-{part}.{extension}")
+    return path
+
+
+class RecordingWriter:
+    """Background thread that writes queued segments to per-channel, per-day files"""
+    def __init__(self, directory=DEFAULT_RECORDING_DIR, metrics=None, extension=None):
+        self.directory = directory
+        self.extension = extension or recording_format()
+        self.metrics = metrics
+        self.segments = 0
+        self.bytes_written = 0
+        self.errors = 0
+        self.last_error = None
+        self._queue = queue.Queue(QUEUE_CHUNKS)
+        self._files = {}      # stem -> AudioFile
+        self._open = {}       # stem -> index entry of the segment being written
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def channel(self, name, freq_mhz, **kwargs):
+        """A ChannelRecorder feeding this writer"""
+        return ChannelRecorder(self, name, freq_mhz, **kwargs)
+
+    def submit(self, op, stem, payload=None):
+        """Queue an operation from an audio thread
+
+        Audio is dropped rather than block the thread if the disk cannot
+        keep up; segment starts and ends wait for room.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put((op, stem, payload), block=op != AUDIO)
+            return True
+        except queue.Full:
+            if self.metrics is not None:
+                self.metrics.counter("recorder_dropped_chunks_total").inc()
+            return False
+
+    def _run(self):
+        while not self._stop.wait(BATCH_S):
+            self._drain()
+        self._drain()
+        for stem in list(self._files):
+            self._close_file(stem)
+
+    def _drain(self):
+        """Apply everything queued, merging consecutive chunks of a channel into one write"""
+        pending = {}  # stem -> chunks not yet written
+        while True:
+            try:
+                op, stem, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if op == AUDIO:
+                pending.setdefault(stem, []).append(payload)
+                continue
+            self._write_pending(stem, pending.pop(stem, None))
+            try:
+                if op == START:
+                    self._start(stem, payload)
+                elif op == END:
+                    self._end(stem, payload)
+                elif op == CLOSE:
+                    self._close_file(stem)
+            except (OSError, RuntimeError) as e:
+                self._failed(stem, e)
+        for stem, chunks in pending.items():
+            self._write_pending(stem, chunks)
+        for stem, audio_file in list(self._files.items()):
+            try:
+                audio_file.flush()
+            except (OSError, RuntimeError) as e:
+                self._failed(stem, e)
+
+    def _write_pending(self, stem, chunks):
+        audio_file = self._files.get(stem)
+        if not chunks or audio_file is None or stem not in self._open:
+            return
+        samples = np.concatenate(chunks)
+        try:
+            audio_file.write(samples)
+        except (OSError, RuntimeError) as e:
+            self._failed(stem, e)
+            return
+        self.bytes_written += samples.nbytes
+        if self.metrics is not None:
+            self.metrics.counter("recorder_bytes_total").inc(samples.nbytes)
+
+    def _start(self, stem, entry):
+        day = datetime.fromtimestamp(entry["t"]).strftime("%Y-%m-%d")
+        audio_file = self._files.get(stem)
+        if audio_file is not None and audio_file.day != day:
+            self._close_file(stem)  # Past midnight: the new segment goes into the new day's file
+            audio_file = None
+        if audio_file is None:
+            audio_file = self._files[stem] = AudioFile(day_path(self.directory, stem, day, self.extension))
+        entry = dict(entry, offset_s=round(audio_file.position_s, 3))
+        entry["start"] = datetime.fromtimestamp(entry.pop("t")).isoformat(timespec="seconds")
+        self._open[stem] = entry
+
+    def _end(self, stem, summary):
+        entry = self._open.pop(stem, None)
+        audio_file = self._files.get(stem)
+        if entry is None or audio_file is None:
+            return
+        entry["duration_s"] = round(audio_file.position_s - entry["offset_s"], 3)
+        entry["peak_dbfs"] = peak_dbfs(summary["peak"])
+        audio_file.add_segment(entry)
+        self.segments += 1
+        if self.metrics is not None:
+            self.metrics.counter("recorder_segments_total").inc()
+
+    def _close_file(self, stem):
+        if stem in self._open:
+            self._end(stem, {"peak": 0})
+        audio_file = self._files.pop(stem, None)
+        if audio_file is not None:
+            audio_file.close()
+
+    def _failed(self, stem, error):
+        self.errors += 1
+        self.last_error = f"{stem}: {error}"
+        print(f"Recorder error: {self.last_error}")
+        self._open.pop(stem, None)
+        audio_file = self._files.pop(stem, None)
+        if audio_file is not None:
+            try:
+                audio_file.close()
+            except (OSError, RuntimeError):
+                pass
+
+    def close(self, timeout=5.0):
+        """Finish open segments, write what is queued and close every file"""
+        with self._lock:  # A submit meanwhile waits, then starts a fresh thread
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._stop.set()
+                thread.join(timeout)
+
+
+class ChannelRecorder:
+    """Squelch-driven segmenting of one channel's audio; called from its reader thread"""
+    def __init__(self, writer, name, freq_mhz, rate=AUDIO_RATE, pre_roll_s=PRE_ROLL_S, hang_s=HANG_S,
+                 level=VOX_LEVEL, clock=time.time):
+        self.writer = writer
+        self.stem = channel_stem(name, freq_mhz)
+        self.name = name
+        self.freq_mhz = freq_mhz
+        self.level = level
+        self.clock = clock
+        self.resampler = Resampler(RECORD_RATE, int(rate))
+        self.pre_roll = int(pre_roll_s * RECORD_RATE)
+        self.hang = int(hang_s * RECORD_RATE)
+        self._ring = deque()
+        self._ring_samples = 0
+        self.recording = False
+        self.closed = False
+        self._closed_for = 0   # Samples since the squelch last closed, while recording
+        self._peak = 0
+
+    def process(self, data, squelch_open=None):
+        """Feed one chunk of s16 audio at ``rate``; ``squelch_open`` None decides from the level"""
+        pcm = np.frombuffer(data, dtype=np.int16, count=len(data) // 2)
+        if not len(pcm) or self.closed:
+            return
+        x = pcm / np.float32(32768.0)
+        if squelch_open is None:
+            squelch_open = float(np.sqrt(np.mean(x * x))) >= self.level
+        samples = np.clip(self.resampler.process(x) * 32768.0, -32768, 32767).astype(np.int16)
+        if not self.recording:
+            if squelch_open:
+                self._start(samples)
+                return
+            self._ring.append(samples)
+            self._ring_samples += len(samples)
+            while self._ring and self._ring_samples - len(self._ring[0]) >= self.pre_roll:
+                self._ring_samples -= len(self._ring.popleft())
+            return
+        self._peak = max(self._peak, int(np.abs(samples.astype(np.int32)).max()))
+        self.writer.submit(AUDIO, self.stem, samples)
+        self._closed_for = 0 if squelch_open else self._closed_for + len(samples)
+        if self._closed_for >= self.hang:
+            self._end()
+
+    def _start(self, samples):
+        pre_roll = np.concatenate(self._ring)[-self.pre_roll:] if self._ring and self.pre_roll else samples[:0]
+        self._ring.clear()
+        self._ring_samples = 0
+        audio = np.concatenate((pre_roll, samples))
+        t = self.clock() - len(audio) / RECORD_RATE
+        self.writer.submit(START, self.stem, {"t": t, "freq_mhz": round(self.freq_mhz, 4), "channel": self.name})
+        self.writer.submit(AUDIO, self.stem, audio)
+        self.recording = True
+        self._closed_for = 0
+        self._peak = int(np.abs(audio.astype(np.int32)).max()) if len(audio) else 0
+
+    def _end(self):
+        self.writer.submit(END, self.stem, {"peak": self._peak})
+        self.recording = False
+
+    def close(self):
+        """End any open segment and close this channel's file"""
+        self.closed = True
+        if self.recording:
+            self._end()
+        self.writer.submit(CLOSE, self.stem)
+        self.resampler.reset()
+        self._ring.clear()
+        self._ring_samples = 0
+
+
+def read_index(path):
+    """Segments listed in an index file (or the index next to an audio file)"""
+    if not path.endswith(INDEX_SUFFIX):
+        path = os.path.splitext(path)[0] + INDEX_SUFFIX
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def read_segment(path, entry):
+    """int16 samples and rate of one indexed segment of an audio file"""
+    if path.endswith(".flac"):
+        if soundfile() is None:
+            raise RuntimeError("Reading FLAC needs the soundfile package")
+        with soundfile().SoundFile(path) as f:
+            f.seek(int(entry["offset_s"] * f.samplerate))
+            return f.read(int(entry["duration_s"] * f.samplerate), dtype="int16"), f.samplerate
+    with wave.open(path, "rb") as f:
+        rate = f.getframerate()
+        f.setpos(int(entry["offset_s"] * rate))
+        data = f.readframes(int(entry["duration_s"] * rate))
+    return np.frombuffer(data, dtype=np.int16), rate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List and extract voice-activated recordings")
+    sub = parser.add_subparsers(dest="command", required=True)
+    listing = sub.add_parser("list", help="List the segments of recordings in a folder or of one file")
+    listing.add_argument("path", nargs="?", default=DEFAULT_RECORDING_DIR)
+    extract = sub.add_parser("extract", help="Write one segment of a recording to a WAV file")
+    extract.add_argument("recording")
+    extract.add_argument("segment", type=int, help="Segment number, as shown by list")
+    extract.add_argument("output")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        if os.path.isdir(args.path):
+            indexes = sorted(os.path.join(folder, name) for folder, _, names in os.walk(args.path)
+                             for name in names if name.endswith(INDEX_SUFFIX))
+        else:
+            indexes = [args.path]
+        for index in indexes:
+            segments = read_index(index)
+            total = sum(s["duration_s"] for s in segments)
+            print(f"{index[:-len(INDEX_SUFFIX)]}: {len(segments)} segments, {total:.0f} s")
+            for n, s in enumerate(segments):
+                print(f"  {n:4d}  {s['start']}  {s['freq_mhz']:.4f} MHz  {s['duration_s']:6.1f} s  "
+                      f"at {s['offset_s']:8.1f} s  peak {s['peak_dbfs']:.1f} dBFS")
+        return 0
+
+    segments = read_index(args.recording)
+    if not 0 <= args.segment < len(segments):
+        parser.error(f"{args.recording} has {len(segments)} segments")
+    samples, rate = read_segment(args.recording, segments[args.segment])
+    with wave.open(args.output, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+    print(f"Wrote {len(samples) / rate:.1f} s to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
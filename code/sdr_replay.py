@@ -0,0 +1,357 @@
+"""Record airport sessions and replay them faster than real time.
+
+A session log is an append-only binary file: an 8-byte magic followed by
+records of
+
+    float64 epoch seconds | uint8 kind | uint32 payload length | payload
+
+Kinds are session info (JSON: tower, radar range), decoded ADS-B frames
+(float32 signal + the 14 Mode S bytes, 31 bytes a message in all), raw
+2 MS/s ADS-B IQ blocks and 32 kHz airband PCM. A session recorded with IQ
+keeps the blocks instead of the frames decoded from them, and replay
+decodes them again. A log cut short by a crash just ends at its last
+complete record.
+
+``ReplayDriver`` reads a log back in batches, paced at any speed multiple
+of the recorded timing or as fast as possible, so an afternoon of traffic
+can be pushed through the tracker and map in seconds:
+
+    python code/sdr_replay.py synth busy.sdrlog --aircraft 200 --minutes 30
+    python code/sdr_replay.py replay busy.sdrlog --speed max
+    python code/sdr_replay.py info session.sdrlog
+"""
+import argparse
+from collections import namedtuple
+from datetime import datetime
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+MAGIC = b"SDRLOG\x01\n"
+RECORD = struct.Struct("<dBI")
+SIGNAL = struct.Struct("<f")
+DEFAULT_SESSION_DIR = os.path.join(os.path.expanduser("~"), "sdr_sessions")
+FLUSH_INTERVAL_S = 1.0
+
+SESSION = 0  # JSON session info
+FRAME = 1    # Decoded ADS-B frame: float32 signal + Mode S bytes
+IQ = 2       # Raw rtl_sdr bytes from the ADS-B receiver
+AUDIO = 3    # Airband audio, 16-bit PCM at 32 kHz
+KIND_NAMES = {SESSION: "session", FRAME: "frame", IQ: "iq", AUDIO: "audio"}
+
+Record = namedtuple("Record", "t kind payload")
+
+
+def session_path(directory=DEFAULT_SESSION_DIR, prefix="airport"):
+    """A new timestamped log path in ``directory``, creating the directory"""
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{prefix}-{datetime.now():%Y%m%d-%H%M%S}.sdrlog")
+
+
+class SessionRecorder:
+    """Append records to a session log; safe to call from several reader threads"""
+    def __init__(self, path, record_iq=False):
+        self.path = path
+        self.record_iq = record_iq
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab", buffering=256 * 1024)
+        if new:
+            self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.records = 0
+        self.bytes_written = 0
+
+    def _write(self, t, kind, payload):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(RECORD.pack(t, kind, len(payload)))
+            self._file.write(payload)
+            self.records += 1
+            self.bytes_written += RECORD.size + len(payload)
+            if time.monotonic() - self._last_flush >= FLUSH_INTERVAL_S:
+                self._file.flush()
+                self._last_flush = time.monotonic()
+
+    def session(self, t, **info):
+        """Record session info such as the tower and radar range"""
+        self._write(t, SESSION, json.dumps(info).encode("utf-8"))
+
+    def frames(self, frames, times):
+        """Record decoded ADS-B frames (``sdr_adsb.Frame``) with the epoch arrival time of each
+
+        Skipped when recording IQ: replay decodes the frames from the IQ, and
+        having both would apply every frame twice.
+        """
+        if self.record_iq:
+            return
+        for frame, t in zip(frames, times):
+            self._write(t, FRAME, SIGNAL.pack(frame.signal) + frame.data)
+
+    def iq(self, raw, t):
+        if self.record_iq:
+            self._write(t, IQ, raw)
+
+    def audio(self, pcm, t):
+        self._write(t, AUDIO, pcm)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_session(path):
+    """Yield the Records of a session log in order, stopping at a truncated tail"""
+    with open(path, "rb", buffering=1024 * 1024) as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session log")
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            t, kind, length = RECORD.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield Record(t, kind, payload)
+
+
+def frame_from_record(record):
+    """(signal, data) of a FRAME record"""
+    return SIGNAL.unpack_from(record.payload)[0], record.payload[SIGNAL.size:]
+
+
+def parse_speed(text):
+    """'1', '10x' or 'max' to a speed multiple, None meaning as fast as possible"""
+    text = str(text).strip().lower()
+    if text in ("max", "0", ""):
+        return None
+    speed = float(text[:-1] if text.endswith("x") else text)
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    return speed
+
+
+class ReplayDriver:
+    """Paced batches of a session log's records
+
+    ``batches`` groups records into ``batch_s`` slices of session time and,
+    unless ``speed`` is None, sleeps so each slice is released at
+    ``speed`` times its recorded pace. ``session_time`` is the replayed
+    clock, for consumers that expire or age state by time.
+    """
+    def __init__(self, records, speed=1.0, batch_s=0.1, clock=time.monotonic, sleep=time.sleep):
+        self.records = records
+        self.speed = speed
+        self.batch_s = batch_s
+        self.clock = clock
+        self.sleep = sleep
+        self.stopped = False
+        self._session_t = None
+        self.replayed = 0
+
+    def session_time(self):
+        return self._session_t if self._session_t is not None else time.time()
+
+    def stop(self):
+        self.stopped = True
+
+    def batches(self):
+        """Yield (session time at the end of the batch, [Record]) until the log ends or ``stop``"""
+        t0 = wall0 = None
+        batch = []
+        batch_end = None
+        for record in self.records:
+            if self.stopped:
+                return
+            if t0 is None:
+                t0, wall0 = record.t, self.clock()
+                batch_end = t0 + self.batch_s
+            if record.t >= batch_end and batch:
+                yield self._release(batch_end, batch, t0, wall0)
+                batch = []
+                while record.t >= batch_end:
+                    batch_end += self.batch_s
+            batch.append(record)
+        if batch and not self.stopped:
+            yield self._release(max(r.t for r in batch), batch, t0, wall0)
+
+    def _release(self, batch_end, batch, t0, wall0):
+        if self.speed is not None:
+            delay = wall0 + (batch_end - t0) / self.speed - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+        self._session_t = batch_end
+        self.replayed += len(batch)
+        return batch_end, batch
+
+
+def replay_frames(batch, decoder=None):
+    """[(t, sdr_adsb.Frame)] for a batch: FRAME records as is, IQ records through ``decoder``
+
+    Frames decoded from an IQ block are dated from their position in it, as
+    the live receiver does.
+    """
+    from sdr_adsb import Frame, frame_times
+    frames = []
+    for record in batch:
+        if record.kind == FRAME:
+            signal, data = frame_from_record(record)
+            frames.append((record.t, Frame(0, data, signal)))
+        elif record.kind == IQ and decoder is not None:
+            decoded = decoder.process(record.payload)
+            frames.extend(zip(frame_times(decoded, decoder.samples, record.t), decoded))
+    return frames
+
+
+def synthetic_session(path, n_aircraft=50, minutes=10, lat=40.6413, lon=-73.7781, start=None, seed=0):
+    """Write a session log of ``n_aircraft`` synthetic tracks around (lat, lon); returns frames written"""
+    import math
+    import numpy as np
+    import sdr_adsb
+    import sdr_synth
+    from sdr_adsb import Frame
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1, 12, 0, 0).timestamp() if start is None else start
+    seconds = int(minutes * 60)
+    fixes = {}
+    callsigns = {}
+    for n in range(n_aircraft):
+        # Spread starts over the session and positions over the radar range
+        bearing = rng.uniform(0, 2 * math.pi)
+        distance = rng.uniform(0, 0.6)
+        t_start = start + rng.uniform(0, max(1, seconds - 120))
+        duration = int(min(seconds - (t_start - start), rng.uniform(120, 1800)))
+        track = sdr_synth.synthetic_aircraft_fixes(
+            max(2, duration), lat=lat + distance * math.cos(bearing),
+            lon=lon + distance * math.sin(bearing) / math.cos(math.radians(lat)),
+            alt=int(rng.uniform(2000, 38000)), heading_deg=float(rng.uniform(0, 360)), seed=seed + n)
+        icao = "%06X" % (0xA00000 + n)
+        fixes[icao] = [(la, lo, alt, t_start + k) for k, (la, lo, alt, _) in enumerate(track)]
+        callsigns[icao] = f"SYN{n:04d}"
+    frames = sdr_adsb.synthetic_traffic(fixes, callsigns)
+    recorder = SessionRecorder(path)
+    recorder.session(start, tower={"name": "Synthetic", "lat": lat, "lon": lon, "freq": 119.1},
+                     radar_range_km=50)
+    for t, data in frames:
+        recorder.frames([Frame(0, data, 0.5)], [t])
+    recorder.close()
+    return len(frames)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect, synthesize and replay airport session logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="Summarize a session log")
+    info.add_argument("path")
+    synth = sub.add_parser("synth", help="Write a synthetic session log")
+    synth.add_argument("path")
+    synth.add_argument("--aircraft", type=int, default=50)
+    synth.add_argument("--minutes", type=float, default=10)
+    replay = sub.add_parser("replay", help="Replay a log through the tracker and map pipeline headless")
+    replay.add_argument("path")
+    replay.add_argument("--speed", type=parse_speed, default=None, help="1, 10 or max (default)")
+    replay.add_argument("--range-km", type=float, default=50.0)
+    replay.add_argument("--size", default="800x500")
+    replay.add_argument("--render", help="Save the final map to this PNG")
+    args = parser.parse_args(argv)
+
+    if args.command == "synth":
+        count = synthetic_session(args.path, args.aircraft, args.minutes)
+        print(f"Wrote {count} frames to {args.path} ({os.path.getsize(args.path) / 1e6:.1f} MB)")
+        return 0
+
+    if args.command == "info":
+        counts = {}
+        sizes = {}
+        first = last = None
+        for record in read_session(args.path):
+            counts[record.kind] = counts.get(record.kind, 0) + 1
+            sizes[record.kind] = sizes.get(record.kind, 0) + len(record.payload)
+            first = record.t if first is None else first
+            last = record.t
+            if record.kind == SESSION:
+                print(f"{datetime.fromtimestamp(record.t):%Y-%m-%d %H:%M:%S}  {record.payload.decode('utf-8')}")
+        if first is None:
+            print("Empty log")
+            return 0
+        print(f"{last - first:.1f} s from {datetime.fromtimestamp(first):%Y-%m-%d %H:%M:%S}")
+        for kind in sorted(counts):
+            print(f"  {KIND_NAMES.get(kind, kind):8s} {counts[kind]:10d} records {sizes[kind] / 1e6:10.2f} MB")
+        return 0
+
+    import sdr_adsb
+    import sdr_maprender
+    from sdr_geo import update_kinematics
+    from sdr_tracks import AircraftTable, Tower
+
+    table = AircraftTable()
+    tracker = sdr_adsb.ADSBTracker(table)
+    decoder = sdr_adsb.ADSBDecoder()
+    layers = sdr_maprender.LayeredMap()
+    width, _, height = args.size.partition("x")
+    tower = None
+    version = 0
+    messages = refreshes = 0
+    track_time = refresh_time = 0.0
+    next_refresh = first = None
+    driver = ReplayDriver(read_session(args.path), speed=args.speed)
+    start = time.perf_counter()
+    for batch_end, batch in driver.batches():
+        first = batch[0].t if first is None else first
+        for record in batch:
+            if record.kind == SESSION:
+                info = json.loads(record.payload)
+                if info.get("tower"):
+                    t = info["tower"]
+                    tower = Tower(t["name"], t["lat"], t["lon"], t.get("freq"))
+                    tracker.reference = (tower.lat, tower.lon)
+        t0 = time.perf_counter()
+        for t, frame in replay_frames(batch, decoder):
+            tracker.handle(frame, t)
+            messages += 1
+        track_time += time.perf_counter() - t0
+
+        # One map refresh per second of session time, as the app's map thread does
+        next_refresh = batch_end if next_refresh is None else next_refresh
+        if batch_end >= next_refresh and tower is not None:
+            next_refresh = batch_end + 1.0
+            t0 = time.perf_counter()
+            table.expire(batch_end)
+            delta = table.changes_since(version)
+            version = delta.version
+            update_kinematics(table[icao] for icao in delta.changed)
+            tower.aircraft, _, _ = table.within(tower.lat, tower.lon, args.range_km)
+            layers.set_view(int(width), int(height), tower=tower, radar_range_km=args.range_km)
+            layers.update_tracks(table, True, delta)
+            layers.take_dirty()
+            list(layers.markers(table, delta.changed))
+            refresh_time += time.perf_counter() - t0
+            refreshes += 1
+    elapsed = time.perf_counter() - start
+
+    if first is None:
+        print("Empty log")
+        return 0
+    span = driver.session_time() - first
+    print(f"Replayed {driver.replayed} records ({messages} messages), {span:.0f}s of session "
+          f"in {elapsed:.2f}s ({span / max(elapsed, 1e-9):.0f}x real time)")
+    if messages:
+        print(f"  tracker: {track_time / messages * 1e6:.1f} us/message, {messages / max(track_time, 1e-9):.0f} messages/s")
+    if refreshes:
+        print(f"  map: {refreshes} refreshes, {refresh_time / refreshes * 1e3:.2f} ms each; "
+              f"{len(table)} aircraft at the end")
+    if args.render and layers.view is not None:
+        layers.compose(table).save(args.render)
+        print(f"  saved {args.render}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Signal-quality monitoring in dB from the live spectrum.
+
+The SNR is the signal's power in its own band relative to the noise floor
+measured outside that band, in the same averaged spectrum the waterfall
+draws. There is no separate thread or timer. ``SignalMonitor.update`` runs
+for each spectrum frame, which only happens while a receiver is delivering
+samples. It notifies the UI only when the SNR moves by ``CHANGE_DB`` or
+more, so an idle app does no signal work at all.
+
+History is a fixed NumPy ring of the last ``HISTORY_SIZE`` estimates.
+"""
+import time
+
+import numpy as np
+
+HISTORY_SIZE = 250      # Estimates kept, 10 s at the spectrum frame rate
+CHANGE_DB = 0.5         # Smallest SNR change worth redrawing
+MIN_SNR_DB = -20.0      # Reported when the band is no stronger than the noise floor
+DC_GUARD_BINS = 2       # Bins either side of the rtl_sdr DC spike left out of both estimates
+USABLE_SPAN = 0.8       # Fraction of the capture inside the tuner's anti-alias roll-off
+
+# Occupied bandwidth of each satellite downlink, Doppler included
+BANDWIDTH_HZ = {
+    "noaa": 50e3,    # APT: 2.4 kHz AM subcarrier FM-modulated at +/-17 kHz
+    "goes": 600e3,   # LRIT: 293 kbps BPSK
+}
+
+
+def band_snr_db(power_db, sample_rate, bandwidth_hz, offset_hz=0.0):
+    """SNR in dB of the ``bandwidth_hz`` band around ``offset_hz`` in an fftshifted dB spectrum
+
+    The noise floor is the median power per bin outside the band, which
+    ignores other carriers in the capture. Signal power is what the band
+    holds above that floor, and noise power is the floor over the whole
+    ``bandwidth_hz``, so bins left out around DC do not bias the ratio.
+    """
+    power_db = np.asarray(power_db, dtype=np.float64)
+    n = len(power_db)
+    offsets = np.arange(n) - n // 2
+    freqs = offsets * (sample_rate / n)
+    usable = (np.abs(freqs) <= USABLE_SPAN * sample_rate / 2) & (np.abs(offsets) > DC_GUARD_BINS)
+    inside = np.abs(freqs - offset_hz) <= bandwidth_hz / 2
+    in_band = usable & inside
+    out_band = usable & ~inside
+    if not in_band.any() or not out_band.any():
+        return None
+    power = 10.0 ** (power_db / 10.0)
+    noise = float(np.median(power[out_band]))
+    signal = float(np.sum(power[in_band] - noise))
+    if noise <= 0 or signal <= 0:
+        return MIN_SNR_DB
+    return max(MIN_SNR_DB, 10.0 * np.log10(signal / (noise * bandwidth_hz * n / sample_rate)))
+
+
+class SignalHistory:
+    """Fixed-size ring of (time, value) estimates"""
+    def __init__(self, size=HISTORY_SIZE):
+        self.size = size
+        self._times = np.zeros(size, dtype=np.float64)
+        self._values = np.zeros(size, dtype=np.float64)
+        self._next = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self._next = 0
+        self.count = 0
+
+    def append(self, t, value):
+        self._times[self._next] = t
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def latest(self):
+        if not self.count:
+            return None
+        return float(self._values[self._next - 1])
+
+    def values(self):
+        """(times, values) arrays, oldest first"""
+        if self.count < self.size:
+            return self._times[:self.count].copy(), self._values[:self.count].copy()
+        order = np.r_[self._next:self.size, 0:self._next]
+        return self._times[order], self._values[order]
+
+    def stats(self):
+        """(mean, max) of the values held, or (None, None) when empty"""
+        if not self.count:
+            return None, None
+        held = self._values[:self.count]
+        return float(held.mean()), float(held.max())
+
+
+class SignalMonitor:
+    """Turns spectrum frames into an SNR history and reports meaningful changes
+
+    ``notify(snr_db)`` is called from whichever thread calls ``update``, with
+    None when there is no signal to measure (after ``reset``).
+    """
+    def __init__(self, notify, threshold_db=CHANGE_DB, history_size=HISTORY_SIZE, clock=time.monotonic):
+        self.notify = notify
+        self.threshold_db = threshold_db
+        self.history = SignalHistory(history_size)
+        self.clock = clock
+        self.sample_rate = None
+        self.bandwidth_hz = None
+        self.offset_hz = 0.0
+        self.notifications = 0
+        self._shown = None
+
+    def configure(self, sample_rate, bandwidth_hz, offset_hz=0.0):
+        """Measure the band of a new reception"""
+        self.sample_rate = sample_rate
+        self.bandwidth_hz = bandwidth_hz
+        self.offset_hz = offset_hz
+        self.reset()
+
+    def reset(self):
+        self.history.clear()
+        self._shown = None
+        self.notify(None)
+
+    def update(self, power_db):
+        """Add the estimate for one spectrum frame; returns it"""
+        if self.sample_rate is None or power_db is None:
+            return None
+        snr = band_snr_db(power_db, self.sample_rate, self.bandwidth_hz, self.offset_hz)
+        if snr is None:
+            return None
+        self.history.append(self.clock(), snr)
+        if self._shown is None or abs(snr - self._shown) >= self.threshold_db:
+            self._shown = snr
+            self.notifications += 1
+            self.notify(snr)
+        return snr
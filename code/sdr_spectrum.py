@@ -0,0 +1,254 @@
+"""Live spectrum and waterfall for the raw IQ stream.
+
+The reader thread hands every block of rtl_sdr bytes to ``SpectrumAnalyzer.feed``,
+which only copies it into a small ring under a lock. Once per display frame
+the Tk thread takes the newest ``fft_size * averages`` samples and computes
+Hann-windowed FFTs, averaged together and smoothed across frames. That work
+is fixed per frame and does not grow with the sample rate, so 25 fps at
+2.4 MS/s costs a few milliseconds a frame and the decoders never wait on it.
+
+``Waterfall`` keeps its rows as colormap indices in a NumPy ring in which
+every row is stored twice, so the visible history is always one contiguous
+slice. A frame is one LUT lookup into RGB and one paste into a persistent
+``PhotoImage``. The spectrum trace is a single canvas line whose coordinates
+are updated in place.
+"""
+import threading
+import time
+
+import numpy as np
+from PIL import Image, ImageTk
+
+DEFAULT_FFT_SIZE = 1024
+DEFAULT_AVERAGES = 8
+DEFAULT_FPS = 25.0
+SMOOTHING = 0.5  # Weight of the newest frame in the running average
+
+# u8 IQ byte to float, centred on the rtl_sdr midpoint
+IQ_LUT = ((np.arange(256, dtype=np.float32) - 127.5) / 127.5)
+
+# Dark blue through cyan and yellow to red
+COLORMAP_STOPS = (
+    (0.00, (0, 0, 32)),
+    (0.25, (0, 32, 160)),
+    (0.50, (0, 190, 200)),
+    (0.75, (250, 220, 40)),
+    (1.00, (220, 30, 20)),
+)
+
+
+def colormap_lut(stops=COLORMAP_STOPS):
+    """(256, 3) uint8 RGB table interpolated between (position, rgb) stops"""
+    pos = np.array([p for p, _ in stops])
+    rgb = np.array([c for _, c in stops], dtype=np.float64)
+    x = np.linspace(0.0, 1.0, 256)
+    return np.stack([np.interp(x, pos, rgb[:, k]) for k in range(3)], axis=1).round().astype(np.uint8)
+
+
+class SpectrumAnalyzer:
+    """Averaged, windowed power spectrum of the newest samples of a u8 IQ stream"""
+    def __init__(self, sample_rate=2.4e6, fft_size=DEFAULT_FFT_SIZE, averages=DEFAULT_AVERAGES):
+        self.sample_rate = sample_rate
+        self.fft_size = fft_size
+        self.averages = averages
+        window = np.hanning(fft_size).astype(np.float32)
+        self.window = window
+        # Scale so a full-scale tone reads 0 dBFS regardless of window and size
+        self._scale = 1.0 / float(np.sum(window)) ** 2
+        self._capacity = 2 * fft_size * averages  # Bytes for one frame's worth of IQ
+        self._ring = np.zeros(2 * self._capacity, dtype=np.uint8)
+        self._lock = threading.Lock()
+        self._pos = 0
+        self.fed = 0        # Bytes ever fed, so the display can tell when there is new data
+        self._computed = 0  # Value of ``fed`` at the last compute
+        self.power_db = None
+
+    def reset(self):
+        with self._lock:
+            self._pos = 0
+            self.fed = 0
+        self._computed = 0
+        self.power_db = None
+
+    def feed(self, raw):
+        """Keep the newest bytes of a block of rtl_sdr output; cheap enough for the reader thread"""
+        data = np.frombuffer(raw, dtype=np.uint8)
+        if len(data) >= self._capacity:
+            data = data[-self._capacity:]
+        with self._lock:
+            # The ring holds each byte twice, so the newest frame is one slice
+            n = len(data)
+            end = self._pos + n
+            if end <= self._capacity:
+                self._ring[self._pos:end] = data
+                self._ring[self._pos + self._capacity:end + self._capacity] = data
+            else:
+                first = self._capacity - self._pos
+                self._ring[self._pos:self._capacity] = data[:first]
+                self._ring[self._pos + self._capacity:] = data[:first]
+                self._ring[:n - first] = data[first:]
+                self._ring[self._capacity:self._capacity + n - first] = data[first:]
+            self._pos = end % self._capacity
+            self.fed += len(raw)
+
+    def has_new_data(self):
+        return self.fed != self._computed and self.fed >= self._capacity
+
+    def compute(self):
+        """Update and return the smoothed power spectrum in dBFS, DC in the middle"""
+        with self._lock:
+            # After an odd number of bytes the newest frame would start on a Q byte
+            start = (self._pos - (self.fed & 1)) % self._capacity
+            raw = self._ring[start:start + self._capacity].copy()
+            self._computed = self.fed
+        iq = IQ_LUT[raw]
+        samples = (iq[0::2] + 1j * iq[1::2]).astype(np.complex64).reshape(self.averages, self.fft_size)
+        spectra = np.fft.fft(samples * self.window, axis=1)
+        power = np.mean(spectra.real ** 2 + spectra.imag ** 2, axis=0) * self._scale
+        power = np.fft.fftshift(power)
+        db = 10.0 * np.log10(power + 1e-12)
+        if self.power_db is None:
+            self.power_db = db
+        else:
+            self.power_db = SMOOTHING * db + (1.0 - SMOOTHING) * self.power_db
+        return self.power_db
+
+    def frequencies(self, center_hz=0.0):
+        """Bin centre frequencies in Hz matching ``compute`` order"""
+        return center_hz + np.fft.fftshift(np.fft.fftfreq(self.fft_size, 1.0 / self.sample_rate))
+
+
+def bin_columns(values, width):
+    """Reduce (or stretch) a spectrum to ``width`` columns, keeping peaks when reducing"""
+    n = len(values)
+    if n == width:
+        return values
+    if n > width and n % width == 0:
+        return values.reshape(width, n // width).max(axis=1)
+    idx = (np.arange(width) * n // width).astype(np.intp)
+    if n > width:
+        return np.maximum.reduceat(values, idx)
+    return values[idx]
+
+
+class Waterfall:
+    """Rolling (height, width) history of spectra as colormap indices, newest row on top"""
+    def __init__(self, width, height, lut=None):
+        self.width = width
+        self.height = height
+        self.lut = colormap_lut() if lut is None else lut
+        # Every row is written twice, at i and i + height, so rows are contiguous from any start
+        self._rows = np.zeros((2 * height, width), dtype=np.uint8)
+        self._next = 0
+        self.floor_db = None
+        self.ceil_db = None
+
+    def push(self, power_db):
+        """Add one spectrum, auto-ranging the colour scale to its noise floor and peaks"""
+        cols = bin_columns(np.asarray(power_db, dtype=np.float32), self.width)
+        floor = float(np.percentile(cols, 20))
+        ceil = float(cols.max())
+        if self.floor_db is None:
+            self.floor_db, self.ceil_db = floor - 3.0, max(ceil, floor + 20.0)
+        else:
+            # Slow-moving range so the colours do not flicker frame to frame
+            self.floor_db += 0.05 * (floor - 3.0 - self.floor_db)
+            self.ceil_db += 0.05 * (max(ceil, self.floor_db + 20.0) - self.ceil_db)
+        span = max(1e-6, self.ceil_db - self.floor_db)
+        row = np.clip((cols - self.floor_db) * (255.0 / span), 0, 255).astype(np.uint8)
+        # Rows run newest first from _next, so step backwards
+        self._next = (self._next - 1) % self.height
+        self._rows[self._next] = row
+        self._rows[self._next + self.height] = row
+        return cols
+
+    def indices(self):
+        """(height, width) colormap indices, newest row first"""
+        return self._rows[self._next:self._next + self.height]
+
+    def rgb(self):
+        return self.lut[self.indices()]
+
+
+class SpectrumView:
+    """Draws a SpectrumAnalyzer on a Tk canvas: a trace on top and a waterfall below
+
+    ``start`` schedules frames with ``after`` at ``fps``; frames with no new
+    samples are skipped, so an idle receiver costs nothing. ``on_frame`` is
+    called with every new spectrum, drawn or not (e.g. the canvas is hidden).
+    """
+    TRACE_HEIGHT = 80
+
+    def __init__(self, canvas, analyzer, fps=DEFAULT_FPS, frame_time=None, on_frame=None):
+        self.canvas = canvas
+        self.analyzer = analyzer
+        self.on_frame = on_frame
+        self.frame_time = frame_time  # Optional histogram observing seconds per drawn frame
+        self.interval_ms = max(1, int(1000 / fps))
+        self.waterfall = None
+        self._photo = None
+        self._image_item = None
+        self._trace_item = None
+        self._running = False
+        self.frames = 0
+        self.frame_seconds = 0.0
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.canvas.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def _layout(self, width, height):
+        wf_height = max(1, height - self.TRACE_HEIGHT)
+        self.waterfall = Waterfall(width, wf_height)
+        self.canvas.delete("spectrum")
+        self._photo = ImageTk.PhotoImage(Image.new("RGB", (width, wf_height)))
+        self._image_item = self.canvas.create_image(0, self.TRACE_HEIGHT, anchor="nw", image=self._photo,
+                                                    tags=("spectrum",))
+        self._trace_item = self.canvas.create_line(0, 0, 1, 1, fill="#40ff40", tags=("spectrum",))
+
+    def _tick(self):
+        if not self._running:
+            return
+        start = time.perf_counter()
+        drew = False
+        try:
+            drew = self.draw()
+        except Exception as e:
+            print(f"Spectrum display error: {e}")
+        elapsed = time.perf_counter() - start
+        if drew:
+            self.frame_seconds += elapsed
+            if self.frame_time is not None:
+                self.frame_time.observe(elapsed)
+        # Keep the cadence: subtract the time this frame took
+        self.canvas.after(max(1, self.interval_ms - int(elapsed * 1000)), self._tick)
+
+    def draw(self):
+        """Render one frame if there are new samples; returns True if it drew"""
+        if not self.analyzer.has_new_data():
+            return False
+        power_db = self.analyzer.compute()
+        if self.on_frame is not None:
+            self.on_frame(power_db)
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width <= 1 or height <= self.TRACE_HEIGHT:
+            return False
+        if self.waterfall is None or (self.waterfall.width, self.waterfall.height + self.TRACE_HEIGHT) != (width, height):
+            self._layout(width, height)
+
+        cols = self.waterfall.push(power_db)
+        self._photo.paste(Image.fromarray(self.waterfall.rgb(), "RGB"))
+        # Trace scaled to the same range as the waterfall colours
+        span = max(1e-6, self.waterfall.ceil_db - self.waterfall.floor_db)
+        ys = (self.TRACE_HEIGHT - 2) * (1.0 - np.clip((cols - self.waterfall.floor_db) / span, 0.0, 1.0)) + 1
+        coords = np.empty(2 * width, dtype=np.float32)
+        coords[0::2] = np.arange(width)
+        coords[1::2] = ys
+        self.canvas.coords(self._trace_item, *coords.round(1).tolist())
+        self.frames += 1
+        return True
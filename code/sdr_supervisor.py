@@ -0,0 +1,328 @@
+"""Supervision of the rtl_* child processes.
+
+Every SDR pipeline reads samples from an ``rtl_fm``/``rtl_sdr`` child's
+stdout. ``SDRSupervisor.launch`` starts the child in its own process group
+and returns an ``SDRProcess``, whose ``read`` the pipeline's reader thread
+calls in place of ``stdout.read``.
+
+- stderr is drained by a thread per child, so a chatty tool never fills the
+  pipe and blocks. Lines are kept in a short log and classified (PLL not
+  locked, lost samples, USB errors, no device), and each class is counted.
+- One watchdog thread runs only while children are alive, waking once a
+  second. It kills a child whose stdout has not delivered anything for
+  ``STALL_S`` while a reader was waiting on it, and flags one that
+  delivers less than half its expected byte rate.
+- When a child exits unexpectedly (non-zero status or killed as stalled),
+  ``read`` restarts it with exponential backoff and carries on, so reader
+  threads only see end-of-stream when the pipeline is stopped, the child
+  finished normally (``rtl_sdr -n``) or restarts were exhausted.
+
+``stop`` is the single teardown path: SIGTERM to the process group, then
+SIGKILL if it has not exited within the timeout.
+"""
+from collections import deque
+import os
+import signal
+import subprocess
+import threading
+import time
+
+STALL_S = 5.0              # A blocked read this long means the device stopped delivering
+SLOW_FRACTION = 0.5        # Below this fraction of the expected byte rate counts as slow
+WATCHDOG_INTERVAL_S = 1.0
+BACKOFF_S = (0.5, 1.0, 2.0, 4.0, 8.0)  # Delay before each consecutive restart
+MAX_RESTARTS = 5           # Consecutive failed restarts before giving up
+HEALTHY_S = 30.0           # Uptime after which the consecutive failure count resets
+STDERR_LINES = 50          # stderr lines kept per child
+
+# stderr classes and the librtlsdr / rtl_* messages that signal them
+STDERR_PATTERNS = (
+    ("no_device", ("No supported devices found", "Failed to open rtlsdr device", "usb_open error")),
+    ("usb_error", ("LIBUSB_ERROR", "usb_claim_interface", "cb transfer status", "Failed to submit transfer",
+                   "Device or resource busy", "Kernel driver is active")),
+    ("samples_lost", ("samples lost", "Lost at least", "dropped samples")),
+    ("pll_unlocked", ("PLL not locked",)),
+)
+ERROR_KINDS = ("no_device", "usb_error")  # Reported to the app as they happen
+
+
+def classify_stderr(line):
+    """Class of an rtl_* stderr line, or None for ordinary output"""
+    for kind, needles in STDERR_PATTERNS:
+        for needle in needles:
+            if needle in line:
+                return kind
+    return None
+
+
+class SDRProcess:
+    """One supervised rtl_* child; ``read`` restarts it after unexpected exits"""
+    def __init__(self, supervisor, pipeline, cmd, expected_rate=None, restart=True, device=None):
+        self.supervisor = supervisor
+        self.pipeline = pipeline
+        self.cmd = list(cmd)
+        self.device = device  # The sdr_devices.RTLDevice it runs on, if known
+        self.expected_rate = expected_rate  # stdout bytes per second, if known
+        self.restart = restart
+        self.process = None
+        self.started_at = None
+        self.first_started_at = None
+        self.bytes_read = 0
+        self.restarts = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.stalls = 0
+        self.slow = False
+        self.gave_up = False
+        self.finished = False     # read has returned end-of-stream for good
+        self.events = {kind: 0 for kind, _ in STDERR_PATTERNS}
+        self.stderr_log = deque(maxlen=STDERR_LINES)
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._stalled = False
+        self._read_since = None   # clock() when a blocked read started, None when not reading
+        self._rate_mark = (0.0, 0)  # (clock, bytes_read) at the last watchdog check
+        metrics = supervisor.metrics
+        self._starts = metrics.counter("sdr_process_starts_total", pipeline=pipeline)
+        self._unexpected = metrics.counter("sdr_process_unexpected_exits_total", pipeline=pipeline)
+        self._restart_count = metrics.counter("sdr_process_restarts_total", pipeline=pipeline)
+        self._stall_count = metrics.counter("sdr_process_stalls_total", pipeline=pipeline)
+        self._uptime = metrics.gauge("sdr_process_uptime_seconds", pipeline=pipeline)
+        self._rate = metrics.gauge("sdr_process_bytes_per_second", pipeline=pipeline)
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    @property
+    def stopped(self):
+        return self._stopping.is_set()
+
+    def _spawn(self):
+        with self._lock:
+            if self._stopping.is_set():
+                return False
+            self.process = self.supervisor.popen(
+                self.cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                preexec_fn=os.setsid,
+                bufsize=1024*1024
+            )
+            now = self.supervisor.clock()
+            self.started_at = now
+            if self.first_started_at is None:
+                self.first_started_at = now
+            self._rate_mark = (now, self.bytes_read)
+            self._stalled = False
+        self._starts.inc()
+        threading.Thread(target=self._drain_stderr, args=(self.process,), daemon=True).start()
+        return True
+
+    def _drain_stderr(self, process):
+        """Read stderr to the end, keeping recent lines and counting known problems"""
+        try:
+            for raw in iter(process.stderr.readline, b""):
+                line = raw.decode("utf-8", "replace").strip()
+                if not line:
+                    continue
+                self.stderr_log.append(line)
+                kind = classify_stderr(line)
+                if kind is None:
+                    continue
+                self.events[kind] += 1
+                self.supervisor.metrics.counter("sdr_stderr_events_total", pipeline=self.pipeline, kind=kind).inc()
+                if kind in ERROR_KINDS:
+                    self.last_error = line
+                    self.supervisor.report(self, kind, line)
+        except (OSError, ValueError):
+            pass  # Pipe closed under us during stop
+
+    def read(self, n):
+        """Up to ``n`` bytes of stdout; b"" only once the pipeline is finished for good"""
+        while True:
+            process = self.process
+            if process is None:
+                return b""
+            self._read_since = self.supervisor.clock()
+            try:
+                data = process.stdout.read(n)
+            except (OSError, ValueError):
+                data = b""
+            finally:
+                self._read_since = None
+            if data:
+                self.bytes_read += len(data)
+                return data
+            if not self._should_restart(process):
+                self.finished = True
+                return b""
+            delay = BACKOFF_S[min(self.consecutive_failures, len(BACKOFF_S)) - 1]
+            if self._stopping.wait(delay) or not self._spawn():
+                self.finished = True
+                return b""
+            self.restarts += 1
+            self._restart_count.inc()
+
+    def _should_restart(self, process):
+        """Account for a child whose stdout ended; True if it should be started again"""
+        if self._stopping.is_set():
+            return False
+        try:
+            returncode = process.wait(timeout=1.0)
+        except subprocess.TimeoutExpired:
+            self._kill(process, 0.5)
+            returncode = process.returncode
+        if returncode == 0 and not self._stalled:
+            return False  # Finished normally, e.g. rtl_sdr -n
+        self.failures += 1
+        self._unexpected.inc()
+        if self.started_at is not None and self.supervisor.clock() - self.started_at >= HEALTHY_S:
+            self.consecutive_failures = 0
+        self.consecutive_failures += 1
+        tail = self.stderr_log[-1] if self.stderr_log else f"exit status {returncode}"
+        if not self._stalled:
+            self.last_error = tail
+        if not self.restart:
+            return False
+        if self.consecutive_failures > MAX_RESTARTS:
+            self.gave_up = True
+            self.supervisor.report(self, "gave_up", f"gave up after {MAX_RESTARTS} restarts: {tail}")
+            return False
+        return True
+
+    def _kill(self, process, timeout):
+        try:
+            os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+            process.wait(timeout=timeout)
+        except (ProcessLookupError, subprocess.TimeoutExpired):
+            try:
+                os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+                process.wait(timeout=timeout)
+            except (ProcessLookupError, subprocess.TimeoutExpired):
+                pass
+
+    def stop(self, timeout=1.0):
+        """Stop the child for good; further reads return end-of-stream"""
+        with self._lock:
+            self._stopping.set()
+            process = self.process
+        if process is not None and process.poll() is None:
+            self._kill(process, timeout)
+
+    def check(self, now):
+        """Watchdog pass: update rates, kill a stalled child; returns False once finished"""
+        process = self.process
+        if self._stopping.is_set() or self.finished or process is None:
+            return False
+        if process.poll() is not None:
+            return True  # Exited; the reader will notice and restart or finish
+        read_since = self._read_since
+        if read_since is not None and now - read_since > STALL_S and not self._stalled:
+            self._stalled = True
+            self.stalls += 1
+            self._stall_count.inc()
+            self.last_error = f"no data for {now - read_since:.0f} s"
+            self._kill(process, 0.5)
+            return True
+        mark_time, mark_bytes = self._rate_mark
+        if now - mark_time >= WATCHDOG_INTERVAL_S:
+            rate = (self.bytes_read - mark_bytes) / (now - mark_time)
+            self._rate.set(rate)
+            self._rate_mark = (now, self.bytes_read)
+            # Only judge the rate while a reader is keeping up with the pipe
+            if self.expected_rate and read_since is not None:
+                self.slow = rate < SLOW_FRACTION * self.expected_rate
+        self._uptime.set(now - self.started_at)
+        return True
+
+    def health(self):
+        """Snapshot of the child's state for status displays and logs"""
+        now = self.supervisor.clock()
+        return {
+            "pipeline": self.pipeline,
+            "pid": self.pid,
+            "device": self.device.label if self.device is not None else None,
+            "running": self.process is not None and self.process.poll() is None,
+            "uptime_s": now - self.started_at if self.started_at is not None else 0.0,
+            "bytes_read": self.bytes_read,
+            "restarts": self.restarts,
+            "failures": self.failures,
+            "stalls": self.stalls,
+            "slow": self.slow,
+            "gave_up": self.gave_up,
+            "events": dict(self.events),
+            "last_error": self.last_error,
+        }
+
+
+class SDRSupervisor:
+    """Owns the SDR child processes of every pipeline
+
+    ``on_event(process, kind, message)`` is called from supervisor threads
+    for device errors and when a pipeline gives up restarting.
+    """
+    def __init__(self, metrics, on_event=None, popen=subprocess.Popen, clock=time.monotonic):
+        self.metrics = metrics
+        self.on_event = on_event
+        self.popen = popen
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._processes = []
+        self._watchdog = None
+
+    def launch(self, pipeline, cmd, expected_rate=None, restart=True, device=None):
+        """Start ``cmd`` for ``pipeline`` and return its SDRProcess"""
+        process = SDRProcess(self, pipeline, cmd, expected_rate, restart, device)
+        process._spawn()
+        with self._lock:
+            self._processes.append(process)
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, daemon=True)
+                self._watchdog.start()
+        return process
+
+    def stop(self, process, timeout=1.0):
+        """Stop a process returned by ``launch``; None is ignored"""
+        if process is None:
+            return
+        process.stop(timeout)
+        with self._lock:
+            if process in self._processes:
+                self._processes.remove(process)
+
+    def stop_all(self, timeout=1.0):
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            self.stop(process, timeout)
+
+    def report(self, process, kind, message):
+        if self.on_event is not None:
+            try:
+                self.on_event(process, kind, message)
+            except Exception as e:
+                print(f"Supervisor event handler error: {e}")
+
+    def status(self):
+        """Health of every live pipeline"""
+        with self._lock:
+            processes = list(self._processes)
+        return [process.health() for process in processes]
+
+    def _watch(self):
+        """Watchdog loop; exits when there is nothing left to watch"""
+        while True:
+            time.sleep(WATCHDOG_INTERVAL_S)
+            now = self.clock()
+            with self._lock:
+                processes = list(self._processes)
+            finished = [process for process in processes if not process.check(now)]
+            with self._lock:
+                for process in finished:
+                    if process in self._processes:
+                        self._processes.remove(process)
+                if not self._processes:
+                    self._watchdog = None
+                    return
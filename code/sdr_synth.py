@@ -0,0 +1,116 @@
+"""Reproducible synthetic signal fixtures for benchmarks and offline testing.
+
+Every generator takes a ``seed`` so the same call always produces the same
+bytes, which keeps benchmark runs comparable across machines and commits.
+"""
+from datetime import datetime, timedelta
+import math
+
+import numpy as np
+
+
+def synthetic_iq_u8(n_samples, sample_rate=2.4e6, carriers=((25e3, 0.3),), noise=0.05, seed=0):
+    """Return interleaved unsigned 8-bit IQ bytes in the rtl_sdr output format
+
+    ``carriers`` is a sequence of (offset_hz, amplitude) pairs relative to the
+    tuned centre frequency; amplitudes are relative to full scale (1.0).
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples) / sample_rate
+    iq = np.zeros(n_samples, dtype=np.complex128)
+    for offset_hz, amplitude in carriers:
+        iq += amplitude * np.exp(2j * np.pi * offset_hz * t)
+    iq += noise * (rng.standard_normal(n_samples) + 1j * rng.standard_normal(n_samples))
+
+    out = np.empty(2 * n_samples, dtype=np.float64)
+    out[0::2] = iq.real
+    out[1::2] = iq.imag
+    return np.clip(out * 127.5 + 127.5, 0, 255).astype(np.uint8).tobytes()
+
+
+def synthetic_airband_iq(n_samples, sample_rate=2.4e6, channels=((100e3, 0.1, 800.0, None),), depth=0.8,
+                         noise=0.01, seed=0):
+    """Return u8 IQ bytes carrying AM airband transmissions
+
+    ``channels`` holds (offset_hz, carrier_amplitude, tone_hz, keyed) tuples,
+    where ``keyed`` is an (on_s, off_s) interval the transmitter is keyed
+    for, or None for the whole time. The tone is amplitude-modulated to
+    ``depth`` and warbled so it is not a pure line.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples) / sample_rate
+    iq = noise * (rng.standard_normal(n_samples) + 1j * rng.standard_normal(n_samples))
+    for offset_hz, amplitude, tone_hz, keyed in channels:
+        audio = np.sin(2 * np.pi * tone_hz * t + 3.0 * np.sin(2 * np.pi * 4.0 * t))
+        signal = amplitude * (1.0 + depth * audio) * np.exp(2j * np.pi * offset_hz * t)
+        if keyed is not None:
+            signal *= (t >= keyed[0]) & (t < keyed[1])
+        iq += signal
+    out = np.empty(2 * n_samples, dtype=np.float64)
+    out[0::2] = iq.real
+    out[1::2] = iq.imag
+    return np.clip(out * 127.5 + 127.5, 0, 255).astype(np.uint8).tobytes()
+
+
+def samples_from_u8(raw):
+    """Normalize raw rtl_sdr bytes the same way SDRApp.read_samples does"""
+    return np.frombuffer(raw, dtype=np.uint8).astype(np.float32) / 255.0 - 0.5
+
+
+def synthetic_audio_s16(n_samples, sample_rate=32000, tone_hz=1000.0, amplitude=0.4, noise=0.05, seed=0):
+    """Return signed 16-bit mono audio bytes in the rtl_fm output format"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples) / sample_rate
+    audio = amplitude * np.sin(2 * np.pi * tone_hz * t) + noise * rng.standard_normal(n_samples)
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+
+def synthetic_aircraft_fixes(n_fixes, lat=40.6413, lon=-73.7781, alt=3000, speed_mps=120.0,
+                             heading_deg=45.0, interval_s=1.0, seed=0):
+    """Return a list of (lat, lon, alt, datetime) fixes along a gently turning path"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    fixes = []
+    for i in range(n_fixes):
+        heading = math.radians(heading_deg + 10.0 * math.sin(i / 50.0))
+        step_m = speed_mps * interval_s
+        lat += (step_m * math.cos(heading)) / 111320.0
+        lon += (step_m * math.sin(heading)) / (111320.0 * math.cos(math.radians(lat)))
+        alt_i = int(alt + 50 * rng.standard_normal())
+        fixes.append((lat, lon, alt_i, start + timedelta(seconds=i * interval_s)))
+    return fixes
+
+
+def synthetic_sites(n_sites, lat_range=(25.0, 49.0), lon_range=(-124.0, -67.0), seed=0):
+    """Return a list of (lat, lon, name) points scattered uniformly over a lat/lon box"""
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(lat_range[0], lat_range[1], n_sites)
+    lons = rng.uniform(lon_range[0], lon_range[1], n_sites)
+    return [(float(lat), float(lon), f"SITE{i:05d}") for i, (lat, lon) in enumerate(zip(lats, lons))]
+
+
+def synthetic_adsb_iq(frames, amplitude=0.5, noise=0.03, gap_samples=400, seed=0):
+    """Return 2 MS/s rtl_sdr IQ bytes carrying Mode S ``frames`` (bytes) back to back
+
+    Each frame is an 8 us preamble followed by pulse-position-modulated bits
+    on a carrier with a random phase, separated by ``gap_samples`` of noise.
+    """
+    rng = np.random.default_rng(seed)
+    preamble = np.zeros(16)
+    preamble[[0, 2, 7, 9]] = 1.0
+    chunks = [np.zeros(gap_samples)]
+    for data in frames:
+        bits = np.unpackbits(np.frombuffer(bytes(data), dtype=np.uint8))
+        ppm = np.empty(2 * len(bits))
+        ppm[0::2] = bits
+        ppm[1::2] = 1 - bits
+        chunks.append(np.concatenate((preamble, ppm)))
+        chunks.append(np.zeros(gap_samples))
+    envelope = amplitude * np.concatenate(chunks)
+    n = len(envelope)
+    iq = envelope * np.exp(1j * rng.uniform(0, 2 * np.pi, n))
+    iq += noise * (rng.standard_normal(n) + 1j * rng.standard_normal(n))
+    out = np.empty(2 * n)
+    out[0::2] = iq.real
+    out[1::2] = iq.imag
+    return np.clip(out * 127.5 + 127.5, 0, 255).astype(np.uint8).tobytes()
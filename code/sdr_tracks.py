@@ -0,0 +1,415 @@
+"""Bounded, array-backed aircraft and tower records.
+
+Each aircraft keeps its position history in a ``TrackBuffer``: four parallel
+NumPy ring buffers (lat, lon, altitude, epoch seconds) with a fixed capacity
+and a maximum age. A full buffer overwrites its oldest fix, and ``expire``
+drops fixes older than ``max_age_s``, so one aircraft never costs more than
+``capacity * 28`` bytes of history and ``AircraftTable.expire`` removes
+aircraft that have gone quiet. With the defaults (one hour at 1 Hz) a day
+of a busy airspace tops out at about 100 KB per aircraft seen in the last
+hour.
+
+Paths are decimated with Douglas-Peucker before rendering, so a straight leg
+of hundreds of fixes is drawn as a couple of line segments.
+
+``AircraftTable`` holds the live aircraft keyed by ICAO address. It expires
+aircraft that stop transmitting, keeps a message rate per aircraft, indexes
+last positions in a lat/lon grid for radius and box queries, and numbers
+every change so consumers can ask for what changed since they last looked
+instead of walking every aircraft on each refresh.
+"""
+from collections import OrderedDict, namedtuple
+from collections.abc import MutableMapping
+from datetime import datetime
+import math
+
+import numpy as np
+
+from sdr_geo import grid_cells_in_box, grid_cells_near, grid_key, range_bearing
+
+DEFAULT_TRACK_LENGTH = 3600
+DEFAULT_MAX_AGE_S = 3600.0
+DEFAULT_IDLE_S = 60.0       # Drop an aircraft after this long without any message
+RATE_WINDOW_S = 10.0        # Time constant of the per-aircraft message rate
+GRID_CELL_DEG = 0.5
+REMOVED_LOG_SIZE = 4096     # Removals remembered for changes_since; older cursors get a reset
+
+TableDelta = namedtuple("TableDelta", "version changed removed reset")
+
+
+def epoch_seconds(timestamp):
+    """Accept a datetime or epoch seconds and return float epoch seconds"""
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    return float(timestamp)
+
+
+class TrackBuffer:
+    """Fixed-capacity ring buffer of (lat, lon, alt, epoch seconds) fixes, oldest first"""
+    __slots__ = ("capacity", "max_age_s", "lat", "lon", "alt", "t",
+                 "_start", "_len", "appended", "trimmed")
+
+    def __init__(self, capacity=DEFAULT_TRACK_LENGTH, max_age_s=DEFAULT_MAX_AGE_S):
+        self.capacity = capacity
+        self.max_age_s = max_age_s
+        self.lat = np.empty(capacity, dtype=np.float64)
+        self.lon = np.empty(capacity, dtype=np.float64)
+        self.alt = np.empty(capacity, dtype=np.int32)
+        self.t = np.empty(capacity, dtype=np.float64)
+        self._start = 0
+        self._len = 0
+        self.appended = 0  # Fixes ever appended; lets renderers find what is new
+        self.trimmed = 0   # Fixes ever dropped from the old end, by overwrite or expiry
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def append(self, lat, lon, alt, t):
+        if self._len == self.capacity:
+            i = self._start
+            self._start = (self._start + 1) % self.capacity
+            self.trimmed += 1
+        else:
+            i = (self._start + self._len) % self.capacity
+            self._len += 1
+        self.lat[i] = lat
+        self.lon[i] = lon
+        self.alt[i] = alt
+        self.t[i] = t
+        self.appended += 1
+
+    def _index(self, k):
+        """Physical slot of the k-th fix, negative k counting from the newest"""
+        if k < 0:
+            k += self._len
+        if not 0 <= k < self._len:
+            raise IndexError("track index out of range")
+        return (self._start + k) % self.capacity
+
+    def fix(self, k):
+        """The k-th fix as a (lat, lon, alt, epoch seconds) tuple"""
+        i = self._index(k)
+        return float(self.lat[i]), float(self.lon[i]), int(self.alt[i]), float(self.t[i])
+
+    def last(self):
+        return self.fix(-1)
+
+    def _ordered(self, column, start=0):
+        """Fixes ``start`` onwards of one column, oldest first, as a contiguous array"""
+        first = (self._start + start) % self.capacity
+        count = self._len - start
+        end = first + count
+        if end <= self.capacity:
+            return column[first:end]
+        return np.concatenate((column[first:], column[:end - self.capacity]))
+
+    def arrays(self, start=0):
+        """(lat, lon, alt, t) arrays for fixes ``start`` onwards, oldest first"""
+        start = max(0, min(start, self._len))
+        return (self._ordered(self.lat, start), self._ordered(self.lon, start),
+                self._ordered(self.alt, start), self._ordered(self.t, start))
+
+    def since(self, appended):
+        """Arrays of the fixes appended after the buffer's ``appended`` counter was ``appended``"""
+        return self.arrays(self._len - min(self._len, self.appended - appended))
+
+    def expire(self, now):
+        """Drop fixes older than ``max_age_s`` before ``now``; returns how many were dropped"""
+        if not self._len or self.max_age_s is None:
+            return 0
+        cutoff = now - self.max_age_s
+        # Timestamps are appended in order, so the expired fixes are a prefix
+        dropped = int(np.searchsorted(self._ordered(self.t), cutoff, side="left"))
+        if dropped:
+            self._start = (self._start + dropped) % self.capacity
+            self._len -= dropped
+            self.trimmed += dropped
+        return dropped
+
+    def clear(self):
+        self.trimmed += self._len
+        self._start = 0
+        self._len = 0
+
+    def nbytes(self):
+        return self.lat.nbytes + self.lon.nbytes + self.alt.nbytes + self.t.nbytes
+
+
+class Aircraft:
+    __slots__ = ("icao_id", "callsign", "track", "altitude", "speed", "heading",
+                 "vertical_rate", "velocity_time", "last_update", "signal_strength", "color",
+                 "last_seen", "messages", "message_rate")
+
+    def __init__(self, icao_id, callsign="", track_length=DEFAULT_TRACK_LENGTH,
+                 max_age_s=DEFAULT_MAX_AGE_S):
+        self.icao_id = icao_id
+        self.callsign = callsign
+        self.track = TrackBuffer(track_length, max_age_s)
+        self.altitude = 0
+        self.speed = 0
+        self.heading = 0
+        self.vertical_rate = None
+        self.velocity_time = 0.0  # Epoch seconds of the last reported (not derived) velocity
+        self.last_update = 0.0  # Epoch seconds of the newest fix
+        self.signal_strength = 0
+        self.color = 'blue'  # Default color for aircraft
+        self.last_seen = 0.0  # Epoch seconds of the newest message of any kind
+        self.messages = 0
+        self.message_rate = 0.0  # Messages per second as of last_seen, see AircraftTable.heard
+
+    def update_position(self, lat, lon, alt, timestamp, signal_strength):
+        """Record a fix; speed and heading are refreshed for all aircraft at once by sdr_geo.update_kinematics"""
+        t = epoch_seconds(timestamp)
+        self.track.append(lat, lon, alt, t)
+        self.altitude = alt
+        self.last_update = t
+        self.signal_strength = signal_strength
+
+
+class Tower:
+    __slots__ = ("name", "lat", "lon", "frequency", "range_km", "aircraft", "last_scan")
+
+    def __init__(self, name, lat, lon, freq, range_km=50):
+        self.name = name
+        self.lat = lat
+        self.lon = lon
+        self.frequency = freq
+        self.range_km = range_km
+        self.aircraft = {}  # icao_id: Aircraft objects
+        self.last_scan = datetime.min
+
+
+class AircraftTable(MutableMapping):
+    """Live aircraft keyed by ICAO address, with expiry, grid index and change deltas
+
+    Behaves as a dict of ``Aircraft`` so existing consumers can iterate it,
+    but writers should go through ``heard`` and ``update_position`` so the
+    message rate, grid index and change log stay current. Every change bumps
+    ``version``; ``changes_since(version)`` returns the aircraft changed and
+    removed after that version in time proportional to the changes, not to
+    the table size.
+    """
+    def __init__(self, max_idle_s=DEFAULT_IDLE_S, cell_deg=GRID_CELL_DEG, aircraft_factory=Aircraft):
+        self.max_idle_s = max_idle_s
+        self.cell_deg = cell_deg
+        self.aircraft_factory = aircraft_factory
+        self._aircraft = {}
+        self._cells = {}    # (row, col): set of icao
+        self._cell_of = {}  # icao: (row, col)
+        self._changed = {}  # icao: version of its latest change, oldest change first
+        self._removed = OrderedDict()  # icao: version it was removed at
+        self._removed_floor = 0  # Removals at or before this version have been forgotten
+        self.version = 0
+
+    def __getitem__(self, icao):
+        return self._aircraft[icao]
+
+    def __setitem__(self, icao, ac):
+        self._unindex(icao)
+        self._aircraft[icao] = ac
+        if ac.track:
+            self._index(icao, *ac.track.last()[:2])
+        self._removed.pop(icao, None)
+        self.mark_changed(icao)
+
+    def __delitem__(self, icao):
+        del self._aircraft[icao]
+        self._unindex(icao)
+        self._changed.pop(icao, None)
+        self.version += 1
+        self._removed[icao] = self.version
+        if len(self._removed) > REMOVED_LOG_SIZE:
+            _, self._removed_floor = self._removed.popitem(last=False)
+
+    def __iter__(self):
+        return iter(self._aircraft)
+
+    def __len__(self):
+        return len(self._aircraft)
+
+    def __contains__(self, icao):
+        return icao in self._aircraft
+
+    # The MutableMapping defaults go through __getitem__ per key
+    def get(self, icao, default=None):
+        return self._aircraft.get(icao, default)
+
+    def keys(self):
+        return self._aircraft.keys()
+
+    def items(self):
+        return self._aircraft.items()
+
+    def values(self):
+        return self._aircraft.values()
+
+    def _index(self, icao, lat, lon):
+        key = grid_key(lat, lon, self.cell_deg)
+        old = self._cell_of.get(icao)
+        if old == key:
+            return
+        if old is not None:
+            self._cells[old].discard(icao)
+        self._cells.setdefault(key, set()).add(icao)
+        self._cell_of[icao] = key
+
+    def _unindex(self, icao):
+        key = self._cell_of.pop(icao, None)
+        if key is not None:
+            cell = self._cells[key]
+            cell.discard(icao)
+            if not cell:
+                del self._cells[key]
+
+    def mark_changed(self, icao):
+        """Record that an aircraft's state changed, e.g. a new callsign or velocity"""
+        self.version += 1
+        self._changed.pop(icao, None)
+        self._changed[icao] = self.version
+
+    def heard(self, icao, t):
+        """Count a message from ``icao`` at epoch time ``t``, creating the aircraft if new; returns it
+
+        ``message_rate`` is an exponentially weighted rate with a
+        ``RATE_WINDOW_S`` time constant, updated in O(1) per message.
+        """
+        ac = self._aircraft.get(icao)
+        if ac is None:
+            ac = self.aircraft_factory(icao)
+            self[icao] = ac
+        decay = math.exp(-max(0.0, t - ac.last_seen) / RATE_WINDOW_S) if ac.messages else 0.0
+        ac.message_rate = ac.message_rate * decay + 1.0 / RATE_WINDOW_S
+        ac.messages += 1
+        ac.last_seen = max(ac.last_seen, t)
+        self.mark_changed(icao)
+        return ac
+
+    def update_position(self, icao, lat, lon, alt, timestamp, signal_strength):
+        """Append a fix to an existing aircraft and move it in the grid index"""
+        ac = self._aircraft[icao]
+        ac.update_position(lat, lon, alt, timestamp, signal_strength)
+        self._index(icao, lat, lon)
+        self.mark_changed(icao)
+        return ac
+
+    def message_rate(self, icao, now):
+        """Messages per second from ``icao``, decayed to ``now``"""
+        ac = self._aircraft[icao]
+        return ac.message_rate * math.exp(-max(0.0, now - ac.last_seen) / RATE_WINDOW_S)
+
+    def expire(self, now=None):
+        """Drop aircraft silent for ``max_idle_s`` and age out old fixes; returns removed ids
+
+        An aircraft also counts as silent if it was never heard through
+        ``heard`` and its last fix is older than ``max_idle_s``.
+        """
+        now = datetime.now().timestamp() if now is None else epoch_seconds(now)
+        removed = []
+        trimmed = []
+        for icao, ac in self._aircraft.items():
+            if now - max(ac.last_seen, ac.last_update) > self.max_idle_s:
+                removed.append(icao)
+            elif ac.track.expire(now):
+                trimmed.append(icao)
+        for icao in removed:
+            del self[icao]
+        for icao in trimmed:
+            if not self._aircraft[icao].track:
+                self._unindex(icao)
+            self.mark_changed(icao)
+        return removed
+
+    def changes_since(self, version):
+        """TableDelta of aircraft changed and removed after ``version``
+
+        ``reset`` is True when the removal log no longer reaches back to
+        ``version``; ``changed`` then lists every aircraft and the consumer
+        should drop anything it holds that is not in the table.
+        """
+        if version < self._removed_floor:
+            return TableDelta(self.version, list(self._aircraft), [], True)
+        changed = []
+        for icao, v in reversed(self._changed.items()):
+            if v <= version:
+                break
+            changed.append(icao)
+        removed = []
+        for icao, v in reversed(self._removed.items()):
+            if v <= version:
+                break
+            removed.append(icao)
+        return TableDelta(self.version, changed, removed, False)
+
+    def _located(self, cells):
+        icaos = [icao for key in cells for icao in self._cells.get(key, ())]
+        if not icaos:
+            return icaos, np.empty(0), np.empty(0)
+        fixes = np.array([self._aircraft[icao].track.last()[:2] for icao in icaos])
+        return icaos, fixes[:, 0], fixes[:, 1]
+
+    def within(self, lat, lon, radius_km):
+        """({icao: aircraft}, {icao: distance_m}, {icao: bearing_deg}) for aircraft within ``radius_km``
+
+        Only aircraft in the grid cells overlapping the search circle are
+        ranged, in one vectorized call.
+        """
+        icaos, lats, lons = self._located(grid_cells_near(lat, lon, radius_km, self.cell_deg))
+        if not icaos:
+            return {}, {}, {}
+        distance, bearing = range_bearing(lat, lon, lats, lons)
+        inside = np.flatnonzero(distance <= radius_km * 1000.0).tolist()
+        distance, bearing = distance.tolist(), bearing.tolist()
+        return ({icaos[i]: self._aircraft[icaos[i]] for i in inside},
+                {icaos[i]: distance[i] for i in inside},
+                {icaos[i]: bearing[i] for i in inside})
+
+    def in_box(self, south, west, north, east):
+        """{icao: aircraft} whose last position is inside a lat/lon box (``west > east`` wraps)"""
+        icaos, lats, lons = self._located(grid_cells_in_box(south, west, north, east, self.cell_deg))
+        if not icaos:
+            return {}
+        inside = (lats >= south) & (lats <= north)
+        if west <= east:
+            inside &= (lons >= west) & (lons <= east)
+        else:
+            inside &= (lons >= west) | (lons <= east)
+        return {icaos[i]: self._aircraft[icaos[i]] for i in np.flatnonzero(inside).tolist()}
+
+
+def douglas_peucker(x, y, tolerance):
+    """Indices of the points to keep so the polyline stays within ``tolerance`` of the original
+
+    Iterative, with the perpendicular distances of each span computed in one
+    vectorized step. Endpoints are always kept.
+    """
+    n = len(x)
+    if n < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dx = x[last] - x[first]
+        dy = y[last] - y[first]
+        px = x[first + 1:last] - x[first]
+        py = y[first + 1:last] - y[first]
+        norm = math.hypot(dx, dy)
+        if norm == 0:
+            dist = np.hypot(px, py)
+        else:
+            dist = np.abs(px * dy - py * dx) / norm
+        k = int(np.argmax(dist))
+        if dist[k] > tolerance:
+            mid = first + 1 + k
+            keep[mid] = True
+            stack.append((first, mid))
+            stack.append((mid, last))
+    return np.flatnonzero(keep)
@@ -0,0 +1,131 @@
+"""Coalescing dispatch of UI updates from worker threads to the Tk main loop.
+
+Worker threads used to call ``root.after(0, ...)`` for every event, so a busy
+scan or decoder queued thousands of Tk callbacks and the window fell seconds
+behind. ``UIDispatcher.post`` instead files the update under a key. A newer
+update for the same key replaces the one still waiting, since only the
+latest status text or map refresh matters. All waiting updates are then
+applied together in a single main-loop tick.
+
+At most one ``after`` is outstanding at a time, and none at all while
+nothing is pending. A key can also carry a minimum interval. Updates posted
+faster than that wait, still coalescing, until the interval has passed.
+Updates posted without a key are never merged and run in the order they
+were posted, for events such as "stop" or a batch of decoded frames.
+"""
+from collections import OrderedDict
+import itertools
+import threading
+import time
+
+DEFAULT_TICK_MS = 15     # Delay before a tick, so a burst of posts lands in one batch
+TICK_BUDGET_S = 0.02     # Main-loop time one tick may spend before yielding to Tk
+
+
+class UIDispatcher:
+    """Thread-safe, coalescing, rate-limited queue of callables run on the Tk thread"""
+    def __init__(self, root, metrics, tick_ms=DEFAULT_TICK_MS, budget_s=TICK_BUDGET_S, clock=time.monotonic):
+        self.root = root
+        self.tick_ms = tick_ms
+        self.budget_s = budget_s
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # key -> (fn, args, kwargs, posted_at)
+        self._intervals = {}           # key -> minimum seconds between applications
+        self._last_applied = {}        # key -> clock() when last applied; Tk thread only
+        self._unkeyed = itertools.count()
+        self._scheduled = False
+        self.posted = metrics.counter("ui_updates_posted_total")
+        self.coalesced = metrics.counter("ui_updates_coalesced_total")
+        self.applied = metrics.counter("ui_updates_applied_total")
+        self.ticks = metrics.counter("ui_dispatch_ticks_total")
+        self.depth = metrics.gauge("ui_dispatch_depth")
+        self.latency = metrics.histogram("ui_update_latency_seconds")
+        self.tick_time = metrics.histogram("stage_seconds", stage="ui_dispatch")
+
+    def rate_limit(self, key, min_interval_s):
+        """Apply updates for ``key`` at most once every ``min_interval_s`` seconds"""
+        with self._lock:
+            self._intervals[key] = min_interval_s
+
+    def post(self, key, fn, *args, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` for the Tk thread, replacing any update still waiting under ``key``
+
+        A ``key`` of None never coalesces. Safe to call from any thread.
+        """
+        with self._lock:
+            if key is None:
+                key = ("call", next(self._unkeyed))
+            elif key in self._pending:
+                self.coalesced.inc()
+            # A replaced update keeps its place so a stream of posts cannot starve it
+            self._pending[key] = (fn, args, kwargs, self.clock())
+            self.posted.inc()
+            self.depth.set(len(self._pending))
+            self._schedule(self.tick_ms)
+
+    def call(self, fn, *args, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` without coalescing"""
+        self.post(None, fn, *args, **kwargs)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _schedule(self, delay_ms):
+        # Caller holds the lock
+        if not self._scheduled:
+            self._scheduled = True
+            self.root.after(delay_ms, self._tick)
+
+    def _take_due(self, now):
+        """Pop the updates that may run now, as (key, fn, args, kwargs, posted_at)"""
+        due = []
+        for key in list(self._pending):
+            interval = self._intervals.get(key)
+            if interval and self._last_applied.get(key, -interval) + interval > now:
+                continue
+            due.append((key,) + self._pending.pop(key))
+        return due
+
+    def _next_delay_ms(self, now):
+        """Delay until the earliest pending update may run; caller holds the lock"""
+        wait_s = None
+        for key in self._pending:
+            interval = self._intervals.get(key)
+            ready_at = self._last_applied.get(key, -interval) + interval if interval else now
+            if ready_at <= now:
+                return self.tick_ms
+            wait_s = ready_at - now if wait_s is None else min(wait_s, ready_at - now)
+        return max(1, int(wait_s * 1000))
+
+    def _tick(self):
+        """Apply every due update in one main-loop callback"""
+        start = self.clock()
+        with self._lock:
+            self._scheduled = False
+            due = self._take_due(start)
+        self.ticks.inc()
+        for i, (key, fn, args, kwargs, posted_at) in enumerate(due):
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                print(f"UI update error: {e}")
+            now = self.clock()
+            if key in self._intervals:
+                self._last_applied[key] = now
+            self.applied.inc()
+            self.latency.observe(now - posted_at)
+            if now - start > self.budget_s and i + 1 < len(due):
+                # Give Tk a chance to redraw and handle input; the rest go first next tick,
+                # unless a newer update for the same key arrived meanwhile
+                with self._lock:
+                    leftover = OrderedDict((item[0], item[1:]) for item in due[i + 1:] if item[0] not in self._pending)
+                    leftover.update(self._pending)
+                    self._pending = leftover
+                break
+        self.tick_time.observe(self.clock() - start)
+        with self._lock:
+            self.depth.set(len(self._pending))
+            if self._pending:
+                self._schedule(self._next_delay_ms(self.clock()))